@@ -2,3 +2,28 @@
 @REM python -m src.aff.main
 @REM python -m src.aff.domain_test
 python -m src.aff.union_test
+@REM python -m src.aff.condition_test
+@REM python -m src.aff.row_test
+@REM python -m src.aff.hash_join_test
+@REM python -m src.aff.key_test
+@REM python -m src.aff.plan_test
+@REM python -m src.aff.mapped_test
+@REM python -m src.aff.text_test
+@REM python -m src.aff.group_by_test
+@REM python -m src.aff.merge_join_test
+@REM python -m src.aff.outer_join_test
+@REM python -m src.aff.storage_test
+@REM python -m src.aff.index_test
+@REM python -m src.aff.insert_many_test
+@REM python -m src.aff.validator_test
+@REM python -m src.aff.stream_test
+@REM python -m src.aff.batch_test
+@REM python -m src.aff.vectorize_test
+@REM python -m src.aff.order_by_test
+@REM python -m src.aff.limit_test
+@REM python -m src.aff.setop_test
+@REM python -m src.aff.parallel_select_test
+@REM python -m src.aff.parallel_join_test
+@REM python -m src.aff.transfer_test
+@REM python -m src.aff.cache_test
+@REM python -m src.aff.view_test
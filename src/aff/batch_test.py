@@ -0,0 +1,40 @@
+import random
+from ..base.relation import Relation
+from .plan_test import QUERIES, relation
+
+"""
+Checks that the plans run by batches (collect("batch")) give the same relation as the plans run one row at a time
+"""
+
+def same(batch: Relation, row: Relation) -> None:
+    assert batch.name == row.name and batch.storage == row.storage, batch.name
+    assert [field.name for field in batch.fields] == [field.name for field in row.fields], batch.name
+    # The rows are compared as multisets, with their types (repr tells 1, 1.0 and True apart)
+    assert sorted(map(repr, batch.rows_values())) == sorted(map(repr, row.rows_values())), batch.name
+
+def main():
+    random.seed(1)
+    for storage in ("row", "column"):
+        A, B, C = relation("A", 40, storage), relation("B", 30, storage), relation("C", 10, storage)
+
+        # ====================================================
+        # Batches against rows
+        # ====================================================
+        queries = QUERIES + [lambda r, B, C: r.select("v > 1").limit(9), lambda r, B, C: r.top_k(5, "v")]
+        for batch_size in (1, 7, 4096):
+            for query in queries:
+                lazy = query(A.lazy(), B, C)
+                same(lazy.collect("batch", batch_size), lazy.collect())
+        lazy = A.lazy().select("v >= 2")
+        assert sum(batch.length for batch in lazy.batches(7)) == len(lazy.collect())
+        assert all(batch.length <= 7 for batch in lazy.batches(7))
+        try:
+            lazy.collect("vector")
+            raise AssertionError("the mode doesn't exist")
+        except ValueError:
+            pass
+        print(f"{storage}: {len(queries)} plans give the same rows by batches of 1, 7 and 4096 rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+from ..base.column import Field
+from ..base.domain import Domain
+from ..base.relation import Relation
+from ..base.row import Tuple
+from ..cache.cache import ResultCache
+
+"""
+Checks that the cached results follow every change of the relations they read
+"""
+
+def person(storage: str) -> Relation:
+    relation = Relation(
+        "P",
+        Field("id", Domain(allowed_types = [int])),
+        Field("name", Domain(allowed_types = [str])),
+        Field("age", Domain(allowed_values = [None], allowed_types = [int])),
+        storage = storage
+    )
+    relation.insert_many([(i, f"n{i}", None if i % 7 == 0 else i % 50) for i in range(500)])
+    return relation
+
+def main():
+    for storage in ("row", "column"):
+        # ====================================================
+        # Hits
+        # ====================================================
+        relation, other = person(storage), person(storage)
+        cache = relation.enable_cache(ResultCache(max_entries = 4))
+        selected = relation.select("age == 5 and id < 300")
+        assert relation.select("id<300 and age==5") is selected  # Same normalized condition
+        joined = relation.natural_join(other, "id", "id")
+        assert relation.natural_join(other, "id", "id", workers = 2) is joined  # workers doesn't change the result
+        print(f"{storage}: the same operation on the same relations gives the cached result")
+
+        # ====================================================
+        # Invalidation
+        # ====================================================
+        count = len(selected)
+        relation.insert("id", -1, "name", "x", "age", 5)
+        assert len(relation.select("age == 5 and id < 300")) == count + 1
+        relation.insert_many([(-2, "y", 5)])
+        assert len(relation.select("age == 5 and id < 300")) == count + 2
+        relation.tuples.append(Tuple(relation, (-3, "z", 5)))
+        assert len(relation.select("age == 5 and id < 300")) == count + 3
+        relation.tuples = [row for row in relation.tuples if row.values[0] >= 0]
+        assert len(relation.select("age == 5 and id < 300")) == count
+
+        joined = relation.natural_join(other, "id", "id")
+        other.insert("id", 1000, "name", "w", "age", 1)
+        assert relation.natural_join(other, "id", "id") is not joined  # The other relation changed
+
+        result = relation.project("name")
+        result.insert("name", "changed")  # A changed result is dropped from the cache
+        assert len(relation.project("name")) == len(relation)
+
+        relation.add_field(Field("extra"))
+        assert len(relation.select("age == 5 and id < 300").fields) == 4
+        assert len(cache) <= 4 and cache.stats()["hits"] >= 2
+        print(f"{storage}: cached results follow every change of the relations: {cache}")
+
+        # ====================================================
+        # Disabled cache
+        # ====================================================
+        relation.disable_cache()
+        assert relation.select("age == 5") is not relation.select("age == 5")
+        try:
+            ResultCache(max_entries = 0)
+            raise AssertionError("the cache must hold at least one result")
+        except ValueError:
+            pass
+        print(f"{storage}: without a cache every call computes its result")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+from ..base.column import Field
+from ..base.relation import Relation
+from ..condition.compiler import Expression, compile_condition, parse_condition
+from ..condition.condition import simplify_and_evaluate
+
+"""
+Checks the compiled conditions against the evaluation of the condition as a string (condition.simplify_and_evaluate)
+"""
+
+VALUES = [1, 2, 3, 2.0, True, "a", "b", None]
+
+MEMBERSHIPS = ["x in (1, 'a')", "x not in (1, 'a')", "x in (2, 3) and y not in ('b', None)"]
+
+CONDITIONS = [
+    "x == 2", "x != 2", "x < 3", "x <= 2", "x > 1", "x >= 2", "x == y", "x != y", "x < y",
+    "x == 'a'", "2 == x", "3 > x",
+    "x == 2 and y > 1", "x == 2 or y == 'b'", "(x == 1 or x == 3) and y != None",
+]
+
+def reference(condition: str, x, y) -> bool:
+    """
+    The condition evaluated like before the compiler: the field names replaced by the values, then evaluated.
+    Values that can't be ordered (None < None) don't match
+    """
+    try:
+        return simplify_and_evaluate(condition.replace("x", repr(x)).replace("y", repr(y)))
+    except TypeError:
+        return False
+
+def main():
+    # ====================================================
+    # Compiled predicate against the string evaluation
+    # ====================================================
+    rows = [(x, y) for x in VALUES for y in VALUES]
+    positions = {"x": 0, "y": 1}
+    for condition in CONDITIONS:
+        predicate = compile_condition(condition, positions)
+        for x, y in rows:
+            assert predicate((x, y)) == reference(condition, x, y), (condition, x, y)
+    print(f"Compiled conditions: {len(CONDITIONS)} conditions checked on {len(rows)} rows")
+
+    # ====================================================
+    # Membership (the string evaluation doesn't support in)
+    # ====================================================
+    for condition in MEMBERSHIPS:
+        predicate = compile_condition(condition, positions)
+        for x, y in rows:
+            assert predicate((x, y)) == eval(condition, {"x": x, "y": y}), (condition, x, y)
+    print("Membership: ok")
+
+    # ====================================================
+    # Identity comparisons (is / is not)
+    # ====================================================
+    for condition in ("x is None", "x is not None", "None is y", "x is not None and y is None"):
+        predicate = compile_condition(condition, positions)
+        for x, y in rows:
+            assert predicate((x, y)) == eval(condition, {"x": x, "y": y}), (condition, x, y)
+    try:
+        parse_condition("x + 1", ["x"])
+        raise AssertionError("x + 1 isn't a condition")
+    except ValueError:
+        pass
+    try:
+        type("Incomplete", (Expression,), {"to_source": lambda self: ""})()
+        raise AssertionError("an expression must have an evaluator")
+    except TypeError:
+        pass
+    print("Identity comparisons: ok")
+
+    # ====================================================
+    # Relation.select and Tuple.evaluate_condition
+    # ====================================================
+    relation = Relation("R", Field("x"), Field("y"))
+    relation.insert_many(rows)
+    for condition in CONDITIONS + MEMBERSHIPS + ["x is None", "x == None", "x is not None"]:
+        expected = [(x, y) for x, y in rows if compile_condition(condition, positions)((x, y))]
+        assert list(relation.select(condition).rows_values()) == expected, condition
+        assert [row.values for row in relation.tuples if row.evaluate_condition(condition)] == expected, condition
+    print("Relation.select: the compiled conditions select the same rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import random
+from ..base.column import Field
+from ..base.domain import Domain
+from ..base.relation import Relation
+
+"""
+Checks that group_by gives the same groups when it spills to temporary files (small max_groups) as when every group fits in memory
+"""
+
+def fields():
+    return [
+        Field("k", Domain(allowed_types = [object])),
+        Field("g", Domain(allowed_types = [int])),
+        Field("x", Domain(allowed_values = [None], allowed_types = [int, float])),
+        Field("s", Domain(allowed_types = [str]))
+    ]
+
+def reference_groups(rows: list) -> set:
+    """
+    The groups computed with a dict, the keys of different types are different groups
+    """
+    groups = {}
+    for k, g, x, s in rows:
+        group = groups.setdefault(((type(k), k), g), [0, [], []])
+        group[0] += 1
+        if x is not None:
+            group[1].append(x)
+        group[2].append(s)
+    return {
+        (repr(key[0][1]), key[1], n, sum(xs) if xs else None, min(xs) if xs else None, max(ss), sum(xs) / len(xs) if xs else None)
+        for key, (n, xs, ss) in groups.items()
+    }
+
+def main():
+    random.seed(1)
+    rows = [
+        (random.choice([1, 1.0, True, "1", None]), random.randrange(300), random.choice([None, 1, 2.5, -3]), random.choice("abcdef"))
+        for _ in range(3000)
+    ]
+    for storage in ("row", "column"):
+        relation = Relation.from_rows("R", fields(), rows, storage)
+
+        # ====================================================
+        # In memory and spilled
+        # ====================================================
+        expected = reference_groups(rows)
+        for max_groups in (10**6, 100, 7, 1):
+            result = relation.group_by(["k", "g"], count = "n", sums = "x", minimums = "x", maximums = "s", averages = "x", max_groups = max_groups)
+            assert [field.name for field in result.fields] == ["k", "g", "n", "sum_x", "min_x", "max_s", "avg_x"]
+            assert {(repr(k), g, *aggregates) for k, g, *aggregates in result.rows_values()} == expected, (storage, max_groups)
+        assert list(relation.group_by([], count = True, max_groups = 1).rows_values()) == [(len(rows),)]
+        print(f"{storage}: group_by gives the same groups with max_groups 1, 7, 100 and in memory")
+
+        # ====================================================
+        # Errors
+        # ====================================================
+        try:
+            relation.group_by("g", count = True, max_groups = 0)
+            raise AssertionError("max_groups must be positive")
+        except ValueError:
+            pass
+        try:
+            relation.group_by("g", sums = "s")
+            raise AssertionError("the sum of a str")
+        except ValueError:
+            pass
+        unhashable = Relation.from_rows("U", fields(), [(1, 1, 1, "a"), ([1], 1, 2, "b")], storage)
+        try:
+            unhashable.group_by(["g", "k"], count = True)
+            raise AssertionError("a list can't be a group value")
+        except ValueError as error:
+            assert str(error).startswith("Column k can't be grouped"), error
+        print(f"{storage}: group_by raises a ValueError for a value it can't group or aggregate")
+
+
+if __name__ == "__main__":
+    main()
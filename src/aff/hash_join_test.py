@@ -0,0 +1,76 @@
+import random
+from ..base.column import Field
+from ..base.relation import Relation
+from ..condition.compiler import compile_condition
+
+"""
+Checks the hash joins (equi_join, natural_join, automatic_natural_join, theta_join with an equality)
+against the pairs of rows of the cartesian product, with None and keys of different types
+"""
+
+VALUES = [1, 2, 3, 2.0, True, "2", "a", None, (1, 2)]
+
+def relations(storage: str):
+    random.seed(7)
+    a = Relation("A", Field("id"), Field("k"), Field("v"), storage = storage)
+    b = Relation("B", Field("id"), Field("k"), Field("w"), storage = storage)
+    a.insert_many([(random.choice(VALUES), random.choice("ab"), i) for i in range(60)])
+    b.insert_many([(random.choice(VALUES), random.choice("ab"), i) for i in range(40)])
+    return a, b
+
+def expected_rows(a: Relation, b: Relation, condition: str, kept = None) -> list:
+    """
+    The rows of the cartesian product matching the condition, with only the kept positions of the rows of b
+    """
+    names = [f"A.{field.name}" for field in a.fields] + [f"B.{field.name}" for field in b.fields]
+    predicate = compile_condition(condition, {name: position for position, name in enumerate(names)})
+    kept = range(len(b.fields)) if kept is None else kept
+    return [x + tuple(y[position] for position in kept) for x in a.rows_values() for y in b.rows_values() if predicate(x + y)]
+
+def main():
+    for storage in ("row", "column"):
+        a, b = relations(storage)
+
+        # ====================================================
+        # Equality joins
+        # ====================================================
+        expected = expected_rows(a, b, "A.id == B.id")
+        equi_join = a.equi_join(b, "id", "id")
+        assert list(equi_join.rows_values()) == expected
+        assert equi_join.name == "A EQUI JOIN B" and [field.name for field in equi_join.fields] == ["A.id", "A.k", "A.v", "B.id", "B.k", "B.w"]
+        assert list(a.theta_join(b, "A.id == B.id", "hash").rows_values()) == expected
+        assert list(a.theta_join(b, "A.id == B.id and A.k == B.k", "hash").rows_values()) == expected_rows(a, b, "A.id == B.id and A.k == B.k")
+        assert list(a.theta_join(b, "A.id == B.id and A.v < B.w", "hash").rows_values()) == expected_rows(a, b, "A.id == B.id and A.v < B.w")
+
+        expected = expected_rows(a, b, "A.id == B.id and A.k == B.k", [2])
+        natural_join = a.natural_join(b, "id", "id", "k", "k")
+        assert list(natural_join.rows_values()) == expected
+        assert natural_join.name == "A NATURAL JOIN B: ('id', 'id', 'k', 'k')" and [field.name for field in natural_join.fields] == ["id", "k", "v", "w"]
+        automatic = a.automatic_natural_join(b)
+        assert list(automatic.rows_values()) == expected and automatic.name == "A NATURAL JOIN B"
+        for kind in ("hash", "sorted"):
+            indexed = Relation.from_rows("B", b.fields, b.rows_values(), storage)
+            indexed.create_index("id", kind)
+            assert list(a.equi_join(indexed, "id", "id").rows_values()) == expected_rows(a, b, "A.id == B.id"), kind
+        try:
+            a.equi_join(b, "id", "missing")
+            raise AssertionError("the field doesn't exist")
+        except ValueError:
+            pass
+        print(f"{storage}: hash joins agree with the cartesian product")
+
+        # ====================================================
+        # Fields with the same name
+        # ====================================================
+        left = Relation("L", Field("id"), Field("id"), storage = storage)
+        left.insert_many([(1, "first"), (2, "second")])
+        right = Relation("R", Field("id"), Field("x"), storage = storage)
+        right.insert_many([(1, "x1"), (3, "x3")])
+        assert list(left.equi_join(right, "id", "id").rows_values()) == [(1, "first", 1, "x1")]
+        assert list(left.natural_join(right, "id", "id").rows_values()) == [(1, "first", "x1")]
+        assert list(left.cartesian_product(left).rows_values())[1] == (1, "first", 2, "second")
+        print(f"{storage}: the columns of the result are taken by position")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+from ..base.column import Field
+from ..base.relation import Relation
+
+"""
+Checks the hash and sorted indexes against a scan of the column, None and values that can't be ordered included,
+and the selections using them against the same selections without index
+"""
+
+VALUES = [3, 1, None, 2.0, "b", 2, True, "a", None, 1, (1, 2), frozenset({1})]
+
+CONDITIONS = ["x == 2", "x == 1 and i > 3", "x == 'a'", "x == None", "x < 2", "x >= 2 and i < 10", "2 > x", "x == (1, 2)"]
+
+def main():
+    for storage in ("row", "column"):
+        for kind in ("hash", "sorted"):
+            relation = Relation("R", Field("x"), Field("i"), storage = storage)
+            relation.create_index("x", kind)
+            relation.insert_many([(x, i) for i, x in enumerate(VALUES)])
+            relation.insert("x", 2, "i", len(VALUES))  # Indexed on insert too
+
+            # ====================================================
+            # Lookups against a scan of the column
+            # ====================================================
+            index = relation.get_index("x")
+            column = list(relation.column_values("x"))
+            for value in VALUES:
+                expected = [i for i, x in enumerate(column) if type(x) is type(value) and x == value]
+                assert sorted(index.lookup("==", value)) == expected, (storage, kind, value)
+            assert sorted(index.lookup("==", None)) == [2, 8], (storage, kind)
+            if kind == "sorted":
+                for operator, expected in (("<", [1, 9]), ("<=", [1, 5, 9, 12]), (">", [0]), (">=", [0, 5, 12])):
+                    assert sorted(index.lookup(operator, 2)) == expected, (storage, operator)
+                assert index.lookup("<", None) in (None, []), storage
+
+            # ====================================================
+            # Selections with and without the index
+            # ====================================================
+            scanned = Relation.from_rows("R", relation.fields, relation.rows_values(), storage)
+            for condition in CONDITIONS:
+                assert list(relation.select(condition).rows_values()) == list(scanned.select(condition).rows_values()), (kind, condition)
+            print(f"{storage}: {kind} indexes agree with a scan, None and the unordered values included")
+
+        try:
+            relation.create_index("x", "btree")
+            raise AssertionError("the kind doesn't exist")
+        except ValueError:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+from ..base.column import Field
+from ..base.domain import Domain
+from ..base.relation import Relation
+
+"""
+Checks that insert_many inserts the same rows as insert, one by one, and reports the rows it rejects
+"""
+
+def person(storage: str) -> Relation:
+    relation = Relation("Person", Field("id", Domain(allowed_types = [int])), Field("name", Domain(allowed_values = [None], allowed_types = [str])), storage = storage)
+    relation.set_primary_key("id")
+    return relation
+
+def main():
+    for storage in ("row", "column"):
+        # ====================================================
+        # Reports
+        # ====================================================
+        relation = person(storage)
+        report = relation.insert_many([
+            (1, "Pupuce"),
+            {"id": 2, "name": "Japon"},
+            ("3", "Bozy"),               # 2: invalid type
+            (1, "Again"),                # 3: duplicate of a previous row
+            {"id": 4, "age": 12},        # 4: unknown field
+            (5, "Too", "many"),          # 5: too many values
+            (4, "Ok"),
+            (4, "Duplicate in the batch"),
+            (6,)                         # A missing value is None
+        ])
+        assert report.inserted == 4 and not report.ok
+        assert report.failed == [2, 3, 4, 5, 7], report.failed
+        assert "4 row(s) inserted, 5 row(s) rejected" in str(report)
+        assert list(relation.rows_values()) == [(1, "Pupuce"), (2, "Japon"), (4, "Ok"), (6, None)]
+        version = relation.version
+        assert relation.insert_many([(1, "Pupuce")]).inserted == 0 and relation.version == version
+        print(f"{storage}: insert_many reports the rejected rows and inserts the others")
+
+        # ====================================================
+        # Against insert
+        # ====================================================
+        rows = [(i, f"n{i}" if i % 3 else None) for i in range(200)]
+        many, one_by_one = person(storage), person(storage)
+        many.create_index("name", "sorted")
+        one_by_one.create_index("name", "sorted")
+        assert many.insert_many(rows).ok
+        for row_id, name in rows:
+            one_by_one.insert("id", row_id, "name", name)
+        assert list(many.rows_values()) == list(one_by_one.rows_values()) == rows
+        assert many.get_index("name").lookup("==", "n1") == one_by_one.get_index("name").lookup("==", "n1") == [1]
+        print(f"{storage}: insert_many inserts the same rows as insert")
+
+
+if __name__ == "__main__":
+    main()
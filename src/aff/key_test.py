@@ -0,0 +1,72 @@
+from ..base.column import Field
+from ..base.relation import Relation
+from ..base.row import Tuple
+
+"""
+Checks the primary and unique keys: duplicates and None rejected on every kind of insert,
+and a relation left as it was when its new rows break a key
+"""
+
+def main():
+    for storage in ("row", "column"):
+        # ====================================================
+        # Duplicates
+        # ====================================================
+        relation = Relation("Person", Field("id"), Field("name"), storage = storage)
+        relation.set_primary_key("id")
+        relation.add_unique_key("name")
+        relation.insert("id", 1, "name", "Pupuce")
+        for args in (("id", 1, "name", "Japon"), ("id", None, "name", "Japon"), ("id", 2, "name", "Pupuce")):
+            try:
+                relation.insert(*args)
+                raise AssertionError(f"{args} breaks a key")
+            except ValueError:
+                pass
+        relation.insert("id", 2, "name", None)
+        relation.insert("id", 3, "name", None)  # None isn't checked by a unique key
+        relation.insert("id", 1.0, "name", "Bozy")  # 1.0 isn't 1
+        for insert in (lambda: relation.add_tuple(Tuple(relation, (3, "Japon"))), lambda: relation.tuples.append(Tuple(relation, (3, "Japon")))):
+            try:
+                insert()
+                raise AssertionError("3 is already a key")
+            except ValueError:
+                pass
+        try:
+            relation.set_primary_key("name")
+            raise AssertionError("there's already a primary key")
+        except ValueError:
+            pass
+        try:
+            Relation.from_rows("P", relation.fields, [(1, "a"), (1, "b")], storage).set_primary_key("id")
+            raise AssertionError("the existing rows break the key")
+        except ValueError:
+            pass
+        assert len(relation) == 4
+        print(f"{storage}: keys reject the duplicates and the None of the primary key")
+
+        # ====================================================
+        # Replacing the rows
+        # ====================================================
+        relation.create_index("id", "sorted")
+        rows, version = list(relation.rows_values()), relation.version
+        for new_rows in ([(5, "a"), (5, "b")], [(5, "a"), (6, "a")], [(None, "a")]):
+            try:
+                relation.tuples = [Tuple(relation, values) for values in new_rows]
+                raise AssertionError(f"{new_rows} break a key")
+            except ValueError:
+                pass
+            assert list(relation.rows_values()) == rows and relation.version == version and len(relation.keys) == 2
+        try:
+            relation.insert("id", 1, "name", "Again")
+            raise AssertionError("the keys are still there")
+        except ValueError:
+            pass
+        relation.tuples = [row for row in relation.tuples if row.values[0] != 2]
+        assert [values[0] for values in relation.rows_values()] == [1, 3, 1.0]
+        relation.insert("id", 2, "name", "Japon")  # The keys were built again on the remaining rows
+        assert relation.get_index("id").lookup("==", 2) == [3]
+        print(f"{storage}: replacing the rows with rows breaking a key changes nothing")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import random
+from ..base.column import Field
+from ..base.domain import Domain
+from ..base.relation import Relation
+from .stream_test import count_reads
+
+"""
+Checks limit and top_k, eager and lazy, against order_by followed by the first rows
+"""
+
+def relation(storage: str) -> Relation:
+    fields = [Field("id", Domain(allowed_types = [int])), Field("x", Domain(allowed_values = [None], allowed_types = [int, float]))]
+    new_relation = Relation("R", *fields, storage = storage)
+    new_relation.insert_many([(i, random.choice([None, 1, 2, 2.5, 3, -1, 7])) for i in range(500)])
+    return new_relation
+
+def main():
+    random.seed(1)
+    for storage in ("row", "column"):
+        r = relation(storage)
+
+        # ====================================================
+        # limit
+        # ====================================================
+        for n in (0, 1, 10, 500, 1000):
+            expected = list(r.rows_values())[:n]
+            assert list(r.limit(n).rows_values()) == expected, n
+            assert list(r.lazy().limit(n).collect().rows_values()) == expected, n
+        assert list(r.select("x > 2").limit(3).rows_values()) == list(r.lazy().select("x > 2").limit(3).collect().rows_values())
+        reads = count_reads(r)
+        assert len(r.lazy().select("id >= 0").limit(20).collect()) == 20 and reads[0] == 20, reads
+        r = relation(storage)
+        print(f"{storage}: limit keeps the first rows, a lazy limit stops reading its input")
+
+        # ====================================================
+        # top_k
+        # ====================================================
+        for n in (0, 1, 5, 100, 600):
+            for descending in (True, False):
+                expected = list(r.order_by("x", descending = descending).limit(n).rows_values())
+                assert list(r.top_k(n, "x", descending).rows_values()) == expected, (n, descending)
+                assert list(r.lazy().top_k(n, "x", descending).collect().rows_values()) == expected, (n, descending)
+        print(f"{storage}: top_k gives the rows of order_by then limit")
+
+        # ====================================================
+        # Errors
+        # ====================================================
+        for operation in (lambda: r.limit(-1), lambda: r.top_k(-1, "x"), lambda: r.top_k(1, "missing"), lambda: r.lazy().limit(-1)):
+            try:
+                operation()
+                raise AssertionError("the operation must fail")
+            except ValueError:
+                pass
+        print(f"{storage}: limit and top_k reject a negative number of rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+from ..base.column import Field
+from ..base.domain import Domain
+from ..base.relation import Relation
+from ..constraint.constraint import RangeConstraint, StringLengthConstraint
+
+"""
+Checks that a relation written by save() is opened with the same values and types, and that saving
+over the file a relation was opened from keeps its rows
+"""
+
+def fields():
+    return [
+        Field("id", Domain(allowed_types = [int], constraints = [RangeConstraint(0, 10**30)])),
+        Field("score", Domain(allowed_types = [float])),
+        Field("name", Domain(allowed_types = [str], constraints = [StringLengthConstraint(0, 50)])),
+        Field("misc", Domain(allowed_values = [None], allowed_types = [int, str, bool, float]))
+    ]
+
+def person(storage: str) -> Relation:
+    relation = Relation("P", *fields(), storage = storage)
+    relation.insert_many([
+        {"id": i if i != 3 else 2**70, "score": i * 1.5, "name": f"n,{i}é\"q", "misc": [None, True, 1, "x", 2.5][i % 5]}
+        for i in range(50)
+    ])
+    return relation
+
+def typed_rows(relation: Relation) -> list:
+    return [[(type(value), value) for value in values] for values in relation.rows_values()]
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        for storage in ("row", "column"):
+            relation = person(storage)
+            path = os.path.join(directory, f"{storage}.bin")
+
+            # ====================================================
+            # save / open
+            # ====================================================
+            relation.save(path)
+            opened = Relation.open(path)
+            assert opened.name == "P" and opened.storage == "column"
+            assert [field.name for field in opened.fields] == [field.name for field in relation.fields]
+            assert typed_rows(opened) == typed_rows(relation)
+            condition = "id < 10 and misc == 1"
+            assert list(opened.select(condition).rows_values()) == list(relation.select(condition).rows_values())
+            with open(path, "rb") as file:
+                saved = file.read()
+            changed = Relation.open(path)
+            changed.insert_many([{"id": 100, "score": 1.0, "name": "z", "misc": None}])  # Copied in memory, the file doesn't change
+            with open(path, "rb") as file:
+                assert file.read() == saved and len(changed) == 51
+            print(f"{storage}: save and open give the same values and types")
+
+            # ====================================================
+            # Saving over the opened file
+            # ====================================================
+            opened.save(path)
+            assert typed_rows(Relation.open(path)) == typed_rows(relation) == typed_rows(opened)
+            changed.save(path)
+            assert len(Relation.open(path)) == 51 and typed_rows(opened) == typed_rows(relation)
+
+            broken = Relation("P", Field("values"), storage = storage)
+            broken.insert("values", [1, 2])
+            try:
+                broken.save(path)
+                raise AssertionError("a list can't be saved")
+            except ValueError:
+                pass
+            assert len(Relation.open(path)) == 51
+            assert not [file_name for file_name in os.listdir(directory) if file_name.endswith(".tmp")]  # The temporary file is removed
+            print(f"{storage}: saving over the file the relation was opened from keeps the rows, a failed save keeps the file")
+
+        # ====================================================
+        # Not a relation file
+        # ====================================================
+        path = os.path.join(directory, "other.bin")
+        for content in (b"", b"not a relation", b"X" * 64):
+            with open(path, "wb") as file:
+                file.write(content)
+            try:
+                Relation.open(path)
+                raise AssertionError(f"{content} isn't a relation file")
+            except ValueError:
+                pass
+        print("Files that aren't relation files are rejected")
+
+
+if __name__ == "__main__":
+    main()
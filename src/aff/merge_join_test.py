@@ -0,0 +1,63 @@
+import random
+from ..base.column import Field
+from ..base.relation import Relation
+from ..condition.compiler import compile_condition
+
+"""
+Checks the merge joins (theta_join with method "merge" or "auto") against the pairs of rows of the cartesian product
+matching the condition, with None and keys of different types
+"""
+
+VALUES = [1, 2, 3, 2.0, True, "2", "a", None, (1, 2)]
+
+OPERATORS = ["==", "<", "<=", ">", ">="]
+
+def relations(storage: str):
+    random.seed(7)
+    a = Relation("A", Field("id"), Field("k"), Field("v"), storage = storage)
+    b = Relation("B", Field("id"), Field("k"), Field("w"), storage = storage)
+    a.insert_many([(random.choice(VALUES), random.choice("ab"), i) for i in range(60)])
+    b.insert_many([(random.choice(VALUES), random.choice("ab"), i) for i in range(40)])
+    return a, b
+
+def expected_pairs(a: Relation, b: Relation, condition: str) -> list:
+    """
+    The rows of the cartesian product matching the condition
+    """
+    names = [f"A.{field.name}" for field in a.fields] + [f"B.{field.name}" for field in b.fields]
+    predicate = compile_condition(condition, {name: position for position, name in enumerate(names)})
+    return [x + y for x in a.rows_values() for y in b.rows_values() if predicate(x + y)]
+
+def same_rows(relation: Relation, rows: list) -> bool:
+    # The merge join gives the rows in the order of the join field: the rows are compared as multisets
+    return sorted(map(repr, relation.rows_values())) == sorted(map(repr, rows))
+
+def main():
+    for storage in ("row", "column"):
+        a, b = relations(storage)
+
+        # ====================================================
+        # Merge joins against the cartesian product
+        # ====================================================
+        for operator in OPERATORS:
+            for condition in (f"A.id {operator} B.id", f"A.id {operator} B.id and A.k == B.k"):
+                expected = expected_pairs(a, b, condition)
+                for method in ("merge", "auto", "nested_loop"):
+                    assert same_rows(a.theta_join(b, condition, method), expected), (storage, condition, method)
+        print(f"{storage}: merge joins agree with the cartesian product for {', '.join(OPERATORS)}")
+
+        # ====================================================
+        # Conditions a merge join can't run
+        # ====================================================
+        assert same_rows(a.theta_join(b, "A.id != B.id"), expected_pairs(a, b, "A.id != B.id"))  # auto falls back to a nested loop
+        for condition in ("A.id != B.id", "A.v == 1"):
+            try:
+                a.theta_join(b, condition, "merge")
+                raise AssertionError(f"a merge join can't run {condition}")
+            except ValueError:
+                pass
+        print(f"{storage}: a merge join needs an equality or a range between the two relations")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import random
+from ..base.column import Field
+from ..base.domain import Domain
+from ..base.relation import Relation
+
+"""
+Checks that order_by gives the same order when it sorts by runs written to temporary files (small max_rows)
+as when every row fits in memory, and that it sorts like sorted() with None last
+"""
+
+def fields():
+    return [
+        Field("k", Domain(allowed_types = [object])),
+        Field("g", Domain(allowed_types = [int])),
+        Field("x", Domain(allowed_values = [None], allowed_types = [int, float])),
+        Field("s", Domain(allowed_types = [str]))
+    ]
+
+def main():
+    random.seed(1)
+    rows = [
+        (random.choice([1, 1.0, True, "1", None]), random.randrange(300), random.choice([None, 1, 2.5, -3]), random.choice("abcdef"))
+        for _ in range(3000)
+    ]
+    for storage in ("row", "column"):
+        relation = Relation.from_rows("R", fields(), rows, storage)
+
+        # ====================================================
+        # In memory and by runs
+        # ====================================================
+        for field_names, descending in ((("g",), False), (("g", "s"), [True, False]), (("x", "g"), False), (("s",), True)):
+            expected = list(relation.order_by(*field_names, descending = descending).rows_values())
+            for max_rows in (1, 7, 1000):
+                result = relation.order_by(*field_names, descending = descending, max_rows = max_rows)
+                assert list(result.rows_values()) == expected, (storage, field_names, max_rows)
+        # None comes last, equal rows keep their order
+        expected = sorted(rows, key = lambda row: (row[2] is None, row[2] if row[2] is not None else 0))
+        assert list(relation.order_by("x", max_rows = 5).rows_values()) == expected
+        expected = sorted(rows, key = lambda row: (row[1], row[3]))
+        assert list(relation.order_by("g", "s", max_rows = 7).rows_values()) == expected
+        print(f"{storage}: order_by gives the same order with max_rows 1, 7 and in memory")
+
+        # ====================================================
+        # Errors
+        # ====================================================
+        for max_rows in (0, -1):
+            try:
+                relation.order_by("g", max_rows = max_rows)
+                raise AssertionError("max_rows must be positive")
+            except ValueError:
+                pass
+        for field_name in ("k", "missing"):
+            try:
+                relation.order_by(field_name, max_rows = 5)
+                raise AssertionError(f"{field_name} can't be sorted")
+            except ValueError:
+                pass
+        print(f"{storage}: order_by raises a ValueError for values it can't sort")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import random
+from ..base.column import Field
+from ..base.relation import Relation
+from ..condition.compiler import compile_condition
+
+"""
+Checks the outer joins against the pairs of rows of the cartesian product matching the condition,
+plus every unmatched row once, with None and keys of different types
+"""
+
+VALUES = [1, 2, 3, 2.0, True, "2", "a", None, (1, 2)]
+
+def relations(storage: str):
+    random.seed(7)
+    a = Relation("A", Field("id"), Field("k"), Field("v"), storage = storage)
+    b = Relation("B", Field("id"), Field("k"), Field("w"), storage = storage)
+    a.insert_many([(random.choice(VALUES), random.choice("ab"), i) for i in range(60)])
+    b.insert_many([(random.choice(VALUES), random.choice("ab"), i) for i in range(40)])
+    return a, b
+
+def expected_pairs(a: Relation, b: Relation, condition: str) -> list:
+    """
+    The rows of the cartesian product matching the condition
+    """
+    names = [f"A.{field.name}" for field in a.fields] + [f"B.{field.name}" for field in b.fields]
+    predicate = compile_condition(condition, {name: position for position, name in enumerate(names)})
+    return [x + y for x in a.rows_values() for y in b.rows_values() if predicate(x + y)]
+
+def with_rows(relation: Relation, rows: list) -> Relation:
+    return Relation.from_rows(relation.name, relation.fields, rows)
+
+def expected_outer(a: Relation, b: Relation, condition: str, keep_self: bool, keep_other: bool) -> list:
+    rows = expected_pairs(a, b, condition)
+    if keep_self:
+        rows += [x + (None,) * len(b.fields) for x in a.rows_values() if not expected_pairs(with_rows(a, [x]), b, condition)]
+    if keep_other:
+        rows += [(None,) * len(a.fields) + y for y in b.rows_values() if not expected_pairs(a, with_rows(b, [y]), condition)]
+    return rows
+
+def same_rows(relation: Relation, rows: list) -> bool:
+    # The merge join gives the rows in the order of the join field: the rows are compared as multisets
+    return sorted(map(repr, relation.rows_values())) == sorted(map(repr, rows))
+
+def main():
+    for storage in ("row", "column"):
+        a, b = relations(storage)
+
+        # ====================================================
+        # Outer joins
+        # ====================================================
+        for condition in ("A.id == B.id", "A.id < B.id", "A.id >= B.id and A.k == B.k", "A.id != B.id"):
+            methods = ("auto", "nested_loop") + (("merge",) if "!=" not in condition else ())
+            for method in methods:
+                assert same_rows(a.outer_join(b, condition, method), expected_outer(a, b, condition, True, True)), (condition, method)
+                assert same_rows(a.left_outer_join(b, condition, method), expected_outer(a, b, condition, True, False)), (condition, method)
+                assert same_rows(a.right_outer_join(b, condition, method), expected_outer(a, b, condition, False, True)), (condition, method)
+        print(f"{storage}: outer joins keep every unmatched row once")
+
+        # ====================================================
+        # Without matches
+        # ====================================================
+        empty = Relation("B", *b.fields, storage = storage)
+        assert same_rows(a.left_outer_join(empty, "A.id == B.id"), expected_outer(a, empty, "A.id == B.id", True, False))
+        assert len(a.right_outer_join(empty, "A.id == B.id")) == 0
+        assert same_rows(empty.outer_join(a, "B.id == A.id"), expected_outer(empty, a, "B.id == A.id", False, True))
+        print(f"{storage}: outer joins with an empty relation")
+
+
+if __name__ == "__main__":
+    main()
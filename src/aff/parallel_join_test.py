@@ -0,0 +1,55 @@
+import random
+from ..base.column import Field
+from ..base.relation import Relation
+from ..join.join import hash_join
+from ..parallel.parallel import parallel_hash_join
+
+"""
+Checks that the hash joins run by a pool of workers, partition by partition, give the pairs of the sequential hash join
+in the same order, with None, keys of different types and keys that can't be hashed
+"""
+
+VALUES = [1, 2, 3, 2.0, True, "2", "a", None, (1, 2)]
+
+def relations(storage: str):
+    a = Relation("A", Field("id"), Field("k"), Field("v"), storage = storage)
+    b = Relation("B", Field("id"), Field("k"), Field("w"), storage = storage)
+    a.insert_many([(random.choice(VALUES), random.choice("ab"), i) for i in range(300)])
+    b.insert_many([(random.choice(VALUES), random.choice("ab"), i) for i in range(200)])
+    return a, b
+
+def main():
+    random.seed(5)
+    for storage in ("row", "column"):
+        a, b = relations(storage)
+
+        # ====================================================
+        # Joins with workers against the sequential joins
+        # ====================================================
+        for workers in (1, 2):
+            assert list(a.equi_join(b, "id", "id", workers = workers).rows_values()) == list(a.equi_join(b, "id", "id").rows_values())
+            assert list(a.natural_join(b, "id", "id", "k", "k", workers = workers).rows_values()) == list(a.natural_join(b, "id", "id", "k", "k").rows_values())
+            assert list(a.automatic_natural_join(b, workers = workers).rows_values()) == list(a.automatic_natural_join(b).rows_values())
+        print(f"{storage}: the joins by 1 and 2 workers give the rows of the sequential joins, in the same order")
+
+        # ====================================================
+        # Partitions
+        # ====================================================
+        left_keys, right_keys = a.join_keys(["id", "k"]), b.join_keys(["id", "k"])
+        expected = list(hash_join(left_keys, right_keys))
+        for partitions in (1, 3, 16):
+            left, right = parallel_hash_join(left_keys, right_keys, 2, partitions)
+            assert list(zip(left, right)) == expected, partitions
+        unhashable = [([value],) for value in range(5)]  # Joined sequentially
+        assert parallel_hash_join(unhashable, unhashable, 2) == ([0, 1, 2, 3, 4], [0, 1, 2, 3, 4])
+        for workers, partitions in ((0, None), (2, 0)):
+            try:
+                parallel_hash_join(left_keys, right_keys, workers, partitions)
+                raise AssertionError("workers and partitions must be positive")
+            except ValueError:
+                pass
+        print(f"{storage}: any number of partitions gives the pairs of the sequential hash join")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import random
+from ..base.column import Field
+from ..base.domain import Domain
+from ..base.relation import Relation
+from ..condition.compiler import parse_condition
+from ..parallel.parallel import parallel_select_indexes
+
+"""
+Checks that the selections evaluated by a pool of workers, partition by partition, give the rows of the sequential selection
+"""
+
+CONDITIONS = [
+    "age > 18", "age >= 18 and name != 'n3'", "name in ('n1', 'n2') or age is None", "id < 10", "age == 18.0", "not (age < 50)",
+]
+
+def person(storage: str) -> Relation:
+    fields = [
+        Field("id", Domain(allowed_types = [int])),
+        Field("name", Domain(allowed_types = [str])),
+        Field("age", Domain(allowed_values = [None], allowed_types = [int]))
+    ]
+    relation = Relation("P", *fields, storage = storage)
+    relation.insert_many([(i, f"n{i % 7}", random.choice([None, 5, 18, 30, 70])) for i in range(1000)])
+    return relation
+
+def main():
+    random.seed(2)
+    for storage in ("row", "column"):
+        relation = person(storage)
+
+        # ====================================================
+        # Workers against the sequential selection
+        # ====================================================
+        for condition in CONDITIONS:
+            expected = relation.select(condition)
+            for partition_size in (1, 64, 1000, 5000):
+                result = relation.select(condition, workers = 2, partition_size = partition_size)
+                assert result.name == expected.name and list(result.rows_values()) == list(expected.rows_values()), (condition, partition_size)
+        print(f"{storage}: {len(CONDITIONS)} selections by 2 workers give the sequential rows")
+
+        # ====================================================
+        # Errors
+        # ====================================================
+        expression = parse_condition("age > 18", relation.positions())
+        for workers, partition_size in ((0, 10), (2, 0)):
+            try:
+                relation.select("age > 18", workers = workers, partition_size = partition_size)
+                raise AssertionError("workers and partition_size must be positive")
+            except ValueError:
+                pass
+            try:
+                parallel_select_indexes(relation, expression, workers, partition_size)
+                raise AssertionError("workers and partition_size must be positive")
+            except ValueError:
+                pass
+        print(f"{storage}: the number of workers and the partition size must be positive")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import random
+from ..base.column import Field
+from ..base.domain import Domain
+from ..base.relation import Relation
+from ..plan.plan import PlanNode
+
+"""
+Checks that the optimized lazy queries give the same relation as the eager operations
+"""
+
+VALUES = [1, 2, 3, "1", 2.0, None]
+
+QUERIES = [
+    lambda r, B, C: r.cartesian_product(B).select("A.id == B.id and A.v > 2 and B.s == 'a'"),
+    lambda r, B, C: r.cartesian_product(B).select("A.id == B.id").select("A.v <= B.v or B.s == 'b'").project("A.s", "B.v"),
+    lambda r, B, C: r.cartesian_product(B).cartesian_product(C).select("A.id == B.id and A x B.B.v == C.v and C.s == 'c'").project("C.id"),
+    lambda r, B, C: r.theta_join(B, "A.v < B.v").select("B.s == 'c' and A.s == 'a'").project("B.id"),
+    lambda r, B, C: r.theta_join(B, "A.id >= B.id and A.s != B.s"),
+    lambda r, B, C: r.equi_join(B, "id", "id").select("A.v == 1"),
+    lambda r, B, C: r.natural_join(B, "id", "id").select("v == 3"),
+    lambda r, B, C: r.automatic_natural_join(B),
+    lambda r, B, C: r.select("v > 1").select("s == 'a'").project("id", "v").project("id"),
+    lambda r, B, C: r.select("id is None or id in (1, '1')"),
+    lambda r, B, C: r.project("id", "v").select("v == 3"),
+    lambda r, B, C: r.union(B, {"id": "id", "v": "v"}).select("v == 3"),
+    lambda r, B, C: r.difference(B, {"id": "id", "v": "v"}).select("v == 3"),
+    lambda r, B, C: r.intersection(B, {"id": "id", "v": "v"}),
+    lambda r, B, C: r.cartesian_product(C).select("A.v == 2"),
+]
+
+def relation(name: str, n: int, storage: str) -> Relation:
+    fields = [Field(field_name, Domain(allowed_types = [object])) for field_name in ("id", "v", "s")]
+    new_relation = Relation(name, *fields, storage = storage)
+    new_relation.insert_many([(random.choice(VALUES), random.randint(0, 5), random.choice("abc")) for _ in range(n)])
+    return new_relation
+
+def same(lazy: Relation, eager: Relation) -> None:
+    assert lazy.name == eager.name, (lazy.name, eager.name)
+    assert [field.name for field in lazy.fields] == [field.name for field in eager.fields], lazy.name
+    # The optimizer can change the order of the joined rows: the rows are compared as multisets
+    assert sorted(map(repr, lazy.rows_values())) == sorted(map(repr, eager.rows_values())), lazy.name
+
+def main():
+    random.seed(1)
+    for storage in ("row", "column"):
+        A, B, C = relation("A", 40, storage), relation("B", 30, storage), relation("C", 10, storage)
+
+        # ====================================================
+        # Lazy against eager
+        # ====================================================
+        for query in QUERIES:
+            same(query(A.lazy(), B, C).collect(), query(A, B, C))
+        print(f"{storage}: {len(QUERIES)} optimized lazy queries give the eager result")
+
+        # ====================================================
+        # Optimizer
+        # ====================================================
+        query = A.lazy().cartesian_product(B).select("A.id == B.id and A.v > 2").project("A.s")
+        assert "Product" in query.explain(optimized = False) and "Product" not in query.explain()
+        try:
+            A.lazy().select("v >")
+            raise AssertionError("the condition is parsed right away")
+        except ValueError:
+            pass
+        print(f"{storage}: the optimizer replaces the selected product by a join")
+
+    try:
+        type("Incomplete", (PlanNode,), {"fields": lambda self: [], "describe": lambda self: ""})()
+        raise AssertionError("a node must be able to run")
+    except TypeError:
+        pass
+
+
+if __name__ == "__main__":
+    main()
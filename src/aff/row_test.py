@@ -0,0 +1,53 @@
+from ..base.column import Field
+from ..base.relation import Relation
+from ..base.row import Tuple
+
+"""
+Checks the rows of both storages: read-only data, equality with the types of the values, no hash
+"""
+
+def main():
+    for storage in ("row", "column"):
+        relation = Relation("Person", Field("id"), Field("name"), storage = storage)
+        relation.insert_many([(1, "Pupuce"), (True, "Pupuce"), (1.0, "Pupuce"), (1, "Pupuce")])
+        rows = relation.tuples
+
+        # ====================================================
+        # data
+        # ====================================================
+        assert dict(rows[0].data) == {"id": 1, "name": "Pupuce"} and rows[0].data["name"] == "Pupuce"
+        assert list(rows[0].data) == ["id", "name"] and len(rows[0].data) == 2
+        try:
+            rows[0].data["name"] = "Japon"
+            raise AssertionError("data is read-only")
+        except TypeError:
+            pass
+        try:
+            rows[0] = Tuple(relation, (2, "Japon"))
+            raise AssertionError("tuples is read-only")
+        except TypeError:
+            pass
+        assert str(rows[0]) == "Relation: Person, data: {'id': 1, 'name': 'Pupuce'}"
+        print(f"{storage}: data is a read-only mapping")
+
+        # ====================================================
+        # Equality
+        # ====================================================
+        assert rows[0] == rows[3] and rows[0] == Tuple(relation, (1, "Pupuce"))
+        assert rows[0] != rows[1] and rows[0] != rows[2] and rows[1] != rows[2]  # 1, True and 1.0 are different
+        for row in (rows[0], Tuple(relation, (1, "Pupuce"))):
+            try:
+                {row}
+                raise AssertionError("a row can change, it isn't hashable")
+            except TypeError:
+                pass
+        row = rows[0].copy()
+        row.add_value("name", "Japon")
+        assert row.values == (1, "Japon") and rows[0].values == (1, "Pupuce")
+        row.data = {"id": 2}
+        assert row.values == (2, None)
+        print(f"{storage}: rows are equal with the same values of the same types")
+
+
+if __name__ == "__main__":
+    main()
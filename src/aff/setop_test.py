@@ -0,0 +1,63 @@
+import random
+from ..base.column import Field
+from ..base.domain import Domain
+from ..base.relation import Relation
+
+"""
+Checks union, intersection and difference against the same operations on lists of values with their types:
+1, 1.0, True and "1" are different values, with and without an index on the other relation
+"""
+
+VALUES = [1, 1.0, True, "1", 2, None, "a"]
+
+def relation(name: str, n: int, storage: str) -> Relation:
+    fields = [Field(field_name, Domain(allowed_types = [object])) for field_name in ("id", "v", "w")]
+    new_relation = Relation(name, *fields, storage = storage)
+    new_relation.insert_many([(random.choice(VALUES), random.choice(VALUES), i) for i in range(n)])
+    return new_relation
+
+def typed(rows) -> list:
+    return [tuple((type(value), value) for value in values) for values in rows]
+
+def main():
+    random.seed(3)
+    mapping = {"id": "id", "v": "v"}
+    for storage in ("row", "column"):
+        a, b = relation("A", 80, storage), relation("B", 30, storage)
+        left = [values[:2] for values in a.rows_values()]
+        right = [values[:2] for values in b.rows_values()]
+
+        # ====================================================
+        # Against the operations on lists
+        # ====================================================
+        expected_union = []
+        for values in typed(left + right):
+            if values not in expected_union:
+                expected_union.append(values)
+        for other in (b, None):
+            if other is None:
+                other = Relation.from_rows("B", b.fields, b.rows_values(), storage)
+                other.create_index("v", "hash")  # The membership is answered by the index
+            union = a.union(other, mapping)
+            assert union.name == "A_UNION_B" and [field.name for field in union.fields] == ["id", "v"]
+            assert typed(union.rows_values()) == expected_union
+            assert typed(a.intersection(other, mapping).rows_values()) == [values for values in typed(left) if values in typed(right)]
+            assert typed(a.difference(other, mapping).rows_values()) == [values for values in typed(left) if values not in typed(right)]
+        print(f"{storage}: set operations tell 1, 1.0, True and '1' apart, with and without index")
+
+        # ====================================================
+        # Mapped fields with other names
+        # ====================================================
+        renamed = Relation.from_rows("C", [Field("x", Domain(allowed_types = [object])), Field("y", Domain(allowed_types = [object]))], right, storage)
+        assert typed(a.intersection(renamed, {"id": "x", "v": "y"}).rows_values()) == typed(a.intersection(b, mapping).rows_values())
+        for wrong in ({"missing": "id"}, {"id": "missing"}):
+            try:
+                a.union(b, wrong)
+                raise AssertionError("the field doesn't exist")
+            except ValueError:
+                pass
+        print(f"{storage}: the fields of the other relation are found by the mapping")
+
+
+if __name__ == "__main__":
+    main()
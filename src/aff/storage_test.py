@@ -0,0 +1,72 @@
+from array import array
+from ..base.column import Field
+from ..base.domain import Domain
+from ..base.relation import Relation
+
+"""
+Checks that the column storage gives the same rows, with the same types, as the row storage
+"""
+
+def fields():
+    return [
+        Field("id", Domain(allowed_types = [int])),
+        Field("score", Domain(allowed_types = [float])),
+        Field("flag", Domain(allowed_types = [int, bool])),
+        Field("name", Domain(allowed_values = [None], allowed_types = [str]))
+    ]
+
+ROWS = [(i, i * 0.5, True if i % 3 == 0 else i, None if i % 4 == 0 else f"n{i % 5}") for i in range(40)]
+
+OPERATIONS = [
+    lambda r, o: r.select("id > 10 and name != None"),
+    lambda r, o: r.project("name", "id"),
+    lambda r, o: r.cartesian_product(o).select("P.id == Q.id"),
+    lambda r, o: r.theta_join(o, "P.id < Q.score"),
+    lambda r, o: r.equi_join(o, "flag", "flag"),
+    lambda r, o: r.natural_join(o, "id", "id"),
+    lambda r, o: r.outer_join(o, "P.name == Q.name"),
+    lambda r, o: r.union(o, {"id": "id", "score": "score", "flag": "flag", "name": "name"}),
+    lambda r, o: r.copy_with_renamed_fields("X"),
+]
+
+def values_and_types(relation: Relation) -> list:
+    return [[(type(value), value) for value in values] for values in relation.rows_values()]
+
+def main():
+    row = Relation.from_rows("P", fields(), ROWS)
+    column = Relation.from_rows("P", fields(), ROWS, "column")
+    other_row = Relation.from_rows("Q", fields(), ROWS[::3])
+    other_column = Relation.from_rows("Q", fields(), ROWS[::3], "column")
+
+    # ====================================================
+    # Columns
+    # ====================================================
+    assert isinstance(column.column_values("id"), array) and isinstance(column.column_values("score"), array)
+    assert isinstance(column.column_values("flag"), list)  # True isn't an int
+    column.insert("id", True, "score", 1.0, "flag", 1, "name", "x")  # True is valid for an int domain
+    assert isinstance(column.column_values("id"), list) and isinstance(column.column_values("score"), array)
+    assert [type(value) for value in column.row_values(len(column) - 1)] == [bool, float, int, str]
+    try:
+        Relation("P", storage = "columns")
+        raise AssertionError("the storage doesn't exist")
+    except ValueError:
+        pass
+    column = Relation.from_rows("P", fields(), ROWS, "column")
+    assert values_and_types(row) == values_and_types(column)
+    assert [tuple(view.values) for view in column.tuples] == ROWS and dict(column.tuples[1].data) == dict(row.tuples[1].data)
+    print("column: typed columns keep the exact type of their values")
+
+    # ====================================================
+    # Operations on both storages
+    # ====================================================
+    for operation in OPERATIONS:
+        row_result, column_result = operation(row, other_row), operation(column, other_column)
+        assert row_result.storage == "row" and column_result.storage == "column"
+        assert row_result.name == column_result.name
+        assert values_and_types(row_result) == values_and_types(column_result), row_result.name
+    assert len(row.fields) == len(column.fields) == 4  # project doesn't remove the fields of the relation
+    print(f"column: {len(OPERATIONS)} operations give the same rows as the row storage")
+
+
+if __name__ == "__main__":
+    main()
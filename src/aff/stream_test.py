@@ -0,0 +1,62 @@
+from itertools import islice
+from ..base.column import Field
+from ..base.domain import Domain
+from ..base.relation import Relation
+
+"""
+Checks that iterating a lazy relation streams its rows: the same rows as collect(), and stopping early doesn't read the rest of the input
+"""
+
+def person(storage: str) -> Relation:
+    relation = Relation("P", Field("id", Domain(allowed_types = [int])), Field("age", Domain(allowed_types = [int])), storage = storage)
+    relation.insert_many([(i, i % 90) for i in range(10_000)])
+    return relation
+
+def count_reads(relation: Relation) -> list:
+    """
+    Counts the rows read from the relation (the rows of a Scan come from rows_values)
+    """
+    reads = [0]
+    rows_values = relation.rows_values
+    def counted():
+        for values in rows_values():
+            reads[0] += 1
+            yield values
+    relation.rows_values = counted
+    return reads
+
+def main():
+    for storage in ("row", "column"):
+        relation, other = person(storage), person(storage)
+        queries = [
+            relation.lazy().select("age > 18").project("id"),
+            relation.lazy().select("age == 3").equi_join(other, "id", "id"),
+            relation.lazy().project("age", "id").select("id < 100").limit(5),
+        ]
+
+        # ====================================================
+        # Streamed rows against collect()
+        # ====================================================
+        for query in queries:
+            rows = list(query)
+            collected = query.collect()
+            assert [row.values for row in rows] == list(collected.rows_values()), query.name
+            assert [field.name for field in rows[0].relation.fields] == [field.name for field in collected.fields]
+        assert dict(next(iter(queries[0])).data) == {"id": 19}
+        print(f"{storage}: iterating a lazy relation gives the rows of collect()")
+
+        # ====================================================
+        # Stopping early
+        # ====================================================
+        reads = count_reads(relation)
+        first = list(islice(relation.lazy().select("age > 18").project("id"), 10))
+        assert [row.values for row in first] == [(i,) for i in range(19, 29)]
+        assert reads[0] == 29, reads
+        reads[0] = 0
+        assert len(list(islice(relation.lazy().equi_join(other, "id", "id"), 3))) == 3
+        assert reads[0] == 3, reads  # other is the build side, relation is probed row by row
+        print(f"{storage}: stopping after the first rows leaves the rest of the input unread")
+
+
+if __name__ == "__main__":
+    main()
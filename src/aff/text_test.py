@@ -0,0 +1,95 @@
+import os
+import tempfile
+from ..base.column import Field
+from ..base.domain import Domain
+from ..base.relation import Relation
+from ..constraint.constraint import RangeConstraint, StringLengthConstraint
+from ..persistence.text import load_rows
+
+"""
+Checks the CSV and JSON Lines round trips (same values, same types), the values CSV can't keep, and the invalid rows
+"""
+
+def fields():
+    return [
+        Field("id", Domain(allowed_types = [int], constraints = [RangeConstraint(0, 10**30)])),
+        Field("score", Domain(allowed_types = [float])),
+        Field("name", Domain(allowed_types = [str], constraints = [StringLengthConstraint(0, 50)])),
+        Field("misc", Domain(allowed_values = [None], allowed_types = [int, str, bool, float]))
+    ]
+
+def typed_rows(relation: Relation) -> list:
+    return [[(type(value), value) for value in values] for values in relation.rows_values()]
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "person.csv")
+        jsonl_path = os.path.join(directory, "person.jsonl")
+        for storage in ("row", "column"):
+            # ====================================================
+            # Round trips
+            # ====================================================
+            relation = Relation("P", *fields(), storage = storage)
+            relation.insert_many([
+                {"id": i, "score": i * 1.5, "name": f"n,{i}é\"q", "misc": [None, True, 1, "x", 2.5][i % 5]} for i in range(50)
+            ])
+            relation.to_csv(csv_path, chunk_size = 7)
+            relation.to_jsonl(jsonl_path, chunk_size = 7)
+            assert typed_rows(Relation.from_csv(csv_path, "P", *fields(), storage = storage, chunk_size = 7)) == typed_rows(relation)
+            assert typed_rows(Relation.from_jsonl(jsonl_path, "P", *fields(), storage = storage, chunk_size = 7)) == typed_rows(relation)
+            print(f"{storage}: CSV and JSON Lines round trips keep the values and types")
+
+            # ====================================================
+            # Values a CSV cell can't keep
+            # ====================================================
+            mixed = lambda: [Field("id", Domain(allowed_types = [int])), Field("code", Domain(allowed_values = [None], allowed_types = [int, str]))]
+            relation = Relation("M", *mixed(), storage = storage)
+            relation.insert_many([(1, 20), (2, "abc"), (3, None), (4, "2x")])
+            relation.to_csv(csv_path)
+            assert typed_rows(Relation.from_csv(csv_path, "M", *mixed(), storage = storage)) == typed_rows(relation)
+            for value in ("20", ""):
+                relation.insert("id", 5 + len(value), "code", value)
+                try:
+                    relation.to_csv(csv_path)
+                    raise AssertionError(f"{value!r} would be read back as another value")
+                except ValueError as e:
+                    assert "Column code" in str(e), e
+                relation.tuples = relation.tuples[:4]
+            relation.to_jsonl(jsonl_path)
+            assert typed_rows(Relation.from_jsonl(jsonl_path, "M", *mixed(), storage = storage)) == typed_rows(relation)
+            print(f"{storage}: to_csv refuses the values from_csv wouldn't read back")
+
+            # ====================================================
+            # Invalid rows
+            # ====================================================
+            with open(csv_path, "w", encoding = "utf-8") as file:
+                file.write("name,id\nok,1\nbad,-5\nok2,3\n")
+            try:
+                Relation.from_csv(csv_path, "P", *fields())
+                raise AssertionError("-5 isn't in the range")
+            except ValueError as e:
+                assert "line 3" in str(e), e
+            skipped = Relation.from_csv(csv_path, "P", *fields(), storage = storage, on_error = "skip")
+            assert list(skipped.rows_values()) == [(1, None, "ok", None), (3, None, "ok2", None)]
+            try:
+                Relation.from_csv(csv_path, "P", *fields(), on_error = "ignore")
+                raise AssertionError("the error mode doesn't exist")
+            except ValueError:
+                pass
+
+            # A failing chunk is taken out of the relation, the previous chunks stay
+            relation = Relation("P", *fields(), storage = storage)
+            relation.set_primary_key("id")
+            rows = [(line, {"id": i, "name": "n"}) for line, i in enumerate([1, 2, 3, 4, -1, 6], start = 2)]
+            try:
+                load_rows(relation, rows, 3, "raise", "rows")
+                raise AssertionError("-1 isn't in the range")
+            except ValueError as e:
+                assert "line 6" in str(e), e
+            assert [values[0] for values in relation.rows_values()] == [1, 2, 3]
+            relation.insert("id", 4, "name", "n")  # The key doesn't hold the rows taken out
+            print(f"{storage}: invalid rows are reported with their line, a failing chunk isn't kept")
+
+
+if __name__ == "__main__":
+    main()
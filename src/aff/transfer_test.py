@@ -0,0 +1,80 @@
+import pickle
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from ..base.column import Field
+from ..base.domain import Domain
+from ..base.relation import Relation
+from ..persistence.transfer import SharedRelation
+
+"""
+Checks that a relation sent to another process (pickle, shared memory) comes back with the same values, types, keys and indexes
+"""
+
+def person(storage: str) -> Relation:
+    relation = Relation(
+        "P",
+        Field("id", Domain(allowed_types = [int])),
+        Field("score", Domain(allowed_types = [float])),
+        Field("name", Domain(allowed_values = [None], allowed_types = [str])),
+        storage = storage
+    )
+    relation.insert_many([(i, i * 1.5, None if i % 4 == 0 else f"n{i % 9}") for i in range(300)])
+    relation.set_primary_key("id")
+    relation.create_index("name", "sorted")
+    return relation
+
+def same_values(relation: Relation, other: Relation) -> None:
+    assert [field.name for field in relation.fields] == [field.name for field in other.fields]
+    assert [[(type(value), value) for value in values] for values in relation.rows_values()] == \
+           [[(type(value), value) for value in values] for values in other.rows_values()]
+
+def adults(shared: SharedRelation) -> list:
+    """
+    Runs in a worker: reads the shared relation
+    """
+    relation = shared.relation()
+    return [values[0] for values in relation.select("score > 400.0").rows_values()]
+
+def main():
+    for storage in ("row", "column"):
+        relation = person(storage)
+
+        # ====================================================
+        # Pickle
+        # ====================================================
+        for protocol in (2, 4, 5):
+            buffers = []
+            data = pickle.dumps(relation, protocol = protocol, buffer_callback = buffers.append if protocol == 5 else None)
+            received = pickle.loads(data, buffers = buffers)
+            same_values(relation, received)
+            assert received.storage == storage and len(received.keys) == 1 and received.get_index("name").lookup("==", "n1") == relation.get_index("name").lookup("==", "n1")
+            try:
+                received.insert("id", 1, "score", 0.5)
+                raise AssertionError("the primary key is pickled")
+            except ValueError:
+                pass
+            received.insert("id", -1, "score", 0.5)
+            assert len(received) == len(relation) + 1 and len(relation) == 300
+            if protocol == 5 and storage == "column":
+                assert len(buffers) == 2  # The int and float columns are sent out-of-band
+        print(f"{storage}: pickled relations keep their values, types, keys and indexes")
+
+        # ====================================================
+        # Shared memory
+        # ====================================================
+        expected = [values[0] for values in relation.select("score > 400.0").rows_values()]
+        with relation.share() as shared:
+            assert len(pickle.dumps(shared)) < len(pickle.dumps(relation))  # The typed columns aren't in the pickle
+            local = shared.relation()
+            same_values(relation, local)
+            assert isinstance(local.column_values("id"), memoryview)
+            local.insert("id", -1, "score", 0.5)  # Copied in memory, the shared block doesn't change
+            assert isinstance(local.column_values("id"), array) and len(shared.relation()) == 300
+            with ProcessPoolExecutor(max_workers = 2) as pool:
+                assert list(pool.map(adults, [shared] * 4)) == [expected] * 4
+            del local
+        print(f"{storage}: shared relations are read by the workers without being copied")
+
+
+if __name__ == "__main__":
+    main()
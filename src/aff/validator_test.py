@@ -0,0 +1,73 @@
+from ..base.domain import Domain
+from ..constraint.constraint import NotNullConstraint, PositiveConstraint, RangeConstraint, StringLengthConstraint
+
+"""
+Checks the compiled validators (validator.compile_validator) against the checks of Domain.is_valid before they were compiled:
+same result and same error message for every value
+"""
+
+VALUES = [None, 0, 1, 3, 5, 7, -2, 2.5, 100.0, True, False, "", "a", "abcdef", [1], (1, 2), {1: 2}]
+
+DOMAINS = [
+    Domain(allowed_types = [int]),
+    Domain(allowed_values = [None, "x", [1]], allowed_types = [str], constraints = [StringLengthConstraint(1, 3)]),
+    Domain(allowed_values = [1, 2, 3], allowed_types = [int], constraints = [RangeConstraint(1, 5), PositiveConstraint()]),
+    Domain(allowed_types = [int, float], constraints = [PositiveConstraint(50), RangeConstraint(2, 80)]),
+    Domain(allowed_types = [object], constraints = [NotNullConstraint]),
+    Domain(allowed_types = [int, str], constraints = [NotNullConstraint(), RangeConstraint(0, 4), StringLengthConstraint(0, 2)]),
+    Domain(allowed_values = [True], allowed_types = [float]),
+    Domain(allowed_types = int),
+]
+
+def reference(domain: Domain, value: object):
+    """
+    Domain.is_valid before the validators were compiled, returns True or the error message
+    """
+    try:
+        if value is None:
+            if None in domain.allowed_values:
+                return True
+            if NotNullConstraint in domain.constraints:
+                raise ValueError("Value cannot be null.")
+        if value in domain.allowed_values:
+            return True
+        allowed_types = domain.allowed_types if isinstance(domain.allowed_types, (list, tuple, set)) else [domain.allowed_types]
+        for type_ in allowed_types:
+            if isinstance(value, type_):
+                for constraint in domain.constraints:
+                    constraint.is_valid(value)
+                return True
+        raise ValueError(f"Invalid value: {value}.\nAllowed values are: {domain.allowed_values},\nAllowed types are: {domain.allowed_types}.")
+    except ValueError as e:
+        return str(e)
+
+def compiled(domain: Domain, value: object):
+    try:
+        return domain.is_valid(value)
+    except ValueError as e:
+        return str(e)
+
+def main():
+    # ====================================================
+    # Compiled validator against the reference
+    # ====================================================
+    for domain in DOMAINS:
+        for value in VALUES:
+            assert compiled(domain, value) == reference(domain, value), (str(domain), value)
+    print(f"Validators: {len(DOMAINS)} domains checked on {len(VALUES)} values")
+
+    # ====================================================
+    # A changed domain is compiled again
+    # ====================================================
+    domain = Domain(allowed_types = [int])
+    assert domain.is_valid(3)
+    domain.allowed_types = [str]
+    assert compiled(domain, 3) == reference(domain, 3) != True
+    domain.constraints.append(StringLengthConstraint(0, 1))
+    domain.invalidate()
+    assert compiled(domain, "ab") == reference(domain, "ab") != True
+    print("Validators: a changed domain is checked with its new values, types and constraints")
+
+
+if __name__ == "__main__":
+    main()
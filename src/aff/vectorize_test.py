@@ -0,0 +1,69 @@
+from array import array
+from ..base.column import Field
+from ..base.domain import Domain
+from ..base.relation import Relation
+from ..condition import vectorize
+from ..condition.compiler import compile_condition, parse_condition
+from ..condition.vectorize import compile_mask, mask_indexes
+
+"""
+Checks the conditions evaluated on whole columns (condition/vectorize.py) against the compiled predicate evaluated row by row,
+on typed columns (with and without NumPy) and on columns of objects
+"""
+
+LITERALS = ["2", "2.5", "True", "'2'", "None"]
+
+TEMPLATES = [
+    "i {operator} {literal}", "f {operator} {literal}", "o {operator} {literal}", "{literal} {operator} i",
+    "i {operator} f", "i {operator} j", "o {operator} i",
+    "i {operator} {literal} and f > 1.0", "not (i {operator} {literal}) or o == None",
+]
+
+def conditions() -> list:
+    return [
+        template.format(operator = operator, literal = literal)
+        for template in TEMPLATES for operator in ("==", "!=", "<", "<=", ">", ">=") for literal in LITERALS
+    ]
+
+def main():
+    rows = [(i % 5, (i % 7) * 0.5, i % 4, [1, 2, 2.0, True, "2", None][i % 6]) for i in range(60)]
+    positions = {"i": 0, "f": 1, "j": 2, "o": 3}
+    columns = [array("q", [row[0] for row in rows]), array("d", [row[1] for row in rows]), array("q", [row[2] for row in rows]), [row[3] for row in rows]]
+
+    # ====================================================
+    # Masks against the compiled predicate
+    # ====================================================
+    checked = conditions()
+    installed = vectorize.numpy
+    for numpy in (installed, None):
+        vectorize.numpy = numpy  # None: the masks are computed like when NumPy isn't installed
+        try:
+            for condition in checked:
+                expression = parse_condition(condition, list(positions))
+                assert vectorize.vectorizable(expression), condition
+                predicate = compile_condition(condition, positions)
+                expected = [index for index, row in enumerate(rows) if predicate(row)]
+                assert mask_indexes(compile_mask(expression, positions)(columns, len(rows))) == expected, (condition, numpy)
+        finally:
+            vectorize.numpy = installed
+        print(f"Masks {'with' if numpy is not None else 'without'} NumPy: {len(checked)} conditions give the rows of the predicate")
+
+    # ====================================================
+    # Relation.select on column storage
+    # ====================================================
+    fields = [
+        Field("i", Domain(allowed_types = [int])), Field("f", Domain(allowed_types = [float])),
+        Field("j", Domain(allowed_types = [int])), Field("o", Domain(allowed_values = [None], allowed_types = [int, float, str]))
+    ]
+    row, column = Relation.from_rows("R", fields, rows), Relation.from_rows("R", fields, rows, "column")
+    indexed = Relation.from_rows("R", fields, rows, "column")
+    indexed.create_index("i", "sorted")
+    for condition in checked + ["i in (1, 2) and f < 2.0", "o is None or i == 3"]:
+        expected = list(row.select(condition).rows_values())
+        assert list(column.select(condition).rows_values()) == expected, condition
+        assert list(indexed.select(condition).rows_values()) == expected, condition
+    print("Column storage: select gives the rows of the row storage, with and without index")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import gc
+from ..base.column import Field
+from ..base.domain import Domain
+from ..base.relation import Relation
+from ..base.row import Tuple
+
+"""
+Checks that the materialized views stay equal to their definition computed again, whatever changes the relation
+"""
+
+def person(storage: str) -> Relation:
+    relation = Relation(
+        "P",
+        Field("id", Domain(allowed_types = [int])),
+        Field("name", Domain(allowed_types = [str])),
+        Field("age", Domain(allowed_values = [None], allowed_types = [int])),
+        storage = storage
+    )
+    relation.insert_many([(i, f"n{i}", None if i % 7 == 0 else i % 50) for i in range(500)])
+    return relation
+
+def main():
+    for storage in ("row", "column"):
+        relation = person(storage)
+        definitions = [
+            lambda: relation.lazy().select("age >= 18").project("name"),
+            lambda: relation.lazy().project("name", "age").select("age < 10 and age > 2"),
+            lambda: relation.lazy().select("age is None"),
+            lambda: relation.lazy().project("id"),
+        ]
+        views = [relation.materialize(definition()) for definition in definitions]
+        sub_view = views[0].materialize(views[0].lazy().select("name == 'x'"))
+
+        # ====================================================
+        # Inserts
+        # ====================================================
+        relation.insert("id", -1, "name", "x", "age", 30)
+        relation.insert_many([(-2, "y", 5), (-3, "z", None), {"id": -4, "name": "w", "age": 40}, ("bad", "v", 1)])
+        relation.add_tuple(Tuple(relation, (-5, "v", 3)))
+        relation.tuples.append(Tuple(relation, (-6, "x", 20)))
+        for definition, view in zip(definitions, views):
+            assert list(view.rows_values()) == list(definition().collect().rows_values()), (storage, view.name)
+        assert list(sub_view.rows_values()) == [("x",), ("x",)]
+        print(f"{storage}: materialized views follow every insert")
+
+        # ====================================================
+        # Replaced rows
+        # ====================================================
+        relation.tuples = relation.tuples[:10]  # The views are computed again
+        for definition, view in zip(definitions, views):
+            assert list(view.rows_values()) == list(definition().collect().rows_values()), (storage, view.name)
+        print(f"{storage}: materialized views are computed again when the rows are replaced")
+
+        # ====================================================
+        # Lifetime and errors
+        # ====================================================
+        del views, sub_view, view
+        gc.collect()
+        relation.insert("id", -7, "name", "t", "age", 60)
+        assert relation.views == []  # The relation doesn't keep its views alive
+        for definition in (relation.lazy().limit(3), person(storage).lazy().select("age > 3")):
+            try:
+                relation.materialize(definition)
+                raise AssertionError("not a view of this relation")
+            except ValueError:
+                pass
+        print(f"{storage}: the relation doesn't keep its views alive")
+
+
+if __name__ == "__main__":
+    main()
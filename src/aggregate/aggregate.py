@@ -0,0 +1,193 @@
+import pickle
+import tempfile
+from typing import Iterable, Iterator, List, Tuple
+from ..base.domain import Domain
+from ..constraint.constraint import NotNullConstraint, PositiveConstraint
+
+"""
+Hash aggregation (the γ operator of the relational algebra) working on rows made of the values of the group fields
+followed by the values the aggregates read
+
+Each group keeps one accumulator per aggregate whatever its number of rows (a count, a sum, a min, a max, a sum and a count
+for avg), so the rows are read only once. Like the selection and the joins, two values of different types are different
+group values (1, 1.0 and True are three groups). None is ignored by sum, min, max and avg, count counts the rows.
+
+When there are more than max_groups groups, the rows of the new groups are written to temporary files (partitioned
+by the hash of their group), then each file is aggregated on its own once the groups in memory are done
+"""
+
+MAX_GROUPS = 1_000_000
+SPILL_PARTITIONS = 16
+SPILL_CHUNK = 1000  # Rows pickled together in a spill file
+MAX_SPILL_LEVEL = 8  # A partition spilled that many times is aggregated in memory, whatever its number of groups
+
+# ====================================================
+# Aggregation
+# ====================================================
+
+def hash_aggregate(rows: Iterable[tuple], key_names: List[str], aggregates: List[Tuple[str, int, str]], max_groups: int = MAX_GROUPS, level: int = 0) -> Iterator[tuple]:
+    """
+    Groups the rows by their first len(key_names) values and yields one row per group: its group values then the value of each aggregate
+
+    Args:
+        key_names: the names of the group fields (for the errors)
+        aggregates: (kind, position of the value it reads in a row, name of the field for the errors), the position is ignored for "count"
+        max_groups: the number of groups kept in memory, the rows of the other groups are spilled to disk
+                    (until the rows were spilled MAX_SPILL_LEVEL times: a partition that doesn't shrink stays in memory)
+
+    Example:
+        Input: [("a", 1), ("b", 2), ("a", 3)], ["name"], [("count", None, "count"), ("sum", 1, "x")]
+        Output: ("a", 2, 4), ("b", 1, 2)
+
+    Raises:
+        ValueError: if a group value can't be hashed (e.g: a list), if sum or avg reads a value that isn't an int or a float, or if min or max can't compare two values
+    """
+    if max_groups < 1:
+        raise ValueError(f"The number of groups in memory must be positive, got {max_groups}")
+    key_count = len(key_names)
+    groups = {}
+    spill = None
+    for row in rows:
+        values = row[:key_count]
+        key = tuple(zip(values, map(type, values)))
+        try:
+            state = groups.get(key)
+        except TypeError as error:
+            raise ValueError(f"Column {unhashable_key(values, key_names)} can't be grouped: {error}")
+        if state is None:
+            if len(groups) >= max_groups and level < MAX_SPILL_LEVEL:
+                if spill is None:
+                    spill = SpillFiles(level)
+                spill.add(key, row)
+                continue
+            state = groups[key] = new_state(aggregates)
+        update_state(state, row, aggregates)
+
+    for key, state in groups.items():
+        yield tuple(value for value, _ in key) + finish_state(state, aggregates)
+    groups.clear()
+
+    if spill is not None:
+        for partition in spill.partitions():
+            yield from hash_aggregate(partition, key_names, aggregates, max_groups, level + 1)
+
+def unhashable_key(values: tuple, key_names: List[str]) -> str:
+    """
+    Returns the name of the first group field whose value can't be hashed
+    """
+    for value, name in zip(values, key_names):
+        try:
+            hash(value)
+        except TypeError:
+            return name
+    return ", ".join(key_names)
+
+def new_state(aggregates: List[Tuple[str, int, str]]) -> list:
+    return [0 if kind == "count" else [0, 0] if kind == "avg" else None for kind, _, _ in aggregates]
+
+def update_state(state: list, row: tuple, aggregates: List[Tuple[str, int, str]]) -> None:
+    for slot, (kind, position, name) in enumerate(aggregates):
+        if kind == "count":
+            state[slot] += 1
+            continue
+        value = row[position]
+        if value is None:
+            continue
+        current = state[slot]
+        if kind == "sum" or kind == "avg":
+            if type(value) is not int and type(value) is not float:
+                raise ValueError(f"Can't compute the {kind} of column {name}: {value!r} isn't a number")
+            if kind == "sum":
+                state[slot] = value if current is None else current + value
+            else:
+                current[0] += value
+                current[1] += 1
+        elif current is None:
+            state[slot] = value
+        else:
+            try:
+                if (value < current) if kind == "min" else (value > current):
+                    state[slot] = value
+            except TypeError:
+                raise ValueError(f"Can't compute the {kind} of column {name}: {current!r} and {value!r} can't be compared")
+
+def finish_state(state: list, aggregates: List[Tuple[str, int, str]]) -> tuple:
+    return tuple(
+        (value[0] / value[1] if value[1] else None) if kind == "avg" else value
+        for value, (kind, _, _) in zip(state, aggregates)
+    )
+
+
+class SpillFiles:
+    """
+    Temporary files receiving the rows of the groups that don't fit in memory, one file per partition of the groups
+    """
+
+    def __init__(self, level: int):
+        """
+        Args:
+            level: how many times the rows were already spilled, it changes the partition of a group from one level to the next
+        """
+        self.level = level
+        self.files = [None] * SPILL_PARTITIONS  # Created when a partition receives its first chunk
+        self.buffers = [[] for _ in range(SPILL_PARTITIONS)]
+
+    def add(self, key: tuple, row: tuple) -> None:
+        partition = hash((self.level, key)) % SPILL_PARTITIONS
+        buffer = self.buffers[partition]
+        buffer.append(row)
+        if len(buffer) == SPILL_CHUNK:
+            self.flush(partition)
+
+    def flush(self, partition: int) -> None:
+        if self.files[partition] is None:
+            self.files[partition] = tempfile.TemporaryFile()
+        pickle.dump(self.buffers[partition], self.files[partition], pickle.HIGHEST_PROTOCOL)
+        self.buffers[partition].clear()
+
+    def partitions(self) -> Iterator[Iterator[tuple]]:
+        """
+        Yields the rows of each partition (read back one chunk at a time), a file is deleted once it's read
+        """
+        for partition in range(SPILL_PARTITIONS):
+            if self.buffers[partition]:
+                self.flush(partition)
+            if self.files[partition] is not None:
+                yield read_spill_file(self.files[partition])
+
+def read_spill_file(file) -> Iterator[tuple]:
+    with file:
+        file.seek(0)
+        while True:
+            try:
+                chunk = pickle.load(file)
+            except EOFError:
+                return
+            yield from chunk
+
+# ====================================================
+# Domains
+# ====================================================
+
+def aggregate_domain(kind: str, domain: Domain = None) -> Domain:
+    """
+    Returns the domain of the values of an aggregate reading a field of the given domain (None for count)
+        - count: positive int
+        - sum: int and/or float (the number types of the field), or None
+        - min, max: the domain of the field, or None
+        - avg: float, or None
+    """
+    if kind == "count":
+        return Domain(allowed_types = [int], constraints = [PositiveConstraint()])
+    if kind == "avg":
+        return Domain(allowed_values = [None], allowed_types = [float])
+
+    allowed_types = domain.allowed_types if isinstance(domain.allowed_types, (list, tuple, set)) else [domain.allowed_types]
+    if kind == "sum":
+        types = set(allowed_types) | {type(value) for value in domain.allowed_values}
+        number_types = [int, float] if object in types else [type_ for type_ in (int, float) if type_ in types]
+        return Domain(allowed_values = [None], allowed_types = number_types or [int, float])
+
+    constraints = [constraint for constraint in domain.constraints if not (constraint is NotNullConstraint or isinstance(constraint, NotNullConstraint))]
+    allowed_values = list(domain.allowed_values) + ([] if None in domain.allowed_values else [None])
+    return Domain(allowed_values = allowed_values, allowed_types = list(allowed_types), constraints = constraints)
@@ -33,7 +33,8 @@ class Field:
     # ====================================================
     
     def is_valid(self, value: object) -> bool:
-        return self.domain.is_valid(value)
+        # The compiled validator of the domain, it follows the domain if it changes
+        return self.domain.validator()(value)
     
     def union(self, other_field):
         domain = self.domain.union(other_field.domain)
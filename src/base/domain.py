@@ -1,5 +1,6 @@
 from typing import List
 from ..constraint.constraint import *
+from .validator import compile_validator
 
 class Domain:
     """
@@ -22,41 +23,46 @@ class Domain:
         self.allowed_types = allowed_types if allowed_types is not None else [] 
         self.constraints = constraints if constraints is not None else [] 
 
+    def __setattr__(self, name, value):
+        # Changing the domain means that the validator has to be compiled again
+        if name in ("allowed_values", "allowed_types", "constraints"):
+            object.__setattr__(self, "compiled_validator", None)
+        object.__setattr__(self, name, value)
+
     # ====================================================
     # Main Methods
     # ====================================================
     
     def is_valid(self, value: object) -> bool:
         """
-        Checks if a value is conform to the value of the attributes
+        Checks if a value is conform to the value of the attributes:
+            - None is valid if it's an allowed value, and invalid if there's a NotNullConstraint
+            - an allowed value is valid
+            - a value of an allowed type is valid if it passes every constraint
+
+        Raises:
+            ValueError: if the value isn't valid
         """
-        # For null values
-        if value is None:
-            if None in self.allowed_values:
-                return True
-            
-            if NotNullConstraint in self.constraints:
-                raise ValueError("Value cannot be null.")
+        return self.validator()(value)
 
+    def validator(self):
+        """
+        Returns the function checking a value (see validator.compile_validator), it's compiled only once
+        and compiled again when allowed_values, allowed_types or constraints are replaced.
+        Call invalidate() after changing one of these lists in place (e.g: domain.allowed_values.append(5))
+        """
+        if self.compiled_validator is None:
+            self.compiled_validator = compile_validator(self)
+        return self.compiled_validator
 
-        # Check allowed values
-        if value in self.allowed_values:
-            return True
+    def invalidate(self) -> None:
+        self.compiled_validator = None
 
-        # Check allowed types
-        for type_ in self.allowed_types:
-            if isinstance(value, type_):
-                # Check constraints validity
-                for constraint in self.constraints:
-                    if not constraint.is_valid(value):
-                        try:
-                            constraint.is_valid(value)
-                        except ValueError as e:
-                            raise e  # Re-raise the exception with the error message
-                    
-                return True
-        
-        raise ValueError(f"Invalid value: {value}.\nAllowed values are: {self.allowed_values},\nAllowed types are: {self.allowed_types}.")
+    def __getstate__(self) -> dict:
+        # The compiled validator is a closure, it can't be pickled: the domain compiles it again when it's needed
+        state = dict(self.__dict__)
+        state["compiled_validator"] = None
+        return state
 
     
 
@@ -0,0 +1,158 @@
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+from typing import Dict, List, Sequence
+
+"""
+Secondary indexes on one field of a relation
+
+An index maps the values of a field to the positions of the rows holding them:
+    - HashIndex: equality lookups (field == value)
+    - SortedIndex: equality and range lookups (field <, <=, >, >= value)
+
+Like the selection, values of different types never match (1 and "1", 1 and 1.0, 1 and True):
+the values are indexed with their type.
+A lookup gives the matching row positions in increasing order, or None if the index can't answer that operator
+"""
+
+# ====================================================
+# Hash index
+# ====================================================
+
+class HashIndex:
+    kind = "hash"
+    operators = ("==",)
+
+    def __init__(self, position: int):
+        """
+        Args:
+            position (int): the position of the indexed field in the relation
+        """
+        self.position = position
+        self.buckets: Dict[tuple, List[int]] = {}
+        self.unhashable: List[tuple] = []  # (value, row index) for values that can't be hashed (e.g: lists)
+        self.count = 0  # The number of rows indexed so far
+
+    def add(self, value: object, row_index: int) -> None:
+        self.count += 1
+        try:
+            bucket = self.buckets.get((type(value), value))
+        except TypeError:
+            self.unhashable.append((value, row_index))
+            return
+        if bucket is None:
+            self.buckets[(type(value), value)] = [row_index]
+        else:
+            bucket.append(row_index)
+
+    def lookup(self, operator: str, value: object) -> List[int]:
+        if operator != "==":
+            return None
+        try:
+            matches = self.buckets.get((type(value), value), [])
+        except TypeError:
+            matches = []
+        if self.unhashable:
+            matches = sorted([*matches, *(row_index for entry_value, row_index in self.unhashable if type(entry_value) is type(value) and entry_value == value)])
+        return matches
+
+UNORDERED_TYPES = (type(None), set, frozenset)
+
+# ====================================================
+# Sorted index
+# ====================================================
+
+class SortedIndex:
+    kind = "sorted"
+    operators = ("==", "<", "<=", ">", ">=")
+
+    def __init__(self, position: int):
+        self.position = position
+        self.groups: Dict[type, List[tuple]] = {}  # type -> sorted (value, row index)
+        self.pending: Dict[type, List[tuple]] = {}  # Added since the last lookup, sorted lazily
+        self.unordered = set()  # Types whose values can't be ordered (e.g: None): only equality works
+        self.count = 0
+
+    def add(self, value: object, row_index: int) -> None:
+        self.count += 1
+        self.pending.setdefault(type(value), []).append((value, row_index))
+
+    def lookup(self, operator: str, value: object) -> List[int]:
+        if operator not in self.operators:
+            return None
+        entries = self.sorted_entries(type(value))
+
+        if type(value) in self.unordered:
+            if operator != "==":
+                return []
+            return [row_index for entry_value, row_index in entries if entry_value == value]
+
+        key = itemgetter(0)
+        try:
+            if operator == "==":
+                matches = entries[bisect_left(entries, value, key=key):bisect_right(entries, value, key=key)]
+            elif operator == "<":
+                matches = entries[:bisect_left(entries, value, key=key)]
+            elif operator == "<=":
+                matches = entries[:bisect_right(entries, value, key=key)]
+            elif operator == ">":
+                matches = entries[bisect_right(entries, value, key=key):]
+            else:
+                matches = entries[bisect_left(entries, value, key=key):]
+        except TypeError:
+            # The value can't be compared with the indexed ones (e.g: (1, None) and (1, 2)): an equality is checked
+            # on every value of its type, a range can't be answered by the index
+            if operator != "==":
+                return None
+            return [row_index for entry_value, row_index in sorted(entries, key=itemgetter(1)) if entry_value == value]
+        return sorted(row_index for _, row_index in matches)
+
+    def sorted_entries(self, type_: type) -> List[tuple]:
+        """
+        Merges the values added since the last lookup (sorting is close to linear when they come in order)
+        """
+        entries = self.groups.setdefault(type_, [])
+        pending = self.pending.pop(type_, None)
+        if pending:
+            entries.extend(pending)
+            if type_ not in self.unordered:
+                if not is_ordered(type_, entries[0][0]):
+                    self.unordered.add(type_)
+                    return entries
+                try:
+                    entries.sort(key=itemgetter(0))
+                except TypeError:
+                    self.unordered.add(type_)
+        return entries
+
+def is_ordered(type_: type, value: object) -> bool:
+    """
+    Tells if the values of a type can be sorted: a group of one value is sorted without any comparison,
+    so the value is compared with itself (None, a dict, ... raise a TypeError). Sets are only partially ordered
+    """
+    if type_ in UNORDERED_TYPES:
+        return False
+    try:
+        value < value
+    except TypeError:
+        return False
+    return True
+
+# ====================================================
+# Helper Functions
+# ====================================================
+
+INDEX_KINDS = {"hash": HashIndex, "sorted": SortedIndex}
+
+def create_index(kind: str, position: int, column: Sequence[object]):
+    """
+    Creates an index of the given kind and fills it with the values of the column
+
+    Raises:
+        ValueError: if the kind doesn't exist
+    """
+    if kind not in INDEX_KINDS:
+        raise ValueError(f"Unknown index kind: {kind}. Expected one of {list(INDEX_KINDS)}")
+    index = INDEX_KINDS[kind](position)
+    for row_index, value in enumerate(column):
+        index.add(value, row_index)
+    return index
@@ -0,0 +1,70 @@
+from typing import List, Sequence
+
+"""
+Primary and unique keys of a relation
+
+A key keeps the set of the key values already inserted, so a duplicate is found in constant time.
+Like the selection, values of different types are different (1, 1.0 and True can be in the same key field)
+"""
+
+class UniqueKey:
+    """
+    A set of fields whose values can't be the same for two rows
+    """
+
+    # ====================================================
+    # Initialisation Method
+    # ====================================================
+
+    def __init__(self, field_names: List[str], positions: List[int], primary: bool = False):
+        """
+        Args:
+            field_names: the fields of the key
+            positions: the position of each of those fields in the relation
+            primary: a primary key doesn't accept None, a unique key accepts any number of rows with a None in it
+        """
+        self.field_names = list(field_names)
+        self.positions = list(positions)
+        self.primary = primary
+        self.values = set()
+
+    # ====================================================
+    # Main Methods
+    # ====================================================
+
+    def key_of(self, values: Sequence[object]) -> tuple:
+        """
+        Returns the key of a row given by its values, None if the row isn't concerned (unique key with a None)
+
+        Raises:
+            ValueError: if a primary key field is None or a value can't be hashed
+        """
+        key = tuple((type(values[position]), values[position]) for position in self.positions)
+        for (_, value), field_name in zip(key, self.field_names):
+            if value is None:
+                if self.primary:
+                    raise ValueError(f"The primary key field {field_name} cannot be null.")
+                return None
+        try:
+            hash(key)
+        except TypeError:
+            raise ValueError(f"The values of the key {self.field_names} must be hashable. Got {[value for _, value in key]}.")
+        return key
+
+    def check(self, values: Sequence[object]) -> None:
+        """
+        Raises:
+            ValueError: If a row with the same key already exist
+        """
+        key = self.key_of(values)
+        if key is not None and key in self.values:
+            raise ValueError(f"This row already exist: {self.describe(key)}")
+
+    def add(self, values: Sequence[object]) -> None:
+        key = self.key_of(values)
+        if key is not None:
+            self.values.add(key)
+
+    def describe(self, key: tuple) -> str:
+        kind = "primary key" if self.primary else "unique key"
+        return f"{kind} {self.field_names} = {[value for _, value in key]}"
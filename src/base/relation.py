@@ -1,6 +1,27 @@
-from typing import List, Set
+from itertools import islice
+from typing import Callable, List, Sequence, Set
 from .column import Field
 from .row import Tuple
+from .storage import ColumnRows, ColumnStore, TupleRows, gather
+from .index import create_index
+from .key import UniqueKey
+from .report import InsertReport
+from ..cache.cache import ResultCache, cached, next_version
+from ..aggregate.aggregate import MAX_GROUPS, aggregate_domain, hash_aggregate
+from ..condition.compiler import And, Comparison, Expression, FieldReference, Literal, compile_condition, conjuncts, parse_condition
+from ..condition.vectorize import compile_mask, mask_indexes, vectorizable
+from ..join.join import hash_join, merge_join, same_types, split_join_condition
+from ..persistence.mapped import read_relation, write_relation
+from ..persistence.transfer import SharedRelation, relation_state, restore_relation
+from ..persistence.text import csv_records, jsonl_records, load_rows, write_csv, write_jsonl
+from ..parallel.parallel import PARTITION_SIZE, parallel_hash_join, parallel_select_indexes
+from ..plan.lazy import LazyRelation, plan_of
+from ..plan.view import MaterializedView, apply_views, check_view_plan, refresh_views
+from ..sort.sort import MAX_SORT_ROWS, external_sort, sort_indexes, sort_key, top_indexes
+from ..plan.plan import Scan, values_getter
+from ..setop.setop import filter_rows, key_membership, union_rows
+
+ROWS_PER_CHUNK = 10000  # Rows appended at once to a column store when they come from a stream
 
 class Relation:
     """
@@ -11,24 +32,85 @@ class Relation:
     # ====================================================
     # Initialisation Method
     # ====================================================
-    def __init__(self, name: str, *fields: Field):
+    def __init__(self, name: str, *fields: Field, storage: str = "row"):
         """
         Initializes a relation with a name and any fields
 
         Args:
             name (str): The name of the relation
             *fields (Field): list of Field objects that has a name and a domain
+            storage (str): how the rows are kept
+                - "row": a list of Tuple objects
+                - "column": one array per field (see storage.ColumnStore), self.tuples gives lightweight row views
 
         Raises:
-            ValueError: If there's no field
+            ValueError: If the storage doesn't exist
         """
+        if storage not in ("row", "column"):
+            raise ValueError(f"Unknown storage: {storage}")
+
         self.name: str = name
         self.fields: List[Field] = []
-        self.tuples : List[Tuple] = []
+        self.storage: str = storage
         
         if fields is not None: 
             for col in fields:
                 self.fields.append(col)
+
+        self.store: ColumnStore = ColumnStore(self.fields) if storage == "column" else None
+        self.rows: List[Tuple] = []
+        self.indexes: dict = {}  # field name -> HashIndex or SortedIndex
+        self.keys: List[UniqueKey] = []  # The primary key and the unique keys
+        self.field_positions: tuple = ((), {})  # (fields, positions) cached by self.positions()
+        self.version: int = next_version()  # A new version on every change of the rows or the fields (see cache/cache.py)
+        self.cache: ResultCache = None  # The cache of the results of the operations, see enable_cache()
+        self.views: List[MaterializedView] = []  # The views kept up to date on every insert, see materialize()
+
+    @property
+    def tuples(self):
+        """
+        The rows of the relation: a read-only sequence of Tuple, or of RowView for a column-stored relation
+        (tuples.append(row) inserts the row like add_tuple, a change bypassing the relation wouldn't update its version)
+        """
+        if self.store is not None:
+            return ColumnRows(self)
+        return TupleRows(self)
+
+    @tuples.setter
+    def tuples(self, tuples):
+        """
+        Replaces the rows of the relation, the keys and the indexes are built again on the new rows
+
+        Raises:
+            ValueError: if the new rows break a key, the relation is left as it was
+        """
+        rows = list(tuples)
+        rows_values = [row.values for row in rows]  # Read before the store is replaced: they can be views on it
+
+        # The keys and the indexes are built on the new rows before anything is replaced
+        keys = []
+        for key in self.keys:
+            new_key = UniqueKey(key.field_names, key.positions, key.primary)
+            for values in rows_values:
+                new_key.check(values)
+                new_key.add(values)
+            keys.append(new_key)
+        indexes = {
+            field_name: create_index(index.kind, index.position, [values[index.position] for values in rows_values])
+            for field_name, index in self.indexes.items()
+        }
+
+        if self.store is not None:
+            store = ColumnStore(self.fields)
+            store.extend(rows_values)
+            self.store = store
+        else:
+            self.rows = rows
+        self.keys = keys
+        self.indexes = indexes
+        self.version = next_version()
+        if self.views:
+            refresh_views(self.views)
        
     # ====================================================
     # Main Methods
@@ -44,7 +126,7 @@ class Relation:
         Raise:
             ValueError: If the number of supposed number of fields are more than the number of column of the relation
             ValueError: If the number of arguments is odd the value doesn't match the domain of the Column object
-            ValueError: If that row already exist
+            ValueError: If that row already exist (same values for the primary key or a unique key)
         """
 
 
@@ -62,16 +144,13 @@ class Relation:
         if args_length%2 != 0:
             raise ValueError(f"Expected: {args_length+1} arguments instead of just {args_length}")
 
-        row = Tuple(self)
+        values = {}
         # Step 1: separating the pair of key-values
         for i in range(0, args_length, 2):
             field_name = args[i]
             value = args[i+1]
             specific_column = self.get_field_by_name(field_name)
 
-            if row in self.tuples:
-                raise ValueError("This row already exist")
-
             if specific_column is None:
                 raise ValueError(f"Column {field_name} doesn't exist")
 
@@ -83,12 +162,96 @@ class Relation:
             except ValueError as e:
                 raise ValueError(f'Error validating value for column "{field_name}": {str(e)}')
 
-            row.add_value(field_name, value)
+            values[field_name] = value
 
-        self.tuples.append(row)
-        return Tuple(self)
+        return self.append_values([values.get(field.name) for field in self.fields])
 
 
+    def insert_many(self, rows) -> InsertReport:
+        """
+        Inserts many rows at once: the fields are resolved once, each column is validated in one pass,
+        then the valid rows are appended together. A row with an invalid value doesn't stop the others
+
+        Args:
+            rows: dictionaries (e.g: {"id": 1, "name": "Pupuce"}) or sequences of values in the order of the fields
+                  (e.g: (1, "Pupuce")), a missing field gets None like in insert
+
+        Returns:
+            InsertReport: the number of inserted rows and the errors of the rejected rows (by their position in rows)
+        """
+        report = InsertReport(self.name)
+        positions = self.positions()
+        field_count = len(self.fields)
+
+        # Step 1: putting every row in the order of the fields (only the given values are validated, like in insert)
+        rows_values = []
+        given_positions = []  # For each row: the positions of the values that were given
+        row_numbers = []
+        for row_number, row in enumerate(rows):
+            if isinstance(row, dict):
+                unknown = [field_name for field_name in row if field_name not in positions]
+                if unknown:
+                    report.add_error(row_number, f"Column {unknown[0]} doesn't exist")
+                    continue
+                values = [None] * field_count
+                for field_name, value in row.items():
+                    values[positions[field_name]] = value
+                given = {positions[field_name] for field_name in row}
+            else:
+                values = list(row)
+                if len(values) > field_count:
+                    report.add_error(row_number, f"Max column number: {field_count}, however there are {len(values) - field_count} in the insert statement")
+                    continue
+                given = range(len(values))
+                values += [None] * (field_count - len(values))
+            rows_values.append(values)
+            given_positions.append(given)
+            row_numbers.append(row_number)
+
+        # Step 2: checking each column against the domain of its field
+        invalid = set()
+        for position, field in enumerate(self.fields):
+            is_valid = field.is_valid
+            for i, values in enumerate(rows_values):
+                if position not in given_positions[i]:
+                    continue
+                try:
+                    is_valid(values[position])
+                except ValueError as e:
+                    report.add_error(row_numbers[i], f'Error validating value for column "{field.name}": {str(e)}')
+                    invalid.add(i)
+
+        # Step 3: checking the keys (also between the new rows) and appending the valid rows together
+        valid_rows = []
+        for i, values in enumerate(rows_values):
+            if i in invalid:
+                continue
+            values = tuple(values)
+            try:
+                self.check_keys(values)
+            except ValueError as e:
+                report.add_error(row_numbers[i], str(e))
+                continue
+            for key in self.keys:
+                key.add(values)
+            valid_rows.append(values)
+
+        if self.store is not None:
+            self.store.extend(valid_rows)
+        else:
+            self.rows.extend(Tuple(self, values) for values in valid_rows)
+        for field_name in list(self.indexes):
+            self.get_index(field_name)  # Indexes the new rows
+
+        if valid_rows:
+            self.version = next_version()
+            if self.views:
+                apply_views(self.views, valid_rows)
+        report.inserted = len(valid_rows)
+        return report
+
+
+    @cached
     def project(self, *col_names: str) -> "Relation":
         """
         Returns this relation with only the specified fields
@@ -96,421 +259,960 @@ class Relation:
         Raises: 
             ValueError: invalid column 
         """
-        new_relation = self.copy() # Creating a copy to evit pointer errors
-        new_relation.name = f"{self.name} PROJECTED {col_names}"
-        
-            
+        name = f"{self.name} PROJECTED {col_names}"
 
         # Step 1: Regrouping the Column objects that are requested
-        needed_cols = []
-
         if "*" in col_names:
-            col_names = set(col_names)
-            col_names = (field.name for field in self.fields)
+            col_names = [field.name for field in self.fields]
 
         for col_name in col_names:
-            if new_relation.get_field_by_name(col_name) is None: 
+            if self.get_field_by_name(col_name) is None: 
                 raise ValueError(f"Column {col_name} doesn't exist")
-            needed_cols.append(self.get_field_by_name(col_name))
  
-        # Step 2: Regrouping the Column objects that aren't needed
-        not_needed_cols = ( col for col in new_relation.fields if col not in needed_cols )
+        # Step 2: the needed fields keep the order they have in the relation
+        needed_positions = [position for position, field in enumerate(self.fields) if field.name in col_names]
+        needed_fields = [self.fields[position] for position in needed_positions]
 
-        # Step 3: a copy of the original relation without the not needed fields (removing the mapping in the tuples too)
-        for not_needed_col in not_needed_cols:
-            new_relation.fields.remove(not_needed_col)
-            for row in new_relation.tuples:
-                row.data.pop(not_needed_col.name)
-
-        return new_relation
+        # Step 3: only the columns of the needed fields are copied
+        columns = [self.column_values(position) for position in needed_positions]
+        return Relation.from_columns(name, needed_fields, columns, len(self), self.storage)
     
     
-    def select(self, condition: str)-> "Relation":
+    @cached
+    def select(self, condition: str, workers: int = None, partition_size: int = PARTITION_SIZE)-> "Relation":
         """
         Eliminates row from the original relation ( those that don't match the condition)
         
+        The condition (a string or an already parsed Expression) is compiled only once, then evaluated:
+            - on the rows given by an index, if there's one for the condition (see create_index)
+            - by a pool of workers processes, each one on a partition of partition_size rows (see parallel/parallel.py),
+              if workers is given and there's more than one partition
+            - on whole columns if it's made of comparisons only (e.g: 'id <= 3 and age > 18'): one mask per comparison,
+              computed with NumPy on the typed columns of storage="column" (see condition/vectorize.py)
+            - else on the values of every row
+
+        Example:
+            person.select("age > 18 and name in ('Pupuce', 'Japon')", workers=16)
+
         Raise:
-            ValueError: syntax error
+            ValueError: syntax error, or workers or partition_size isn't positive
         """
-        copy = self.copy()
-        new_relation = Relation(f"{copy.name} WHERE: {condition}", *copy.fields)
-        for row in copy.tuples: 
-            if row.evaluate_condition(condition):
-                new_relation.tuples.append(row)
-        return new_relation
+        positions = self.positions()
+        expression = condition if isinstance(condition, Expression) else parse_condition(condition, positions)
+        predicate = compile_condition(expression, positions)
+
+        # An index on a field compared to a value gives the only rows that need to be checked
+        candidates = self.index_lookup(expression)
+        if candidates is not None:
+            indexes = [index for index in candidates if predicate(self.row_values(index))]
+        elif workers is not None and (workers < 1 or partition_size < 1 or len(self) > partition_size):
+            indexes = parallel_select_indexes(self, expression, workers, partition_size)
+        elif vectorizable(expression):
+            indexes = self.column_mask(expression)
+        else:
+            indexes = [index for index, values in enumerate(self.rows_values()) if predicate(values)]
+        return self.take(indexes, f"{self.name} WHERE: {condition}")
     
+    @cached
+    def group_by(self, keys, count=None, sums=None, minimums=None, maximums=None, averages=None, max_groups: int = MAX_GROUPS) -> "Relation":
+        """
+        Groups the rows by the values of the key fields and computes aggregates on each group, in one pass over the rows
+        (see aggregate/aggregate.py). Without keys, the whole relation is one group
+
+        Args:
+            keys: a field name or a list of field names (can be empty)
+            count: True (a field "count") or the name of the field holding the number of rows of each group
+            sums, minimums, maximums, averages: a field name or a list of field names, giving the fields "sum_<name>",
+                                                "min_<name>", "max_<name>" and "avg_<name>" (None values are ignored)
+            max_groups: the number of groups kept in memory, the rows of the other groups are spilled to temporary files
+
+        Example:
+            person_details.group_by("age", count=True, averages="height") has the fields age, count and avg_height
+
+        Raises:
+            ValueError: if a field doesn't exist, if two resulting fields have the same name,
+                        if max_groups isn't positive, if a group value can't be hashed (e.g: a list),
+                        or if a value can't be aggregated (e.g: the sum of a str)
+        """
+        if max_groups < 1:
+            raise ValueError(f"The number of groups in memory must be positive, got {max_groups}")
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        positions = self.positions()
+        for field_name in keys:
+            if field_name not in positions:
+                raise ValueError(f"Column {field_name} doesn't exist")
+
+        # Step 1: the fields of the result, and the aggregates with the position of the value they read in a row
+        fields = [self.fields[positions[field_name]] for field_name in keys]
+        read_positions = [positions[field_name] for field_name in keys]
+        aggregates = []
+        if count:
+            fields.append(Field("count" if count is True else count, aggregate_domain("count")))
+            aggregates.append(("count", None, None))
+        for kind, field_names in (("sum", sums), ("min", minimums), ("max", maximums), ("avg", averages)):
+            for field_name in ([field_names] if isinstance(field_names, str) else field_names or []):
+                if field_name not in positions:
+                    raise ValueError(f"Column {field_name} doesn't exist")
+                fields.append(Field(f"{kind}_{field_name}", aggregate_domain(kind, self.fields[positions[field_name]].domain)))
+                aggregates.append((kind, len(read_positions), field_name))
+                read_positions.append(positions[field_name])
+
+        field_names = [field.name for field in fields]
+        for field_name in field_names:
+            if field_names.count(field_name) > 1:
+                raise ValueError(f"Column {field_name} appears twice in the result")
+
+        # Step 2: one pass over the needed values of each row
+        read_rows = (tuple(values[position] for position in read_positions) for values in self.rows_values())
+        rows = hash_aggregate(read_rows, keys, aggregates, max_groups)
+        if not keys and len(self) == 0:
+            rows = [tuple(0 if kind == "count" else None for kind, _, _ in aggregates)]  # One group even without rows, like SQL
+        return Relation.from_rows(f"{self.name} GROUPED BY {tuple(keys)}", fields, rows, self.storage)
+
+    @cached
+    def order_by(self, *field_names: str, descending = False, max_rows: int = MAX_SORT_ROWS) -> "Relation":
+        """
+        Returns the rows sorted by the fields (by the first one, then the second one for equal values, ...), see sort/sort.py:
+        None comes last (first in descending order) and equal rows keep their order
+
+        Args:
+            descending: a bool for every field, or one bool per field
+            max_rows: the number of rows sorted in memory, a bigger relation is sorted by runs written to temporary files then merged
+
+        Example:
+            person_details.order_by("age", "id", descending=[True, False])
+
+        Raises:
+            ValueError: if there's no field, if a field doesn't exist, if descending doesn't have one bool per field,
+                        if max_rows isn't positive, or if a field has values that can't be compared (e.g: 1 and "a")
+        """
+        if not field_names:
+            raise ValueError("At least one field is needed to sort a relation")
+        if max_rows < 1:
+            raise ValueError(f"The number of rows sorted in memory must be positive, got {max_rows}")
+        positions = self.positions()
+        for field_name in field_names:
+            if field_name not in positions:
+                raise ValueError(f"Column {field_name} doesn't exist")
+        descending = [descending] * len(field_names) if isinstance(descending, bool) else list(descending)
+        if len(descending) != len(field_names):
+            raise ValueError(f"{len(field_names)} sort orders expected, got {len(descending)}")
+        name = f"{self.name} ORDER BY {field_names}"
+        sorted_positions = [positions[field_name] for field_name in field_names]
+
+        try:
+            if len(self) <= max_rows:
+                # Only the values of the sorted fields are read, then the rows are taken in their new order
+                indexes = sort_indexes([self.column_values(position) for position in sorted_positions], descending)
+                return self.take(indexes, name)
+
+            key, reverse = sort_key(sorted_positions, descending)
+            return Relation.from_rows(name, self.fields, external_sort(self.rows_values(), key, reverse, max_rows), self.storage)
+        except TypeError as e:
+            raise ValueError(f"The values of {field_names} can't be sorted: {e}")
+
+    def limit(self, n: int) -> "Relation":
+        """
+        Returns the first n rows. On a lazy relation (see lazy()), the operations before it stop as soon as n rows are given:
+            person.lazy().select("age > 18").limit(20).collect()
+
+        Raises:
+            ValueError: if n is negative
+        """
+        if n < 0:
+            raise ValueError(f"The number of rows can't be negative: {n}")
+        return self.take(list(range(min(n, len(self)))), f"{self.name} LIMIT {n}")
+
+    def top_k(self, n: int, field_name: str, descending: bool = True) -> "Relation":
+        """
+        Returns the n first rows in the order of a field (the biggest values by default), the same rows as
+        order_by(field_name, descending=descending).limit(n) but only n rows are kept in a heap while the others are read
+
+        Raises:
+            ValueError: if n is negative, if the field doesn't exist or has values that can't be compared
+        """
+        if n < 0:
+            raise ValueError(f"The number of rows can't be negative: {n}")
+        if field_name not in self.positions():
+            raise ValueError(f"Column {field_name} doesn't exist")
+        try:
+            indexes = top_indexes(self.column_values(field_name), n, descending)
+        except TypeError as e:
+            raise ValueError(f"The values of {field_name} can't be sorted: {e}")
+        return self.take(indexes, f"{self.name} TOP {n} BY {field_name}")
+
     
-    def cartesian_product(self, other: "Relation") -> "Relation":  
-        # Copying to dodge pointer issue  
-        copied_self = self.copy_with_renamed_fields(self.name)
-        copied_other = other.copy_with_renamed_fields(other.name)
+    def create_index(self, field_name: str, kind: str = "hash"):
+        """
+        Indexes a field, the index is kept up to date on every insert
 
-        result_relation = Relation(self.name + " x " + other.name)
-        
-        for field in copied_self.fields:
-            result_relation.add_field(field)
-
-        for field in copied_other.fields:
-            result_relation.add_field(field)
-
-        for tuple1 in copied_self.tuples:
-            for tuple2 in copied_other.tuples:
-                combined_tuple = Tuple(result_relation)
-                
-                for field in copied_self.fields:
-                    combined_tuple.add_value(field.name, tuple1.data[field.name])
-        
-                for field in copied_other.fields:
-                    combined_tuple.add_value(field.name, tuple2.data[field.name])
-                
-                result_relation.add_tuple(combined_tuple)
+        select uses it for conditions like 'name == "Pupuce"' (any kind) or 'id <= 3' ("sorted" only),
+        and the equality joins use the index of the second relation instead of building a hash table
 
-        return result_relation
+        Args:
+            field_name (str): the indexed field
+            kind (str): "hash" (equality) or "sorted" (equality and ranges)
+
+        Raises:
+            ValueError: if the field or the kind doesn't exist
+        """
+        position = self.positions().get(field_name)
+        if position is None:
+            raise ValueError(f"Column {field_name} doesn't exist")
+        index = create_index(kind, position, self.column_values(position))
+        self.indexes[field_name] = index
+        return index
+
+
+    def set_primary_key(self, *field_names: str) -> UniqueKey:
+        """
+        Declares the fields whose values identify a row: two rows can't have the same values for them,
+        and they can't be None. The duplicates are found in constant time on every insert
+
+        Raises:
+            ValueError: if a field doesn't exist, there's already a primary key or the existing rows break the key
+        """
+        if any(key.primary for key in self.keys):
+            raise ValueError(f"The relation {self.name} already has a primary key")
+        return self.add_key(field_names, primary=True)
+
+    def add_unique_key(self, *field_names: str) -> UniqueKey:
+        """
+        Declares fields whose values can't be the same for two rows (rows with a None in them aren't checked)
+
+        Raises:
+            ValueError: if a field doesn't exist or the existing rows break the key
+        """
+        return self.add_key(field_names, primary=False)
+
+
+    def lazy(self) -> "LazyRelation":
+        """
+        Returns a lazy version of this relation: project, select, the joins and the set operations
+        only build a query plan, which is optimized then run by collect() (or by iterating on it)
+
+        Example:
+            person.lazy().cartesian_product(details).select("Person.id == PersonDetails.id and Person.name == Pupuce").collect()
+            runs as a hash join between the rows of Person named Pupuce and PersonDetails
+        """
+        return LazyRelation(Scan(self))
+
+    def materialize(self, view) -> "Relation":
+        """
+        Computes a view of this relation defined by a lazy query made of selections and projections,
+        then keeps it up to date: each inserted row is checked and projected once and appended to the view if it's kept,
+        instead of the view being computed again (see plan/view.py)
+
+        Example:
+            adults = person.materialize(person.lazy().select("age >= 18").project("name"))
+            person.insert("id", 3, "name", "Bozy", "age", 30)  # adults gets ("Bozy",)
+
+        Raises:
+            ValueError: if the query does anything else than selecting and projecting this relation
+        """
+        plan = plan_of(view)
+        check_view_plan(plan, self)
+        result = LazyRelation(plan).collect()
+        self.views.append(MaterializedView(plan, result))
+        return result
+
+    def enable_cache(self, cache: ResultCache = None) -> ResultCache:
+        """
+        Caches the results of select, project, group_by, order_by, the joins and the set operations called on this relation,
+        by their arguments and the versions of the relations they read (see cache/cache.py). A cache can be shared by many relations
+
+        Args:
+            cache: the cache to use, a new ResultCache() by default (e.g: ResultCache(max_entries=16, max_bytes=64 << 20))
+
+        Returns:
+            ResultCache: the cache, its hits and misses counters tell how useful it is
+        """
+        self.cache = cache if cache is not None else ResultCache()
+        return self.cache
+
+    def disable_cache(self) -> None:
+        self.cache = None
+
+
+    @cached
+    def cartesian_product(self, other: "Relation") -> "Relation":  
+        pairs = ((self_index, other_index) for self_index in range(len(self)) for other_index in range(len(other)))
+        return self.build_join(other, pairs, self.name + " x " + other.name)
 
     # ====================================================
     # Inner join methods
     # ====================================================
 
-    def theta_join(self, other: "Relation", condition: str) -> "Relation":
-        cartesian_product = self.cartesian_product(other)
-        new_relation = cartesian_product.select(condition)
-        new_relation.name = self.name + " THETA JOIN "  + other.name
-        return new_relation
+    @cached
+    def theta_join(self, other: "Relation", condition: str, method: str = "auto") -> "Relation":
+        """
+        Keeps the rows of the cartesian product matching the condition, the fields are named like "Person.id"
 
+        Args:
+            condition (str): e.g: "Person.id == PersonDetails.id", "Person.age <= PersonDetails.max_age"
+            method (str): how the matching rows are found
+                - "hash": hash join on the equalities between a field of each relation
+                - "merge": sort-merge join on one equality or range (<, <=, >, >=) between a field of each relation,
+                  the rows come in the order of the join field instead of the order of the cartesian product
+                - "nested_loop": every pair of rows is checked, works with any condition
+                - "auto": "hash" if there's an equality, else "merge" if there's a range, else "nested_loop"
+            The rest of the condition (joined with "and") is checked on each joined row
+
+        Raises:
+            ValueError: if the method doesn't exist or can't be used with this condition
+        """
+        pairs = self.theta_join_pairs(other, condition, method)
+        return self.build_join(other, pairs, self.name + " THETA JOIN "  + other.name)
 
-    def natural_join(self, other: "Relation", *common_fields: str) -> "Relation":
+    @cached
+    def natural_join(self, other: "Relation", *common_fields: str, workers: int = None) -> "Relation":
         """
-        Equivalent to equijoin with any fields ????
+        Joins the rows whose paired fields are equal (an equi join on several pairs of fields), with a hash join.
+        The fields are named without the name of their relation, and the joined fields of the second relation
+        aren't repeated in the result
 
         Args:
             common_fields [str]: common fields going by pair eg: "pair1a", "pair1b", "pair2a", "pair2b" 
+            workers (int): if given, the join runs in a pool of worker processes (see hash_join_pairs)
+
+        Example:
+            person.natural_join(details, "id", "person_id") has the fields of person, then the ones of details but person_id
+
+        Raises:
+            ValueError: if a field doesn't exist
         """
+        self_keys = [common_fields[i] for i in range(0, len(common_fields), 2)]
+        other_keys = [common_fields[i+1] for i in range(0, len(common_fields), 2)]
 
         # Keep the tuple ONLY if field from self is equal to field from other
-        condition = " and ".join( f"{self.name}.{common_fields[i]} == {other.name}.{common_fields[i+1]}" for i in range(0, len(common_fields), 2))
-        new_relation = self.cartesian_product(other).select(condition)
-        new_relation.name = f"{self.name} NATURAL JOIN {other.name}: {common_fields}"
+        pairs = self.hash_join_pairs(other, self_keys, other_keys, workers)
 
         # Remove duplicate columns from the second relation
-        for i in range(0, len(common_fields), 2):
-            field_from_self = new_relation.get_field_by_name(f"{self.name}.{common_fields[i]}")
-            field_from_other = new_relation.get_field_by_name(f"{other.name}.{common_fields[i+1]}")
-            if field_from_self in new_relation.fields and field_from_other in new_relation.fields:
-                new_relation.fields.remove(field_from_other)
+        other_positions = [position for position, field in enumerate(other.fields) if field.name not in other_keys]
+        return self.build_join(other, pairs, f"{self.name} NATURAL JOIN {other.name}: {common_fields}", other_positions = other_positions, prefixed=False)
 
-        # Remove the self./other. in the name of the columns
-        new_relation = new_relation.copy_with_removed_fields(f"{self.name}.")
-        new_relation = new_relation.copy_with_removed_fields(f"{other.name}.")
+    @cached
+    def automatic_natural_join(self, other: "Relation", workers: int = None) -> "Relation":
+        other_field_names = [c.name for c in other.fields]
+        common_fields = [col.name for col in self.fields if col.name in other_field_names]
 
-        return new_relation
+        pairs = self.hash_join_pairs(other, common_fields, common_fields, workers)
 
-    def automatic_natural_join(self, other: "Relation") -> "Relation":
-        common_fields = [col.name for col in self.fields if col.name in [c.name for c in other.fields]]
-
-        cartesian_product = self.cartesian_product(other)
-        condition = " and ".join([f"{self.name}.{col} == {other.name}.{col}" for col in common_fields])
-        selected_relation = cartesian_product.select(condition)
-
-        # Remove duplicate fields
-        new_relation = Relation(f"{self.name} NATURAL JOIN {other.name}")
+        # Remove duplicate fields (from the second relation in common)
         added_fields = set()
-        for field in selected_relation.fields:
-            # Skip duplicate fields (from the second relation in common)
-            if field.name.split(".")[-1] not in added_fields:
-                new_relation.add_field(field)
-                added_fields.add(field.name.split(".")[-1])
-
-        new_relation.tuples = selected_relation.tuples
-
-        # Remove the self./other. in the name of the columns
-        new_relation = new_relation.copy_with_removed_fields(f"{self.name}.")
-        new_relation = new_relation.copy_with_removed_fields(f"{other.name}.")
-        
-        return new_relation
+        self_positions, other_positions = [], []
+        for fields, kept_positions in ((self.fields, self_positions), (other.fields, other_positions)):
+            for position, field in enumerate(fields):
+                if field.name.split(".")[-1] not in added_fields:
+                    kept_positions.append(position)
+                    added_fields.add(field.name.split(".")[-1])
+
+        return self.build_join(other, pairs, f"{self.name} NATURAL JOIN {other.name}", self_positions, other_positions, prefixed=False)
     
-    def equi_join(self, other: "Relation", field1, field2) -> "Relation":
-        condition = f"{self.name}.{field1} == {other.name}.{field2}"
-        return self.theta_join(other, condition)
+    @cached
+    def equi_join(self, other: "Relation", field1, field2, workers: int = None) -> "Relation":
+        pairs = self.hash_join_pairs(other, [field1], [field2], workers)
+        return self.build_join(other, pairs, f"{self.name} EQUI JOIN {other.name}")
 
     # ====================================================
     # Outter join methods
     # ====================================================
-    # TODO: Arg of add_unmatched_rows: not theta_join but condition of the theta_join, but it destroys the logic of the algorithm
-
-    def outer_join(self, other: "Relation", condition: str) -> "Relation":
-        theta_join = self.theta_join(other, condition)
-        
-        # Using these so that there's automaticaly a prefix before column names
-        self_relation = self.copy_with_renamed_fields(self.name)
-        other_relation = other.copy_with_renamed_fields(other.name)
 
-        result_relation = Relation(f"{self.name} FULL OUTER JOIN {other.name}")
-        result_relation.fields = self_relation.fields + other_relation.fields  
-        result_relation.tuples.extend(theta_join.tuples)
+    @cached
+    def outer_join(self, other: "Relation", condition: str, method: str = "auto") -> "Relation":
+        return self.build_outer_join(other, condition, method, f"{self.name} FULL OUTER JOIN {other.name}", keep_self=True, keep_other=True)
 
-        # Handle unmatched rows from both sides
-        result_relation.add_unmatched_rows(self_relation, other_relation, theta_join)
-        result_relation.add_unmatched_rows(other_relation, self_relation, theta_join)
-        return result_relation
+    @cached
+    def left_outer_join(self, other: "Relation", condition: str, method: str = "auto") -> "Relation":
+        return self.build_outer_join(other, condition, method, f"{self.name} LEFT OUTER JOIN {other.name}", keep_self=True, keep_other=False)
 
-    def left_outer_join(self, other: "Relation", condition: str) -> "Relation":
-        theta_join = self.theta_join(other, condition)
-        
-        self_relation = self.copy_with_renamed_fields(self.name)
-        other_relation = other.copy_with_renamed_fields(other.name)
-
-        result_relation = Relation(f"{self.name} LEFT OUTER JOIN {other.name}")
-        result_relation.fields = self_relation.fields + other_relation.fields
-        result_relation.tuples.extend(theta_join.tuples)
-
-        # Handle unmatched rows from the left side only
-        result_relation.add_unmatched_rows(self_relation, other_relation, theta_join)
-        return result_relation
-
-    def right_outer_join(self, other: "Relation", condition: str) -> "Relation":
+    @cached
+    def right_outer_join(self, other: "Relation", condition: str, method: str = "auto") -> "Relation":
         """
         Performs a right outer join between two relations based on a condition.
         """
-        theta_join = self.theta_join(other, condition)
-        
-        self_relation = self.copy_with_renamed_fields(self.name)
-        other_relation = other.copy_with_renamed_fields(other.name)
-
-        result_relation = Relation(f"{self.name} LEFT OUTER JOIN {other.name}")
-        result_relation.fields = self_relation.fields + other_relation.fields
-        result_relation.tuples.extend(theta_join.tuples)
-
-        # Handle unmatched rows from the left side only
-        result_relation.add_unmatched_rows(other_relation, self_relation, theta_join)
-        return result_relation
+        return self.build_outer_join(other, condition, method, f"{self.name} RIGHT OUTER JOIN {other.name}", keep_self=False, keep_other=True)
     
 
     # ====================================================
     # Union - Intersection - Difference Methods
     # ====================================================
     
+    @cached
     def union(self, other: "Relation", field_mapping: dict) -> "Relation":
         """
         Performs a union operation on two relations using the specified field mapping.
         The result only includes fields specified in the field_mapping.
         """
-        # Validate field_mapping
-        for self_field, other_field in field_mapping.items():
-            if self_field not in [f.name for f in self.fields]:
-                raise ValueError(f"Field '{self_field}' not found in '{self.name}'.")
-            if other_field not in [f.name for f in other.fields]:
-                raise ValueError(f"Field '{other_field}' not found in '{other.name}'.")
-
-        # Create a new relation with fields specified in field_mapping
-        result_fields = [
-            Field(name, self.get_field_by_name(name).domain.union(other.get_field_by_name(field_mapping[name]).domain))
-            for name in field_mapping.keys()
-        ]
-        new_relation = Relation(f"{self.name}_UNION_{other.name}", *result_fields)
-
-        # Helper to construct tuples based on field_mapping
-        def construct_tuple(source_relation, row, field_mapping):
-            new_tuple = Tuple(new_relation)
-            for self_field, other_field in field_mapping.items():
-                new_tuple.data[self_field] = row.data[other_field]
-            return new_tuple
-
-        # Add tuples from both relations, ensuring no duplicates
-        added_tuples = set()  # Keep track of added tuples for deduplication
-        for row in self.tuples:
-            new_tuple = construct_tuple(self, row, field_mapping)
-            tuple_key = tuple(new_tuple.data.values())  # Generate a hashable key for deduplication
-            if tuple_key not in added_tuples:
-                new_relation.add_tuple(new_tuple)
-                added_tuples.add(tuple_key)
-
-        for row in other.tuples:
-            new_tuple = construct_tuple(other, row, field_mapping)
-            tuple_key = tuple(new_tuple.data.values())  # Generate a hashable key for deduplication
-            if tuple_key not in added_tuples:
-                new_relation.add_tuple(new_tuple)
-                added_tuples.add(tuple_key)
-
-        return new_relation
+        return self.set_operation("union", other, field_mapping)
 
 
+    @cached
     def intersection(self, other: "Relation", field_mapping: dict) -> "Relation":
         """
         Performs an intersection operation on two relations using the specified field mapping.
         The result only includes fields specified in the field_mapping.
         """
-        # Validate field_mapping
-        for self_field, other_field in field_mapping.items():
-            if self_field not in [f.name for f in self.fields]:
-                raise ValueError(f"Field '{self_field}' not found in '{self.name}'.")
-            if other_field not in [f.name for f in other.fields]:
-                raise ValueError(f"Field '{other_field}' not found in '{other.name}'.")
-
-        # Create a new relation with fields specified in field_mapping
-        result_fields = [
-            Field(name, self.get_field_by_name(name).domain.intersection(other.get_field_by_name(field_mapping[name]).domain))
-            for name in field_mapping.keys()
-        ]
-        new_relation = Relation(f"{self.name}_INTERSECTION_{other.name}", *result_fields)
-
-        # Helper to construct tuples based on field_mapping
-        def construct_tuple(source_relation, row, field_mapping):
-            new_tuple = Tuple(new_relation)
-            for self_field, other_field in field_mapping.items():
-                new_tuple.data[self_field] = row.data[other_field]
-            return new_tuple
-
-        # Add tuples that exist in both relations
-        other_tuples_set = {
-            tuple(construct_tuple(other, row, field_mapping).data.values()) for row in other.tuples
-        }
-
-        for row in self.tuples:
-            new_tuple = construct_tuple(self, row, field_mapping)
-            tuple_key = tuple(new_tuple.data.values())
-            if tuple_key in other_tuples_set:
-                new_relation.add_tuple(new_tuple)
-
-        return new_relation
+        return self.set_operation("intersection", other, field_mapping)
 
 
+    @cached
     def difference(self, other: "Relation", field_mapping: dict) -> "Relation":
         """
         Performs a difference operation (self - other) on two relations using the specified field mapping.
         The result only includes fields specified in the field_mapping.
         """
-        # Validate field_mapping
+        return self.set_operation("difference", other, field_mapping)
+
+
+
+    # ====================================================
+    # Helper Methods
+    # ====================================================
+
+    def set_operation(self, kind: str, other: "Relation", field_mapping: dict) -> "Relation":
+        """
+        Union, intersection or difference on the values of the mapped fields (see setop/setop.py):
+        the rows are hashed directly from their values and only the kept rows are built
+
+        Raises:
+            ValueError: if a field of the mapping doesn't exist
+        """
+        self_positions, other_positions = self.positions(), other.positions()
         for self_field, other_field in field_mapping.items():
-            if self_field not in [f.name for f in self.fields]:
+            if self_field not in self_positions:
                 raise ValueError(f"Field '{self_field}' not found in '{self.name}'.")
-            if other_field not in [f.name for f in other.fields]:
+            if other_field not in other_positions:
                 raise ValueError(f"Field '{other_field}' not found in '{other.name}'.")
 
-        # Create a new relation with fields specified in field_mapping
         result_fields = [
-            Field(name, self.get_field_by_name(name).domain.difference(other.get_field_by_name(field_mapping[name]).domain))
-            for name in field_mapping.keys()
+            Field(self_field, getattr(self.fields[self_positions[self_field]].domain, kind)(other.fields[other_positions[other_field]].domain))
+            for self_field, other_field in field_mapping.items()
         ]
-        new_relation = Relation(f"{self.name}_DIFFERENCE_{other.name}", *result_fields)
-
-        # Helper to construct tuples based on field_mapping
-        def construct_tuple(source_relation, row, field_mapping):
-            new_tuple = Tuple(new_relation)
-            for self_field, other_field in field_mapping.items():
-                new_tuple.data[self_field] = row.data[other_field]
-            return new_tuple
-
-        # Add tuples that exist in self but not in other
-        other_tuples_set = {
-            tuple(construct_tuple(other, row, field_mapping).data.values()) for row in other.tuples
-        }
-
-        for row in self.tuples:
-            new_tuple = construct_tuple(self, row, field_mapping)
-            tuple_key = tuple(new_tuple.data.values())
-            if tuple_key not in other_tuples_set:
-                new_relation.add_tuple(new_tuple)
-
-        return new_relation
+        self_rows = self.fields_values([self_positions[self_field] for self_field in field_mapping.keys()])
 
+        if kind == "union":
+            rows = union_rows(self_rows, other.fields_values([other_positions[other_field] for other_field in field_mapping.values()]))
+        else:
+            rows = filter_rows(self_rows, other.membership(list(field_mapping.values())), kind == "intersection")
+        return Relation.from_rows(f"{self.name}_{kind.upper()}_{other.name}", result_fields, rows, self.storage)
 
-
-    # ====================================================
-    # Helper Methods
-    # ====================================================
+    def membership(self, field_names: List[str]) -> Callable[[tuple], bool]:
+        """
+        Returns the function telling if a row of this relation has the given values for the fields (the same values with the same types).
+        An index on one of the fields answers it without reading the other rows, else the values of every row are hashed once
+        """
+        positions = self.positions()
+        getter = values_getter([positions[field_name] for field_name in field_names])
+        for key_position, field_name in enumerate(field_names):
+            index = self.get_index(field_name)
+            if index is None:
+                continue
+
+            def contains(values):
+                for row_index in index.lookup("==", values[key_position]):
+                    other_values = getter(self.row_values(row_index))
+                    if other_values == values and same_types(other_values, values):
+                        return True
+                return False
+            return contains
+        return key_membership(self.fields_values([positions[field_name] for field_name in field_names]))
 
     def get_field_by_name(self, name) -> Field: 
-        for field in self.fields:
-            if name == field.name:
-                return field
-        return None
+        position = self.positions().get(name)
+        return self.fields[position] if position is not None else None
     
     def copy(self) -> "Relation":
-        new_relation = Relation(self.name, *self.fields.copy()) # Don't forget the * before self.fields.copy()
-        new_relation.tuples = self.tuples.copy()
+        new_relation = Relation(self.name, *self.fields.copy(), storage = self.storage) # Don't forget the * before self.fields.copy()
+        if self.store is not None:
+            new_relation.store = self.store.take(range(len(self)))
+        else:
+            new_relation.tuples = list(self.rows)
         return new_relation
     
     def copy_with_renamed_fields(self, prefix: str) -> "Relation":
-        new_relation = Relation(self.name)  
+        fields = [Field(prefix + "." + field.name, domain = field.domain) for field in self.fields]
+        columns = [self.column_values(position) for position in range(len(self.fields))]
+        return Relation.from_columns(self.name, fields, columns, len(self), self.storage)
 
-        for field in self.fields:
-            new_field = Field(prefix + "." + field.name, domain = field.domain)
-            new_relation.add_field(new_field)
-        
-        for tuple in self.tuples:
-            new_tuple = tuple.copy()
-            for field in self.fields:
-                old_field_name = field.name
-                new_field_name = prefix + "." + field.name
-                new_tuple.data[new_field_name] = new_tuple.data.pop(old_field_name)
 
-            new_relation.add_tuple(new_tuple)
-
-        return new_relation
+    def copy_with_removed_fields(self, prefix: str) -> "Relation":
+        fields = [Field(field.name.removeprefix(prefix), domain = field.domain) for field in self.fields]
+        columns = [self.column_values(position) for position in range(len(self.fields))]
+        return Relation.from_columns(f"{self.name.removeprefix(prefix)}", fields, columns, len(self), self.storage)
+    
+    def theta_join_pairs(self, other: "Relation", condition: str, method: str = "auto"):
+        """
+        Returns the pairs of indexes (self row, other row) matching the condition, see theta_join for the methods
 
+        Raises:
+            ValueError: if the method doesn't exist or can't be used with this condition
+        """
+        if method not in ("auto", "hash", "merge", "nested_loop"):
+            raise ValueError(f"Unknown join method: {method}")
+
+        self_fields = {f"{self.name}.{field.name}": field.name for field in self.fields}
+        other_fields = {f"{other.name}.{field.name}": field.name for field in other.fields}
+        expression = condition if isinstance(condition, Expression) else parse_condition(condition, [*self_fields, *other_fields])
+        equalities, ranges, residuals = split_join_condition(expression, set(self_fields), set(other_fields))
+
+        if method == "auto":
+            method = "hash" if equalities else "merge" if ranges else "nested_loop"
+
+        if method == "nested_loop":
+            pairs = ((self_index, other_index) for self_index in range(len(self)) for other_index in range(len(other)))
+            residuals = [expression]
+        elif method == "hash":
+            if not equalities:
+                raise ValueError(f"A hash join needs an equality between a field of each relation: {condition}")
+            pairs = self.hash_join_pairs(
+                other,
+                [self_fields[equality.left.name] for equality in equalities],
+                [other_fields[equality.right.name] for equality in equalities]
+            )
+            residuals = [*residuals, *ranges]
+        else:
+            if not equalities and not ranges:
+                raise ValueError(f"A merge join needs a comparison between a field of each relation: {condition}")
+            # The merge join uses only one comparison, the others are checked like the rest of the condition
+            comparison = (equalities or ranges)[0]
+            pairs = self.merge_join_pairs(other, self_fields[comparison.left.name], other_fields[comparison.right.name], comparison.operator)
+            residuals = [*residuals, *(part for part in [*equalities, *ranges] if part is not comparison)]
+
+        if not residuals:
+            return pairs
+
+        # The rest of the condition is evaluated on the values of both rows put end to end
+        residual = residuals[0] if len(residuals) == 1 else And(*residuals)
+        predicate = compile_condition(residual, {field_name: position for position, field_name in enumerate([*self_fields, *other_fields])})
+        self_values = list(self.rows_values())
+        other_values = list(other.rows_values())
+        return (
+            (self_index, other_index) for self_index, other_index in pairs
+            if predicate(self_values[self_index] + other_values[other_index])
+        )
+
+    def hash_join_pairs(self, other: "Relation", self_keys: List[str], other_keys: List[str], workers: int = None):
+        """
+        Returns the pairs of indexes (self row, other row) whose join fields are equal, using a hash join
 
-    def copy_with_removed_fields(self, prefix: str) -> "Relation":
-        new_relation = Relation(f"{self.name.removeprefix(prefix)}")
-        for field in self.fields:
-            new_field = Field(field.name.removeprefix(prefix), domain = field.domain)
-            new_relation.add_field(new_field)
-        
-        for tuple in self.tuples:
-            new_tuple = tuple.copy()
-            for field in self.fields:
-                old_field_name = field.name
-                new_field_name = field.name.removeprefix(prefix)
-                new_tuple.data[new_field_name] = new_tuple.data.pop(old_field_name)
+        Args:
+            workers (int): if given, the keys of both relations are partitioned by hash and each pair of partitions
+                           is joined in a pool of workers processes (see parallel/parallel.py)
 
-            new_relation.add_tuple(new_tuple)
+        Raises:
+            ValueError: if a join field doesn't exist, or workers isn't positive
+        """
+        for relation, keys in ((self, self_keys), (other, other_keys)):
+            for key in keys:
+                if relation.get_field_by_name(key) is None:
+                    raise ValueError(f"Column {key} doesn't exist")
+
+        if workers is not None:
+            self_indexes, other_indexes = parallel_hash_join(self.join_keys(self_keys), other.join_keys(other_keys), workers)
+            return zip(self_indexes, other_indexes)
+
+        # The index of the second relation replaces the hash table
+        index = other.get_index(other_keys[0]) if len(other_keys) == 1 else None
+        if index is not None:
+            lookup = index.lookup
+            return (
+                (self_index, other_index)
+                for self_index, value in enumerate(self.column_values(self_keys[0]))
+                for other_index in lookup("==", value)
+            )
+
+        return hash_join(self.join_keys(self_keys), other.join_keys(other_keys))
+
+    def join_keys(self, field_names: List[str]) -> List[tuple]:
+        """
+        Returns the values of the join fields of every row, as tuples
+        """
+        return list(zip(*(self.column_values(field_name) for field_name in field_names))) if field_names else [()] * len(self)
 
-        return new_relation
-    
-    def has_matching_tuple(self, tuple, other: "Relation") -> bool:
-        for other_tuple in other.tuples:
-            if tuple.equals(other_tuple):
-                return True 
-        return False
-    
-    def add_unmatched_rows(self, primary_relation, secondary_relation, theta_join):
+    def merge_join_pairs(self, other: "Relation", self_key: str, other_key: str, operator: str):
         """
-        Adds unmatched rows from one relation (primary_relation) to self.
-        Sets None for the fields from the secondary_relation.
+        Returns the pairs of indexes (self row, other row) where self_key <operator> other_key, using a sort-merge join
+
+        Raises:
+            ValueError: if a join field doesn't exist
         """
-        unmatched_rows = []
+        for relation, key in ((self, self_key), (other, other_key)):
+            if relation.get_field_by_name(key) is None:
+                raise ValueError(f"Column {key} doesn't exist")
+
+        self_join_keys = self.column_values(self_key)
+        other_join_keys = other.column_values(other_key)
+        return merge_join(self_join_keys, other_join_keys, operator)
 
-        for row in primary_relation.tuples:
-            matched = False
-            # Check if the row matches any row in theta_join
-            for matched_row in theta_join.tuples:
-                if all(
-                    row.data[field.name] == matched_row.data[field.name]
-                    for field in primary_relation.fields
-                ):
-                    matched = True
-                    break  
+    def build_join(self, other: "Relation", pairs, name: str, self_positions: List[int] = None, other_positions: List[int] = None,
+                   prefixed: bool = True) -> "Relation":
+        """
+        Creates the result of a join from the pairs of matching row indexes
 
-            # If no match was found, add to unmatched_rows
-            if not matched:
-                unmatched_rows.append(row)
+        Args:
+            pairs: (self index, other index), an index can be None to fill the fields of that relation with None
+            self_positions, other_positions: the positions of the fields of each relation kept in the result, every field by default
+                                             (positions, not names: both relations, or one relation, can have fields with the same name)
+            prefixed: if True, the fields are named like in the cartesian product (e.g: "Person.id")
+        """
+        if self_positions is None:
+            self_positions = list(range(len(self.fields)))
+        if other_positions is None:
+            other_positions = list(range(len(other.fields)))
+        fields = []
+        for relation, positions in ((self, self_positions), (other, other_positions)):
+            for position in positions:
+                field = relation.fields[position]
+                new_name = f"{relation.name}.{field.name}" if prefixed else field.name
+                fields.append(Field(new_name, domain = field.domain))
+
+        pairs = list(pairs)
+        self_indexes = [self_index for self_index, _ in pairs]
+        other_indexes = [other_index for _, other_index in pairs]
+        columns = [
+            *(gather(self.column_values(position), self_indexes) for position in self_positions),
+            *(gather(other.column_values(position), other_indexes) for position in other_positions)
+        ]
+        return Relation.from_columns(name, fields, columns, len(pairs), self.storage)
 
-        # Process unmatched rows
-        for row in unmatched_rows:
-            new_row = Tuple(self)
+    def build_outer_join(self, other: "Relation", condition: str, method: str, name: str, keep_self: bool, keep_other: bool) -> "Relation":
+        """
+        Joins both relations, then adds the rows of self (if keep_self) and/or other (if keep_other)
+        that didn't match anything, with None in the fields of the other relation.
+        The matched rows are marked while the join runs, so adding the unmatched ones is a single pass
+        """
+        self_matched = bytearray(len(self))
+        other_matched = bytearray(len(other))
 
-            for field in primary_relation.fields:
-                new_row.data[field.name] = row.data[field.name]
-            for field in secondary_relation.fields:
-                new_row.data[field.name] = None
+        def marked_pairs():
+            for self_index, other_index in self.theta_join_pairs(other, condition, method):
+                self_matched[self_index] = 1
+                other_matched[other_index] = 1
+                yield self_index, other_index
 
-            self.add_tuple(new_row)
+        def all_pairs():
+            yield from marked_pairs()
+            # Handle unmatched rows
+            if keep_self:
+                yield from ((self_index, None) for self_index, matched in enumerate(self_matched) if not matched)
+            if keep_other:
+                yield from ((None, other_index) for other_index, matched in enumerate(other_matched) if not matched)
 
+        return self.build_join(other, all_pairs(), name)
 
     def add_field(self, field: Field) -> None:
         self.fields.append(field)
+        if self.store is not None:
+            self.store.add_column(field)
+        elif self.rows:
+            # The existing rows get None for the new field
+            self.rows = [Tuple(self, row.values + (None,)) for row in self.rows]
+        self.version = next_version()
 
     def add_tuple(self, tuple: Tuple):
-        self.tuples.append(tuple)
+        self.check_keys(tuple.values)
+        if self.store is not None:
+            self.store.append(tuple.values)
+        else:
+            self.rows.append(tuple)
+        self.version = next_version()
+        self.update_indexes(tuple.values)
+        if self.views:
+            apply_views(self.views, [tuple.values])
+
+    def append_values(self, values: Sequence[object]):
+        """
+        Appends a row given by its values (one per field, in the order of self.fields) without validating the domains,
+        returns the new row
+
+        Raises:
+            ValueError: If that row already exist (same values for the primary key or a unique key)
+        """
+        self.check_keys(values)
+        if self.store is not None:
+            self.store.append(values)
+            row = self.tuples[-1]
+        else:
+            row = Tuple(self, values)
+            self.rows.append(row)
+        self.version = next_version()
+        self.update_indexes(row.values)
+        if self.views:
+            apply_views(self.views, [row.values])
+        return row
+
+    def update_indexes(self, values: Sequence[object]) -> None:
+        """
+        Adds the last row (given by its values) to the indexes and the keys
+        """
+        row_index = len(self) - 1
+        for index in self.indexes.values():
+            if index.count == row_index:
+                index.add(values[index.position], row_index)
+        for key in self.keys:
+            key.add(values)
+
+    def check_keys(self, values: Sequence[object]) -> None:
+        for key in self.keys:
+            key.check(values)
+
+    def add_key(self, field_names, primary: bool) -> UniqueKey:
+        """
+        Creates a key on the fields and fills it with the existing rows
+
+        Raises:
+            ValueError: if a field doesn't exist or two existing rows have the same key
+        """
+        positions = self.positions()
+        for field_name in field_names:
+            if field_name not in positions:
+                raise ValueError(f"Column {field_name} doesn't exist")
+        if not field_names:
+            raise ValueError("A key needs at least one field")
+
+        key = UniqueKey(field_names, [positions[field_name] for field_name in field_names], primary)
+        for values in self.rows_values():
+            key.check(values)
+            key.add(values)
+        self.keys.append(key)
+        return key
+
+    def positions(self) -> dict:
+        """
+        Maps the name of each field to its position (the first one if two fields have the same name)
+        It's computed again only when self.fields changes
+        """
+        fields, positions = self.field_positions
+        if len(fields) != len(self.fields) or fields != tuple(self.fields):
+            fields = tuple(self.fields)
+            positions = {}
+            for position, field in enumerate(fields):
+                positions.setdefault(field.name, position)
+            self.field_positions = (fields, positions)
+        return positions
+
+    def row_values(self, index: int) -> tuple:
+        """
+        Returns the values of the row at the index
+        """
+        if self.store is not None:
+            return self.store.row(index)
+        return self.rows[index].values
+
+    def get_index(self, field_name: str):
+        """
+        Returns the index of a field (None if there's none), after indexing the rows added without insert
+        """
+        index = self.indexes.get(field_name)
+        if index is not None and index.count < len(self):
+            column = self.column_values(index.position)
+            for row_index in range(index.count, len(column)):
+                index.add(column[row_index], row_index)
+        return index
+
+    def index_lookup(self, expression):
+        """
+        Returns the positions of the rows that may match the expression using the indexes
+        (None if no index can be used): the comparisons between an indexed field and a value
+        in the top-level "and" are looked up, and the smallest result is kept
+        """
+        best = None
+        for part in conjuncts(expression):
+            if not isinstance(part, Comparison) or part.operator not in ("==", "<", "<=", ">", ">="):
+                continue
+            if isinstance(part.left, Literal) and isinstance(part.right, FieldReference):
+                part = part.flipped()
+            if not (isinstance(part.left, FieldReference) and isinstance(part.right, Literal)):
+                continue
+            index = self.get_index(part.left.name)
+            if index is None:
+                continue
+            matches = index.lookup(part.operator, part.right.value)
+            if matches is not None and (best is None or len(matches) < len(best)):
+                best = matches
+        return best
+
+    def column_mask(self, expression: Expression) -> List[int]:
+        """
+        Evaluates a condition on whole columns (only the ones of the fields it reads), returns the positions of the matching rows
+        """
+        positions = self.positions()
+        needed = {positions[name] for name in expression.fields() if name in positions}
+        columns = [self.column_values(position) if position in needed else None for position in range(len(self.fields))]
+        return mask_indexes(compile_mask(expression, positions)(columns, len(self)))
+
+    def column_values(self, field) -> Sequence[object]:
+        """
+        Returns the values of a field (given by its name or its position) for every row
+        """
+        position = field if isinstance(field, int) else self.positions()[field]
+        if self.store is not None:
+            return self.store.columns[position]
+        return [row.values[position] for row in self.rows]
+
+    def rows_values(self):
+        """
+        Returns the values of every row as tuples, in the order of self.fields
+        """
+        if self.store is not None:
+            return self.store.rows()
+        return (row.values for row in self.rows)
+
+    def fields_values(self, positions: List[int]):
+        """
+        Returns the values of the fields at the positions for every row, as tuples (only those columns are read)
+        """
+        if self.store is not None and positions:
+            return zip(*(self.store.columns[position] for position in positions))
+        return map(values_getter(positions), self.rows_values())
+
+    def take(self, indexes: List[int], name: str) -> "Relation":
+        """
+        Returns a relation with the same fields and only the rows at the indexes
+        """
+        if self.store is not None:
+            new_relation = Relation(name, *self.fields, storage = self.storage)
+            new_relation.store = self.store.take(indexes)
+            return new_relation
+        new_relation = Relation(name, *self.fields)
+        rows = self.rows
+        new_relation.rows = [rows[index] for index in indexes]
+        return new_relation
+
+    @staticmethod
+    def from_columns(name: str, fields: List[Field], columns: List[Sequence[object]], length: int, storage: str = "row") -> "Relation":
+        """
+        Creates a relation from the values of each field
+
+        Args:
+            length: the number of rows (needed when there's no field)
+        """
+        new_relation = Relation(name, *fields, storage = storage)
+        if storage == "column":
+            new_relation.store = ColumnStore(new_relation.fields, columns, length)
+        else:
+            rows = zip(*columns) if columns else (() for _ in range(length))
+            new_relation.rows = [Tuple(new_relation, values) for values in rows]
+        return new_relation
+
+    @staticmethod
+    def from_rows(name: str, fields: List[Field], rows, storage: str = "row") -> "Relation":
+        """
+        Creates a relation from the values of each row (any iterable, e.g: a generator read only once)
+        """
+        new_relation = Relation(name, *fields, storage = storage)
+        if storage == "column":
+            rows = iter(rows)
+            while True:
+                chunk = list(islice(rows, ROWS_PER_CHUNK))
+                if not chunk:
+                    break
+                new_relation.store.extend(chunk)
+        else:
+            new_relation.rows = [Tuple(new_relation, values) for values in rows]
+        return new_relation
+
+    def save(self, path: str) -> None:
+        """
+        Writes the relation (its name, fields with their domains, and rows) to a binary file, see persistence/mapped.py
+        The keys and the indexes aren't saved
+
+        Raises:
+            ValueError: if a domain or a value can't be written (e.g: a custom constraint, a list in a column)
+        """
+        write_relation(self, path)
+
+    @staticmethod
+    def open(path: str) -> "Relation":
+        """
+        Opens a file written by save() without reading its rows: the columns are mapped from the file (storage="column"),
+        so opening is immediate and the values are read only when they're used
+
+        Raises:
+            ValueError: if the file isn't a relation file
+        """
+        name, fields, store = read_relation(path)
+        new_relation = Relation(name, *fields, storage = "column")
+        new_relation.store = store
+        return new_relation
+
+    @staticmethod
+    def from_csv(path: str, name: str, *fields: Field, storage: str = "row", delimiter: str = ",",
+                 chunk_size: int = ROWS_PER_CHUNK, on_error: str = "raise") -> "Relation":
+        """
+        Reads a CSV file whose first row names the fields, chunk_size rows at a time, each chunk validated with insert_many.
+        A cell is read as the first type its field accepts among int, float, bool and str (see persistence/text.py):
+        what to_csv writes is read back as it was, since to_csv refuses the values that wouldn't be
+
+        Args:
+            on_error (str): "raise" stops at the first row breaking a domain or a key, "skip" leaves it out
+
+        Example:
+            Relation.from_csv("person.csv", "Person", Field("id", Domain(allowed_types=[int])), Field("name", Domain(allowed_types=[str])))
+
+        Raises:
+            ValueError: if a column of the file doesn't exist, if a row is malformed or invalid (with its line number)
+        """
+        new_relation = Relation(name, *fields, storage = storage)
+        with open(path, newline = "", encoding = "utf-8") as file:
+            return load_rows(new_relation, csv_records(file, new_relation.fields, delimiter, path), chunk_size, on_error, path)
+
+    @staticmethod
+    def from_jsonl(path: str, name: str, *fields: Field, storage: str = "row",
+                   chunk_size: int = ROWS_PER_CHUNK, on_error: str = "raise") -> "Relation":
+        """
+        Reads a JSON Lines file (one JSON object field name -> value per line), chunk_size rows at a time,
+        each chunk validated with insert_many
+
+        Args:
+            on_error (str): "raise" stops at the first row breaking a domain or a key, "skip" leaves it out
+
+        Raises:
+            ValueError: if a line isn't a JSON object, or if a row is invalid (with its line number)
+        """
+        new_relation = Relation(name, *fields, storage = storage)
+        with open(path, encoding = "utf-8") as file:
+            return load_rows(new_relation, jsonl_records(file, path), chunk_size, on_error, path)
+
+    def to_csv(self, path: str, delimiter: str = ",", chunk_size: int = ROWS_PER_CHUNK) -> None:
+        """
+        Writes the relation as CSV: a row with the names of the fields, then one row per tuple (None is an empty cell)
+
+        Raises:
+            ValueError: if from_csv wouldn't read a value back as it is (e.g: the str "20" in a field accepting int and str),
+                        see persistence/text.py
+        """
+        write_csv(self, path, delimiter, chunk_size)
+
+    def to_jsonl(self, path: str, chunk_size: int = ROWS_PER_CHUNK) -> None:
+        """
+        Writes the relation as JSON Lines: one JSON object (field name -> value) per tuple
+
+        Raises:
+            ValueError: if a value can't be written in JSON (e.g: a set)
+        """
+        write_jsonl(self, path, chunk_size)
+
+    def share(self) -> SharedRelation:
+        """
+        Copies the typed columns (int and float fields) in shared memory blocks, once, and returns the handle to send
+        to the workers of a pool: pickling it doesn't copy those columns, each worker reads them with handle.relation()
+        (see persistence/transfer.py). The blocks are freed by handle.unlink(), or at the end of a with block
+
+        Example:
+            with relation.share() as shared:
+                results = pool.map(work, [shared] * 8)
+        """
+        return SharedRelation(self)
+
+    def __reduce_ex__(self, protocol):
+        # The schema is pickled once and the values column by column (no Tuple objects),
+        # a typed column is a PickleBuffer from protocol 5 (see persistence/transfer.py)
+        return restore_relation, (relation_state(self, protocol),)
+
+    def __len__(self):
+        return len(self.store) if self.store is not None else len(self.rows)
 
     # ====================================================
     # Display Methods
@@ -524,12 +1226,13 @@ class Relation:
             return "Empty set"
 
         field_names = [field.name for field in self.fields]
+        rows_values = list(self.rows_values())
 
         field_widths = []
-        for field_name in field_names:
+        for position, field_name in enumerate(field_names):
             max_name_length = len(field_name) 
             max_value_length = max(
-                (len(repr(str(tuple.data.get(field_name, "")))) for tuple in self.tuples), # Add repr method to tuple.data.get() to precise the datatype
+                (len(repr(str(values[position]))) for values in rows_values), # Add repr method to the value to precise the datatype
                 default=0
             ) 
 
@@ -544,9 +1247,9 @@ class Relation:
 
         data_tuples = [
             "| " + " | ".join(
-                str(repr(tuple.data.get(field, ""))).ljust(width) for field, width in zip(field_names, field_widths) 
+                str(repr(value)).ljust(width) for value, width in zip(values, field_widths) 
             ) + " |"
-            for tuple in self.tuples
+            for values in rows_values
         ]
 
         return "\n".join([border, header, border] + data_tuples + [border])
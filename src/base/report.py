@@ -0,0 +1,52 @@
+from typing import Dict, List
+
+class InsertReport:
+    """
+    The result of a bulk insert: how many rows were inserted and why the others were rejected
+    """
+
+    # ====================================================
+    # Initialisation Method
+    # ====================================================
+
+    def __init__(self, relation_name: str):
+        """
+        Initialises the following attributes:
+            inserted (int): the number of rows added to the relation
+            errors (dict): row number (its position in the given rows) -> list of error messages
+        """
+        self.relation_name = relation_name
+        self.inserted: int = 0
+        self.errors: Dict[int, List[str]] = {}
+
+    # ====================================================
+    # Main Methods
+    # ====================================================
+
+    def add_error(self, row_number: int, message: str) -> None:
+        self.errors.setdefault(row_number, []).append(message)
+
+    @property
+    def failed(self) -> List[int]:
+        """
+        The row numbers of the rejected rows, in increasing order
+        """
+        return sorted(self.errors)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    # ====================================================
+    # Display Methods
+    # ====================================================
+
+    def __str__(self):
+        lines = [f"{self.relation_name}: {self.inserted} row(s) inserted, {len(self.errors)} row(s) rejected"]
+        for row_number in self.failed:
+            for message in self.errors[row_number]:
+                lines.append(f"    row {row_number}: {message}")
+        return "\n".join(lines)
+
+    def display(self) -> None:
+        print(self)
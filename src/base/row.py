@@ -1,59 +1,122 @@
 from __future__ import annotations # Solution to circular import: from ..base.relation import Relation
-from typing import Dict, Any
-from ..condition.condition import simplify_and_evaluate
+from typing import Dict, Any, Iterator, Mapping, Sequence
+from ..condition.compiler import compile_condition
+from ..setop.setop import typed_key
 
 class Tuple:
     """
     The real need of creating a relation: putting and stocking data into it
+
+    The values are stored by position, in the order of the fields of the relation,
+    so the names of the fields are kept only once by the relation instead of once per row.
+    Two tuples are equal when they have the same values with the same types ((1,) isn't (1.0,) nor (True,)),
+    they aren't hashable since add_value changes them: hash row.values instead
     """
 
+    __slots__ = ("relation", "values")
+
     # ====================================================
     # Initialisation Method
     # ====================================================
 
-    def __init__(self, relation: "Relation"):
+    def __init__(self, relation: "Relation", values: Sequence[Any] = None):
         """
         Initialises the following attributes:
-            data (dict): a dictionary/map relating the column name and the value it stores
+            values (tuple): the value of each field, in the order of relation.fields
 
         Args:
             relation (Relation): so the row object could directly access fields and domains and other rows
+            values: the values of the row, all "None" by default
         """
         self.relation = relation
-        self.data: Dict[str, Any] = {}
-
-        # Putting all the data values "None" by default
-        for col in self.relation.fields:
-            self.data[col.name] = None
+        if values is None:
+            self.values = (None,) * len(relation.fields)
+        else:
+            self.values = values if type(values) is tuple else tuple(values)
 
     # ====================================================
     # Main Methods
     # ====================================================
 
     def evaluate_condition(self, condition) -> bool:
-        # Step 1: changing the column names by their real values
-        for column_name, value in self.data.items():
-            condition = condition.replace(column_name, repr(value))
-        return simplify_and_evaluate(condition)
-    
-    
+        # The field names are bound to positions, no string replacement needed
+        predicate = compile_condition(condition, self.relation.positions())
+        return predicate(self.values)
+
+
 
     # ====================================================
     # Helper Methods
     # ====================================================
 
+    @property
+    def data(self) -> Mapping[str, Any]:
+        """
+        A read-only mapping relating the column name and the value it stores: row.data[name] = value raises a TypeError,
+        use add_value (or assign a whole dict to row.data) to change a value.
+        It reads the values through the positions cached by the relation, no dict is built per row
+        """
+        return RowData(self.relation.positions(), self.values)
+
+    @data.setter
+    def data(self, data: Dict[str, Any]):
+        self.values = tuple(data.get(field.name) for field in self.relation.fields)
+
     def add_value(self, column_name: str, value: object):
-        self.data[column_name] = value
+        positions = self.relation.positions()
+        if column_name not in positions:
+            raise ValueError(f"Column {column_name} doesn't exist")
+        position = positions[column_name]
+        values = self.values
+        if len(values) < len(positions):
+            values += (None,) * (len(positions) - len(values))
+        self.values = values[:position] + (value,) + values[position+1:]
 
     def copy(self) -> "Tuple":
-        new_tuple = Tuple(self.relation)
-        for column_name in self.data:
-            new_tuple.add_value(column_name, self.data[column_name])
-        return new_tuple
-    
+        return Tuple(self.relation, self.values)
+
+    def __eq__(self, other):
+        if not isinstance(other, Tuple):
+            return NotImplemented
+        return typed_key(self.values) == typed_key(other.values)
+
+    __hash__ = None
+
     # ====================================================
     # Display Methods
     # ====================================================
-    
+
     def __str__(self):
-        return f"Relation: {self.relation.name}, data: {self.data}"
\ No newline at end of file
+        return f"Relation: {self.relation.name}, data: {row_dict(self.relation, self.values)}"
+
+
+class RowData(Mapping):
+    """
+    The values of a row by field name, read from the positions of the fields in the relation
+    """
+
+    __slots__ = ("positions", "values")
+
+    def __init__(self, positions: Dict[str, int], values: Sequence[Any]):
+        self.positions = positions
+        self.values = values
+
+    def __getitem__(self, name: str) -> Any:
+        position = self.positions[name]
+        # A row can be shorter than the fields (a field added after it), the missing values are None
+        return self.values[position] if position < len(self.values) else None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.positions)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+def row_dict(relation: "Relation", values: Sequence[Any]) -> Dict[str, Any]:
+    """
+    The values of a row by field name, as a new dict
+    """
+    return dict(zip((field.name for field in relation.fields), values))
@@ -0,0 +1,307 @@
+from array import array
+from typing import Iterable, Iterator, List, Mapping, Sequence
+from .column import Field
+from .row import RowData, Tuple, row_dict
+from ..condition.compiler import compile_condition
+from ..setop.setop import typed_key
+from ..condition.vectorize import NUMPY_TYPES, column_typecode, numpy
+
+"""
+Column-oriented storage of the rows of a relation
+
+Instead of one Tuple object per row, a ColumnStore keeps one array per field:
+    - array("q") for a field whose domain only accepts int
+    - array("d") for a field whose domain only accepts float
+    - a list of objects for anything else
+A typed column falls back to a list as soon as it receives a value of another type (e.g: True in an int column),
+so the values always come back exactly as they were inserted
+"""
+
+TYPECODES = {int: "q", float: "d"}
+
+# ====================================================
+# Columns
+# ====================================================
+
+def column_type(field: Field) -> type:
+    """
+    Returns int or float if every valid value of the field has that type, else None
+
+    Example:
+        Input: Field("age", Domain(allowed_types=[int], constraints=[PositiveConstraint(32)]))
+        Output: int
+    """
+    domain = field.domain
+    allowed_types = domain.allowed_types if isinstance(domain.allowed_types, (list, tuple)) else [domain.allowed_types]
+    if len(allowed_types) != 1 or allowed_types[0] not in TYPECODES:
+        return None
+    type_ = allowed_types[0]
+    if any(type(value) is not type_ for value in domain.allowed_values):
+        return None
+    return type_
+
+def new_column(type_: type = None, values: Iterable[object] = ()):
+    """
+    Creates a typed array if type_ is int or float and every value has that exact type, else a list
+    """
+    values = values if isinstance(values, (list, tuple, array)) else list(values)
+    if type_ in TYPECODES and all(type(value) is type_ for value in values):
+        try:
+            return array(TYPECODES[type_], values)
+        except OverflowError:
+            pass
+    return list(values)
+
+def gather(column: Sequence, indexes: Iterable[int]) -> list:
+    """
+    Returns the values of the column at the indexes, a None index gives a None value
+    """
+    return [None if index is None else column[index] for index in indexes]
+
+def copy_column(column: Sequence) -> Sequence:
+    """
+    Returns a copy of the column in memory: an array for a typed column (an array or a mapped memoryview), else a list
+    """
+    typecode = column_typecode(column)
+    if typecode is None:
+        return list(column)
+    result = array(typecode)
+    result.frombytes(memoryview(column).cast("B"))
+    return result
+
+def take_column(column: Sequence, indexes: Sequence[int]) -> Sequence:
+    """
+    Returns the values of the column at the indexes (no None index), a typed column gives a typed column
+    gathered in one NumPy fancy indexing when NumPy is installed
+    """
+    typecode = column_typecode(column)
+    if typecode is not None:
+        if numpy is not None:
+            values = numpy.frombuffer(column, dtype = NUMPY_TYPES[typecode])[numpy.asarray(indexes, dtype = "int64")]
+            result = array(typecode)
+            result.frombytes(values.tobytes())
+            return result
+        return array(typecode, map(column.__getitem__, indexes))
+    return [column[index] for index in indexes]
+
+
+class ColumnStore:
+    """
+    The values of a relation stored column by column, the position of a column is the position of its field
+    """
+
+    read_only = False  # True for the columns of a mapped file: they are copied in memory before the first change
+
+    # ====================================================
+    # Initialisation Method
+    # ====================================================
+
+    def __init__(self, fields: List[Field], columns: List[Sequence] = None, length: int = 0):
+        """
+        Args:
+            fields: the fields of the relation, they give the type of each column
+            columns: the values of each column (optional)
+            length: the number of rows, needed only when there's no field
+        """
+        self.types = [column_type(field) for field in fields]
+        if columns is None:
+            self.columns = [new_column(type_) for type_ in self.types]
+        else:
+            self.columns = [new_column(type_, column) for type_, column in zip(self.types, columns)]
+            length = len(self.columns[0]) if self.columns else length
+        self.length = length
+
+    # ====================================================
+    # Main Methods
+    # ====================================================
+
+    def append(self, values: Sequence[object]) -> None:
+        """
+        Appends a row given by its values (one per column)
+        """
+        if self.read_only:
+            self.copy_on_write()
+        for position, value in enumerate(values):
+            column = self.columns[position]
+            if type(column) is list:
+                column.append(value)
+            elif type(value) is self.types[position]:
+                try:
+                    column.append(value)
+                except OverflowError:
+                    self.to_object_column(position).append(value)
+            else:
+                self.to_object_column(position).append(value)
+        self.length += 1
+
+    def extend(self, rows: List[Sequence[object]]) -> None:
+        """
+        Appends many rows at once, column by column
+        """
+        if not rows:
+            return
+        if self.read_only:
+            self.copy_on_write()
+        for position, values in enumerate(zip(*rows)):
+            column = self.columns[position]
+            if type(column) is not list:
+                type_ = self.types[position]
+                if all(type(value) is type_ for value in values):
+                    size = len(column)
+                    try:
+                        column.extend(values)
+                        continue
+                    except OverflowError:
+                        del column[size:]  # The values before the one too big were appended
+                column = self.to_object_column(position)
+            column.extend(values)
+        self.length += len(rows)
+
+    def add_column(self, field: Field) -> None:
+        """
+        Adds a column filled with None
+        """
+        self.types.append(None)
+        self.columns.append([None] * self.length)
+
+    def take(self, indexes: Sequence[int]) -> "ColumnStore":
+        """
+        Returns a new store with only the rows at the indexes (in that order)
+        """
+        store = ColumnStore.__new__(ColumnStore)
+        store.types = list(self.types)
+        store.columns = [take_column(column, indexes) for column in self.columns]
+        store.length = len(indexes)
+        return store
+
+    def row(self, index: int) -> tuple:
+        return tuple(column[index] for column in self.columns)
+
+    def rows(self) -> Iterator[tuple]:
+        if not self.columns:
+            return (() for _ in range(self.length))
+        return zip(*self.columns)
+
+    # ====================================================
+    # Helper Methods
+    # ====================================================
+
+    def copy_on_write(self) -> None:
+        """
+        Copies the read-only columns (memoryviews and mapped values) in memory, as arrays or lists
+        """
+        for position, column in enumerate(self.columns):
+            if type(column) not in (array, list):
+                self.columns[position] = copy_column(column)
+        self.read_only = False
+
+    def to_object_column(self, position: int) -> list:
+        self.types[position] = None
+        self.columns[position] = list(self.columns[position])
+        return self.columns[position]
+
+    def __len__(self):
+        return self.length
+
+
+# ====================================================
+# Row access
+# ====================================================
+
+class RowView:
+    """
+    A lightweight access to one row of a column-stored relation, it has the same attributes as a Tuple
+    and it's equal to any Tuple or RowView with the same values (with the same types)
+    """
+
+    __slots__ = ("relation", "index")
+
+    def __init__(self, relation: "Relation", index: int):
+        self.relation = relation
+        self.index = index
+
+    @property
+    def values(self) -> tuple:
+        return self.relation.store.row(self.index)
+
+    @property
+    def data(self) -> Mapping[str, object]:
+        return RowData(self.relation.positions(), self.values)
+
+    def evaluate_condition(self, condition) -> bool:
+        predicate = compile_condition(condition, {field.name: position for position, field in enumerate(self.relation.fields)})
+        return predicate(self.values)
+
+    def copy(self) -> Tuple:
+        return Tuple(self.relation, self.values)
+
+    def __eq__(self, other):
+        if not isinstance(other, (Tuple, RowView)):
+            return NotImplemented
+        return typed_key(self.values) == typed_key(other.values)
+
+    __hash__ = None
+
+    def __str__(self):
+        return f"Relation: {self.relation.name}, data: {row_dict(self.relation, self.values)}"
+
+
+class ColumnRows(Sequence):
+    """
+    The rows of a column-stored relation seen as a list of RowView (what Relation.tuples gives)
+    """
+
+    def __init__(self, relation: "Relation"):
+        self.relation = relation
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [RowView(self.relation, i) for i in range(len(self))[index]]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("row index out of range")
+        return RowView(self.relation, index)
+
+    def __len__(self):
+        return len(self.relation.store)
+
+    def __iter__(self):
+        relation = self.relation
+        return (RowView(relation, index) for index in range(len(relation.store)))
+
+    def append(self, row) -> None:
+        self.relation.add_tuple(row)
+
+    def extend(self, rows) -> None:
+        for row in rows:
+            self.relation.add_tuple(row)
+
+
+class TupleRows(Sequence):
+    """
+    The rows of a row-stored relation seen as a read-only list of Tuple (what Relation.tuples gives):
+    append and extend go through Relation.add_tuple, so the keys, the indexes, the version and the views follow
+    """
+
+    def __init__(self, relation: "Relation"):
+        self.relation = relation
+
+    def __getitem__(self, index):
+        return self.relation.rows[index]
+
+    def __len__(self):
+        return len(self.relation.rows)
+
+    def __iter__(self):
+        return iter(self.relation.rows)
+
+    def append(self, row) -> None:
+        self.relation.add_tuple(row)
+
+    def extend(self, rows) -> None:
+        for row in rows:
+            self.relation.add_tuple(row)
+
+    def copy(self) -> list:
+        return list(self.relation.rows)
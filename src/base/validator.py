@@ -0,0 +1,108 @@
+from typing import Callable, List
+from ..constraint.constraint import Constraint, NotNullConstraint, PositiveConstraint, RangeConstraint, StringLengthConstraint
+
+"""
+The goal of this module is to turn a Domain into a single function checking a value, built only once:
+    - the hashable allowed values are put in a frozenset
+    - the allowed types are put in a tuple for a single isinstance call
+    - the bounds of the RangeConstraint, PositiveConstraint and StringLengthConstraint are merged,
+      so a valid value is checked with one comparison instead of one call per constraint
+
+The result (and the error messages) are the same as the ones of Domain.is_valid
+"""
+
+def compile_validator(domain: "Domain") -> Callable[[object], bool]:
+    """
+    Returns a function that returns True for a valid value and raises ValueError otherwise
+
+    Example:
+        Input: Domain(allowed_types=[int], constraints=[RangeConstraint(1, 5), PositiveConstraint()])
+        Output: a function checking isinstance(value, (int,)) and 1 <= value <= 5 (when value is a number)
+    """
+    allowed_values = list(domain.allowed_values)
+    allowed_types = domain.allowed_types if isinstance(domain.allowed_types, (list, tuple, set)) else [domain.allowed_types]
+    allowed_types = tuple(allowed_types)
+    constraints = list(domain.constraints)
+
+    # Allowed values: a frozenset for the hashable ones, a list for the others
+    hashable_values, unhashable_values = [], []
+    for allowed_value in allowed_values:
+        try:
+            hash(allowed_value)
+            hashable_values.append(allowed_value)
+        except TypeError:
+            unhashable_values.append(allowed_value)
+    value_set = frozenset(hashable_values)
+    none_allowed = None in allowed_values
+    not_null = NotNullConstraint in constraints
+
+    # Constraints: merged bounds for the known ones, the other ones are called as usual
+    check_constraints = merge_constraints(constraints)
+
+    def validate(value: object) -> bool:
+        # For null values
+        if value is None:
+            if none_allowed:
+                return True
+            if not_null:
+                raise ValueError("Value cannot be null.")
+
+        # Check allowed values
+        try:
+            if value in value_set:
+                return True
+        except TypeError:
+            pass
+        if unhashable_values and value in unhashable_values:
+            return True
+
+        # Check allowed types, then the constraints
+        if isinstance(value, allowed_types):
+            check_constraints(value)
+            return True
+
+        raise ValueError(f"Invalid value: {value}.\nAllowed values are: {domain.allowed_values},\nAllowed types are: {domain.allowed_types}.")
+
+    return validate
+
+def merge_constraints(constraints: List[Constraint]) -> Callable[[object], None]:
+    """
+    Returns a function running every constraint on a value (raising the error of the first one that fails)
+
+    The bounds of the numeric constraints and of the string length constraints are merged:
+    when a value is within them, no constraint needs to be called
+    """
+    if not constraints:
+        return lambda value: None
+
+    numeric_min, numeric_max = float("-inf"), float("inf")
+    length_min, length_max = 0, float("inf")
+    others = []
+    for constraint in constraints:
+        if type(constraint) is RangeConstraint:
+            numeric_min, numeric_max = max(numeric_min, constraint.min), min(numeric_max, constraint.max)
+        elif type(constraint) is PositiveConstraint:
+            numeric_min = max(numeric_min, 0)
+            if constraint.max is not None:
+                numeric_max = min(numeric_max, constraint.max)
+        elif type(constraint) is StringLengthConstraint:
+            length_min, length_max = max(length_min, constraint.min), min(length_max, constraint.max)
+        else:
+            others.append(constraint)
+
+    def run_all(value):
+        # Same order as the domain, so the same error is raised
+        for constraint in constraints:
+            constraint.is_valid(value)
+
+    def check(value):
+        if isinstance(value, (int, float)):
+            if not (numeric_min <= value <= numeric_max):
+                return run_all(value)
+        elif isinstance(value, str):
+            if not (length_min <= len(value) <= length_max):
+                return run_all(value)
+        for constraint in others:
+            constraint.is_valid(value)
+
+    return check
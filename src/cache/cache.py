@@ -0,0 +1,224 @@
+import functools
+import inspect
+import sys
+from collections import OrderedDict
+from itertools import count
+from typing import Callable, Dict, Optional
+from ..condition.compiler import conjuncts, parse_condition
+from ..condition.vectorize import column_typecode
+
+"""
+Cache of the results of the operations of relations (select, project, the joins, ...)
+
+Every change of a relation (insert, insert_many, add_tuple, add_field, replacing its tuples) gives it a new version.
+The versions come from one counter shared by every relation, so a version is never given twice: a version identifies
+a relation in a given state. A result is cached under the key
+    (operation, arguments, version and name of each relation it reads)
+so a change of an input relation makes its old results unreachable (they're evicted later, as the least recently used).
+The condition of a selection is normalized: 'b == 2 and a==1' and 'a == 1 and b == 2' have the same key.
+The arguments that only change how a result is computed (workers, partition_size, max_groups, max_rows) aren't in the key.
+
+The cache keeps at most max_entries results and max_bytes bytes of rows (estimated), it evicts the least recently used
+results first. A cached result is shared by every call getting it: if it's changed (through the methods of Relation,
+including tuples.append), it's dropped from the cache. Changing relation.rows or relation.store directly bypasses the
+versions: the cache can't see it
+"""
+
+DEFAULT_MAX_ENTRIES = 128
+DEFAULT_MAX_BYTES = 256 << 20
+SIZE_SAMPLE = 100  # Rows read to estimate the size of the variable-size values
+EXECUTION_ARGUMENTS = {"workers", "partition_size", "max_groups", "max_rows"}
+
+VERSIONS = count(1)
+
+def next_version() -> int:
+    return next(VERSIONS)
+
+
+class ResultCache:
+    """
+    The results of operations by key, evicted in LRU order by number of entries and by size
+    """
+
+    # ====================================================
+    # Initialisation Method
+    # ====================================================
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            max_entries: the number of results kept
+            max_bytes: the approximate memory the rows of the results can take, a bigger result isn't cached
+
+        Raises:
+            ValueError: if a limit isn't positive
+        """
+        if max_entries < 1:
+            raise ValueError(f"The number of entries must be positive, got {max_entries}")
+        if max_bytes < 1:
+            raise ValueError(f"The size of the cache must be positive, got {max_bytes}")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict = OrderedDict()  # key -> (result, its version when it was cached, its size), the least recently used first
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ====================================================
+    # Main Methods
+    # ====================================================
+
+    def get(self, key: tuple) -> Optional["Relation"]:
+        """
+        Returns the result cached under the key (it becomes the most recently used), or None
+        """
+        entry = self.entries.get(key)
+        if entry is not None and entry[0].version != entry[1]:
+            # The result was changed after it was cached
+            self.remove(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: tuple, result: "Relation") -> None:
+        """
+        Caches a result, then evicts the least recently used results until the limits are respected
+        """
+        if key in self.entries:
+            self.remove(key)
+        size = estimate_size(result)
+        if size > self.max_bytes:
+            return
+        self.entries[key] = (result, result.version, size)
+        self.size += size
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            self.remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def remove(self, key: tuple) -> None:
+        _, _, size = self.entries.pop(key)
+        self.size -= size
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.size = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self.entries), "bytes": self.size, "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __str__(self):
+        return f"ResultCache({self.stats()})"
+
+# ====================================================
+# Keys
+# ====================================================
+
+def cached(operation: Callable) -> Callable:
+    """
+    Decorates an operation of Relation: when the relation has a cache, the result is looked up by its key
+    before being computed, and cached after
+    """
+    signature = inspect.signature(operation)
+
+    @functools.wraps(operation)
+    def cached_operation(relation: "Relation", *args, **kwargs):
+        cache = relation.cache
+        if cache is None:
+            return operation(relation, *args, **kwargs)
+        arguments = signature.bind(relation, *args, **kwargs)
+        arguments.apply_defaults()
+        key = cache_key(operation.__name__, relation, arguments.arguments)
+        if key is None:
+            return operation(relation, *args, **kwargs)
+        result = cache.get(key)
+        if result is None:
+            result = operation(relation, *args, **kwargs)
+            cache.put(key, result)
+        return result
+    return cached_operation
+
+def cache_key(operation: str, relation: "Relation", arguments: Dict[str, object]) -> Optional[tuple]:
+    """
+    Returns the key of an operation called on the relation with the arguments (by parameter name),
+    None if an argument can't be hashed (the result isn't cached)
+    """
+    relation_type = type(relation)
+    key = [operation]
+    for name, value in arguments.items():
+        if name in EXECUTION_ARGUMENTS:
+            continue
+        if name == "condition" and operation == "select" and isinstance(value, str):
+            value = normalize_condition(value, [field.name for field in relation.fields])
+        key.append((name, normalize_argument(value, relation_type)))
+    key = tuple(key)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+def normalize_argument(value: object, relation_type: type) -> object:
+    """
+    A relation is replaced by its version and its name, the lists by tuples
+    """
+    if isinstance(value, relation_type):
+        return ("relation", value.version, value.name)
+    if isinstance(value, (list, tuple)):
+        return tuple(normalize_argument(item, relation_type) for item in value)
+    if isinstance(value, dict):
+        return ("dict", tuple((item, normalize_argument(mapped, relation_type)) for item, mapped in value.items()))
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+def normalize_condition(condition: str, field_names) -> str:
+    """
+    Returns the source of the parsed condition with its top-level "and" parts sorted and without duplicates,
+    or the condition itself if it can't be parsed (the operation raises the error)
+
+    Example:
+        Input: 'name=="Pupuce" and id <= 3', ["id", "name"]
+        Output: "id <= 3 and name == 'Pupuce'"
+    """
+    try:
+        expression = parse_condition(condition, field_names)
+    except ValueError:
+        return condition
+    return " and ".join(sorted({part.to_source() for part in conjuncts(expression)}))
+
+# ====================================================
+# Sizes
+# ====================================================
+
+def estimate_size(relation: "Relation") -> int:
+    """
+    Returns the approximate memory taken by the rows of a relation in bytes: exact for the typed columns,
+    estimated from a sample of rows for the other values
+    """
+    length = len(relation)
+    if length == 0:
+        return 0
+    sample = range(0, length, max(1, length // SIZE_SAMPLE))
+    if relation.store is not None:
+        size = 0
+        for column in relation.store.columns:
+            if column_typecode(column) is not None:
+                size += len(column) * column.itemsize
+            else:
+                # A reference in the list and the value
+                size += length * (8 + sum(sys.getsizeof(column[index]) for index in sample) // len(sample))
+        return size
+    rows = relation.rows
+    row_sizes = (
+        8 + sys.getsizeof(rows[index]) + sys.getsizeof(rows[index].values) + sum(map(sys.getsizeof, rows[index].values))
+        for index in sample
+    )
+    return length * (sum(row_sizes) // len(sample))
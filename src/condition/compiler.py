@@ -0,0 +1,409 @@
+import ast
+import keyword
+import operator
+import re
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List
+
+"""
+The goal of this module is to parse a condition like
+    (id == "20" or name == "Pupuce") and name == "Salohy"
+only once into a small expression tree, and then to turn that tree into a closure
+that reads the field values of a row directly, e.g:
+    predicate = compile_condition(condition, {"id": 0, "name": 1})
+    predicate(("20", "Salohy"))  # True
+
+The evaluation follows the rules of condition.simplify_and_evaluate:
+    - two values of different types are never equal, different nor ordered (1 == "1" is False)
+    - a name that is not a field is read as a plain string (name == Pupuce is name == "Pupuce")
+"""
+
+# ====================================================
+# Expression tree
+# ====================================================
+
+class Expression(ABC):
+    """
+    A node of a parsed condition
+    """
+
+    def fields(self) -> set:
+        """
+        Returns the name of every field this expression reads
+        """
+        return set()
+
+    def rename(self, mapping: Dict[str, str]) -> "Expression":
+        """
+        Returns a copy of this expression where the fields are renamed with the mapping (old name -> new name)
+        """
+        return self
+
+    @abstractmethod
+    def evaluator(self, positions: Dict[str, object]) -> Callable[[object], object]:
+        """
+        Returns a closure that computes the value of this expression from a row
+
+        Args:
+            positions: maps each field name to its key in the row (a position for a tuple, a name for a dict)
+        """
+        pass
+
+    def predicate(self, positions: Dict[str, object]) -> Callable[[object], bool]:
+        evaluate = self.evaluator(positions)
+        return lambda values: bool(evaluate(values))
+
+    @abstractmethod
+    def to_source(self) -> str:
+        pass
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_source() == other.to_source()
+
+    def __hash__(self):
+        return hash(self.to_source())
+
+    def __repr__(self):
+        return self.to_source()
+
+
+class FieldReference(Expression):
+    def __init__(self, name: str):
+        self.name = name
+
+    def fields(self) -> set:
+        return {self.name}
+
+    def rename(self, mapping: Dict[str, str]) -> "Expression":
+        return FieldReference(mapping.get(self.name, self.name))
+
+    def evaluator(self, positions: Dict[str, object]) -> Callable[[object], object]:
+        if self.name not in positions:
+            raise ValueError(f"Column {self.name} doesn't exist")
+        return operator.itemgetter(positions[self.name])
+
+    def to_source(self) -> str:
+        return self.name
+
+
+class Literal(Expression):
+    def __init__(self, value: object):
+        self.value = value
+
+    def evaluator(self, positions: Dict[str, object]) -> Callable[[object], object]:
+        value = self.value
+        return lambda values: value
+
+    def to_source(self) -> str:
+        return repr(self.value)
+
+
+class Comparison(Expression):
+    """
+    A binary comparison: ==, !=, <, <=, >, >=, in, not in, is, is not
+    """
+
+    def __init__(self, operator: str, left: Expression, right: Expression):
+        if operator not in COMPARISONS and operator not in MEMBERSHIPS and operator not in IDENTITIES:
+            raise ValueError(f"Unsupported operator: {operator}")
+        self.operator = operator
+        self.left = left
+        self.right = right
+
+    def fields(self) -> set:
+        return self.left.fields() | self.right.fields()
+
+    def rename(self, mapping: Dict[str, str]) -> "Expression":
+        return Comparison(self.operator, self.left.rename(mapping), self.right.rename(mapping))
+
+    def flipped(self) -> "Comparison":
+        """
+        Returns the same comparison with its operands swapped (a < b becomes b > a)
+        """
+        if self.operator not in FLIPPED:
+            raise ValueError(f"Cannot flip the operator {self.operator}")
+        return Comparison(FLIPPED[self.operator], self.right, self.left)
+
+    def evaluator(self, positions: Dict[str, object]) -> Callable[[object], bool]:
+        return self.predicate(positions)
+
+    def predicate(self, positions: Dict[str, object]) -> Callable[[object], bool]:
+        if self.operator in MEMBERSHIPS:
+            contains = MEMBERSHIPS[self.operator]
+            left = self.left.evaluator(positions)
+            right = self.right.evaluator(positions)
+            return lambda values: contains(left(values), right(values))
+        if self.operator in IDENTITIES:
+            # Like Python: "x is not None" is True for a value of any other type
+            identical = IDENTITIES[self.operator]
+            left = self.left.evaluator(positions)
+            right = self.right.evaluator(positions)
+            return lambda values: identical(left(values), right(values))
+
+        compare = COMPARISONS[self.operator]
+
+        # Specialised closures for the most common shape: field <operator> literal
+        if isinstance(self.left, FieldReference) and isinstance(self.right, Literal):
+            return _field_literal_predicate(compare, self.left.evaluator(positions), self.right.value)
+        if isinstance(self.left, Literal) and isinstance(self.right, FieldReference):
+            return _field_literal_predicate(COMPARISONS[FLIPPED[self.operator]], self.right.evaluator(positions), self.left.value)
+
+        left = self.left.evaluator(positions)
+        right = self.right.evaluator(positions)
+        return lambda values: compare_values(compare, left(values), right(values))
+
+    def to_source(self) -> str:
+        return f"{_operand_source(self.left)} {self.operator} {_operand_source(self.right)}"
+
+
+class And(Expression):
+    def __init__(self, *operands: Expression):
+        self.operands = operands
+
+    def fields(self) -> set:
+        return set().union(*(operand.fields() for operand in self.operands))
+
+    def rename(self, mapping: Dict[str, str]) -> "Expression":
+        return And(*(operand.rename(mapping) for operand in self.operands))
+
+    def evaluator(self, positions: Dict[str, object]) -> Callable[[object], bool]:
+        return self.predicate(positions)
+
+    def predicate(self, positions: Dict[str, object]) -> Callable[[object], bool]:
+        predicates = [operand.predicate(positions) for operand in self.operands]
+        if len(predicates) == 2:
+            first, second = predicates
+            return lambda values: first(values) and second(values)
+
+        def evaluate(values):
+            for predicate in predicates:
+                if not predicate(values):
+                    return False
+            return True
+        return evaluate
+
+    def to_source(self) -> str:
+        return " and ".join(_operand_source(operand) for operand in self.operands)
+
+
+class Or(Expression):
+    def __init__(self, *operands: Expression):
+        self.operands = operands
+
+    def fields(self) -> set:
+        return set().union(*(operand.fields() for operand in self.operands))
+
+    def rename(self, mapping: Dict[str, str]) -> "Expression":
+        return Or(*(operand.rename(mapping) for operand in self.operands))
+
+    def evaluator(self, positions: Dict[str, object]) -> Callable[[object], bool]:
+        return self.predicate(positions)
+
+    def predicate(self, positions: Dict[str, object]) -> Callable[[object], bool]:
+        predicates = [operand.predicate(positions) for operand in self.operands]
+        if len(predicates) == 2:
+            first, second = predicates
+            return lambda values: first(values) or second(values)
+
+        def evaluate(values):
+            for predicate in predicates:
+                if predicate(values):
+                    return True
+            return False
+        return evaluate
+
+    def to_source(self) -> str:
+        return " or ".join(_operand_source(operand) for operand in self.operands)
+
+
+class Not(Expression):
+    def __init__(self, operand: Expression):
+        self.operand = operand
+
+    def fields(self) -> set:
+        return self.operand.fields()
+
+    def rename(self, mapping: Dict[str, str]) -> "Expression":
+        return Not(self.operand.rename(mapping))
+
+    def evaluator(self, positions: Dict[str, object]) -> Callable[[object], bool]:
+        return self.predicate(positions)
+
+    def predicate(self, positions: Dict[str, object]) -> Callable[[object], bool]:
+        predicate = self.operand.predicate(positions)
+        return lambda values: not predicate(values)
+
+    def to_source(self) -> str:
+        return f"not {_operand_source(self.operand)}"
+
+
+# ====================================================
+# Comparison rules
+# ====================================================
+
+COMPARISONS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+FLIPPED = {"==": "==", "!=": "!=", "<": ">", "<=": ">=", ">": "<", ">=": "<=", "is": "is", "is not": "is not"}
+
+def contains(item, container) -> bool:
+    try:
+        return item in container
+    except TypeError:
+        return False
+
+def not_contains(item, container) -> bool:
+    try:
+        return item not in container
+    except TypeError:
+        return False
+
+MEMBERSHIPS = {"in": contains, "not in": not_contains}
+
+IDENTITIES = {"is": operator.is_, "is not": operator.is_not}
+
+def compare_values(compare, left, right) -> bool:
+    """
+    Compares two values, values of different types (or that can't be ordered like None) never match
+    """
+    if type(left) is not type(right):
+        return False
+    try:
+        return compare(left, right)
+    except TypeError:
+        return False
+
+def _field_literal_predicate(compare, get_value, literal) -> Callable[[object], bool]:
+    literal_type = type(literal)
+
+    def evaluate(values):
+        value = get_value(values)
+        if type(value) is not literal_type:
+            return False
+        try:
+            return compare(value, literal)
+        except TypeError:
+            return False
+    return evaluate
+
+def _operand_source(expression: Expression) -> str:
+    if isinstance(expression, (And, Or)):
+        return f"({expression.to_source()})"
+    return expression.to_source()
+
+
+# ====================================================
+# Parsing
+# ====================================================
+
+AST_COMPARISONS = {
+    ast.Eq: "==", ast.NotEq: "!=", ast.Lt: "<", ast.LtE: "<=", ast.Gt: ">", ast.GtE: ">=",
+    ast.In: "in", ast.NotIn: "not in", ast.Is: "is", ast.IsNot: "is not",
+}
+
+STRING_LITERAL_PATTERN = re.compile(r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')')
+IDENTIFIER_PATTERN = re.compile(r'^[A-Za-z_]\w*(\.[A-Za-z_]\w*)*$')
+
+def parse_condition(condition: str, field_names: Iterable[str]) -> Expression:
+    """
+    Parses a condition once into an expression tree
+
+    Example:
+        Input: 'id <= 3 and name == "Pupuce"', ["id", "name"]
+        Output: And(Comparison("<=", FieldReference("id"), Literal(3)), Comparison("==", FieldReference("name"), Literal("Pupuce")))
+
+    Raises:
+        ValueError: syntax error or unsupported expression
+    """
+    field_names = set(field_names)
+
+    # Field names that Python can't parse (e.g: "id|id", "class") are swapped with placeholders outside string literals
+    placeholders = {}
+    unparsable = sorted((name for name in field_names if not _is_identifier(name)), key=len, reverse=True)
+    source = condition
+    if unparsable:
+        parts = STRING_LITERAL_PATTERN.split(condition)
+        for i in range(0, len(parts), 2):
+            for name in unparsable:
+                placeholder = placeholders.setdefault(name, f"__field_{len(placeholders)}")
+                parts[i] = parts[i].replace(name, placeholder)
+        source = "".join(parts)
+    names = {placeholder: name for name, placeholder in placeholders.items()}
+
+    try:
+        tree = ast.parse(source.strip(), mode="eval")
+    except SyntaxError:
+        raise ValueError(f"Failed to evaluate {condition}")
+
+    return _convert(tree.body, field_names, names, condition)
+
+def compile_condition(condition, positions: Dict[str, object]) -> Callable[[object], bool]:
+    """
+    Compiles a condition (a string or an already parsed Expression) into a predicate
+
+    Args:
+        condition: e.g: 'id <= 3'
+        positions: maps each field name to its key in the rows the predicate will receive
+
+    Returns:
+        A function taking the values of a row and returning a bool
+    """
+    if not isinstance(condition, Expression):
+        condition = parse_condition(condition, positions.keys())
+    return condition.predicate(positions)
+
+def conjuncts(expression: Expression) -> List[Expression]:
+    """
+    Splits an expression on its top-level "and": a and (b and c) gives [a, b, c]
+    """
+    if isinstance(expression, And):
+        return [part for operand in expression.operands for part in conjuncts(operand)]
+    return [expression]
+
+def _is_identifier(name: str) -> bool:
+    return IDENTIFIER_PATTERN.match(name) is not None and not any(keyword.iskeyword(part) for part in name.split("."))
+
+def _dotted_name(node) -> str:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        prefix = _dotted_name(node.value)
+        return None if prefix is None else f"{prefix}.{node.attr}"
+    return None
+
+def _convert(node, field_names: set, placeholders: Dict[str, str], condition: str) -> Expression:
+    if isinstance(node, ast.BoolOp):
+        operands = [_convert(value, field_names, placeholders, condition) for value in node.values]
+        return And(*operands) if isinstance(node.op, ast.And) else Or(*operands)
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return Not(_convert(node.operand, field_names, placeholders, condition))
+
+    if isinstance(node, ast.Compare):
+        # Chained comparisons (1 < id <= 3) become a conjunction of simple comparisons
+        operands = [_convert(operand, field_names, placeholders, condition) for operand in [node.left] + node.comparators]
+        if any(type(op) not in AST_COMPARISONS for op in node.ops):
+            raise ValueError(f"Failed to evaluate {condition}")
+        comparisons = [
+            Comparison(AST_COMPARISONS[type(op)], operands[i], operands[i+1])
+            for i, op in enumerate(node.ops)
+        ]
+        return comparisons[0] if len(comparisons) == 1 else And(*comparisons)
+
+    name = _dotted_name(node)
+    if name is not None:
+        name = placeholders.get(name, name)
+        if name in field_names:
+            return FieldReference(name)
+        return Literal(name)  # Same as safe_eval: an unknown name is read as a string
+
+    try:
+        return Literal(ast.literal_eval(node))
+    except ValueError:
+        raise ValueError(f"Failed to evaluate {condition}")
@@ -0,0 +1,191 @@
+from array import array
+from typing import Callable, Dict, List, Sequence
+from .compiler import COMPARISONS, FLIPPED, And, Comparison, Expression, FieldReference, Literal, Not, Or, compare_values
+
+try:
+    import numpy
+except ImportError:  # NumPy is optional: without it the masks are lists of bool
+    numpy = None
+
+"""
+The goal of this module is to evaluate a condition on many rows at once, given column by column:
+    mask = compile_mask(condition, {"id": 0, "age": 1})
+    mask([array("q", [1, 5]), array("q", [20, 10])], 2)  # [True, False] for 'id <= 3 and age > 18'
+
+Each comparison between a field and a value (or two fields) is computed on the whole column:
+    - with NumPy on the typed columns of a ColumnStore (array("q") of int, array("d") of float, or the same on a mapped file)
+    - with one list comprehension on the other columns
+and the masks are combined for "and", "or" and "not".
+The rules are the ones of the compiler (values of different types never match), anything else
+(e.g: "in") is evaluated row by row on the batch
+"""
+
+NUMPY_TYPES = {"q": "int64", "d": "float64"}
+ARRAY_TYPES = {"q": int, "d": float}
+
+# ====================================================
+# Compilation
+# ====================================================
+
+def compile_mask(expression: Expression, positions: Dict[str, int]) -> Callable[[Sequence[Sequence], int], Sequence[bool]]:
+    """
+    Compiles a parsed condition into a function taking the columns of a batch of rows (and their number of rows)
+    and returning a mask: one bool per row (a NumPy array of bool when NumPy is installed)
+
+    Raises:
+        ValueError: if a field doesn't exist
+    """
+    if isinstance(expression, (And, Or)):
+        masks = [compile_mask(operand, positions) for operand in expression.operands]
+        combine = and_masks if isinstance(expression, And) else or_masks
+
+        def evaluate(columns, length):
+            result = masks[0](columns, length)
+            for mask in masks[1:]:
+                result = combine(result, mask(columns, length))
+            return result
+        return evaluate
+
+    if isinstance(expression, Not):
+        mask = compile_mask(expression.operand, positions)
+        return lambda columns, length: not_mask(mask(columns, length))
+
+    if isinstance(expression, Comparison) and expression.operator in COMPARISONS:
+        left, right, operator = expression.left, expression.right, expression.operator
+        if isinstance(left, Literal) and isinstance(right, FieldReference):
+            left, right, operator = right, left, FLIPPED[operator]
+
+        if isinstance(left, FieldReference) and isinstance(right, Literal):
+            position = field_position(left.name, positions)
+            literal = right.value
+            return lambda columns, length: compare_column(columns[position], operator, literal, length)
+
+        if isinstance(left, FieldReference) and isinstance(right, FieldReference):
+            left_position = field_position(left.name, positions)
+            right_position = field_position(right.name, positions)
+            return lambda columns, length: compare_columns(columns[left_position], columns[right_position], operator, length)
+
+        if isinstance(left, Literal) and isinstance(right, Literal):
+            value = compare_values(COMPARISONS[operator], left.value, right.value)
+            return lambda columns, length: full_mask(value, length)
+
+    # Anything else is evaluated one row at a time
+    predicate = expression.predicate(positions)
+    return lambda columns, length: to_mask([predicate(values) for values in batch_rows(columns, length)])
+
+def vectorizable(expression: Expression) -> bool:
+    """
+    Returns True if every part of the condition is evaluated on whole columns (nothing row by row)
+    """
+    if isinstance(expression, (And, Or)):
+        return all(vectorizable(operand) for operand in expression.operands)
+    if isinstance(expression, Not):
+        return vectorizable(expression.operand)
+    return (
+        isinstance(expression, Comparison) and expression.operator in COMPARISONS
+        and isinstance(expression.left, (FieldReference, Literal)) and isinstance(expression.right, (FieldReference, Literal))
+    )
+
+# ====================================================
+# Column comparisons
+# ====================================================
+
+def compare_column(column: Sequence, operator: str, literal: object, length: int) -> Sequence[bool]:
+    """
+    Compares every value of a column to a literal
+    """
+    compare = COMPARISONS[operator]
+    literal_type = type(literal)
+
+    typecode = column_typecode(column)
+    if typecode is not None:
+        # Every value of a typed column has the type of the column
+        if ARRAY_TYPES[typecode] is not literal_type:
+            return full_mask(False, length)
+        if numpy is not None:
+            return compare(numpy.frombuffer(column, dtype = NUMPY_TYPES[typecode]), literal)
+        return [compare(value, literal) for value in column]
+
+    try:
+        return to_mask([type(value) is literal_type and compare(value, literal) for value in column])
+    except TypeError:
+        # Values that can't be ordered (e.g: None < None)
+        return to_mask([compare_values(compare, value, literal) for value in column])
+
+def compare_columns(left: Sequence, right: Sequence, operator: str, length: int) -> Sequence[bool]:
+    """
+    Compares the values of two columns row by row
+    """
+    compare = COMPARISONS[operator]
+    left_typecode, right_typecode = column_typecode(left), column_typecode(right)
+    if left_typecode is not None and right_typecode is not None:
+        if left_typecode != right_typecode:
+            return full_mask(False, length)
+        if numpy is not None:
+            return compare(
+                numpy.frombuffer(left, dtype = NUMPY_TYPES[left_typecode]),
+                numpy.frombuffer(right, dtype = NUMPY_TYPES[right_typecode])
+            )
+    return to_mask([compare_values(compare, left_value, right_value) for left_value, right_value in zip(left, right)])
+
+# ====================================================
+# Masks
+# ====================================================
+
+def to_mask(values: List[object]) -> Sequence[bool]:
+    if numpy is not None:
+        return numpy.array(values, dtype = bool)
+    return [bool(value) for value in values]
+
+def full_mask(value: bool, length: int) -> Sequence[bool]:
+    if numpy is not None:
+        return numpy.full(length, bool(value))
+    return [bool(value)] * length
+
+def and_masks(left: Sequence[bool], right: Sequence[bool]) -> Sequence[bool]:
+    if numpy is not None:
+        return left & right
+    return [left_value and right_value for left_value, right_value in zip(left, right)]
+
+def or_masks(left: Sequence[bool], right: Sequence[bool]) -> Sequence[bool]:
+    if numpy is not None:
+        return left | right
+    return [left_value or right_value for left_value, right_value in zip(left, right)]
+
+def not_mask(mask: Sequence[bool]) -> Sequence[bool]:
+    if numpy is not None:
+        return ~mask
+    return [not value for value in mask]
+
+def mask_indexes(mask: Sequence[bool]) -> List[int]:
+    """
+    Returns the positions of the rows where the mask is True
+    """
+    if numpy is not None:
+        return numpy.flatnonzero(mask).tolist()
+    return [index for index, value in enumerate(mask) if value]
+
+# ====================================================
+# Helper Functions
+# ====================================================
+
+def column_typecode(column: Sequence) -> str:
+    """
+    Returns "q" (int) or "d" (float) for a typed column: an array, or a memoryview on a mapped file (see persistence/mapped.py).
+    Returns None for any other column
+    """
+    if type(column) is array:
+        return column.typecode
+    if type(column) is memoryview and column.format in NUMPY_TYPES:
+        return column.format
+    return None
+
+def field_position(name: str, positions: Dict[str, int]) -> int:
+    if name not in positions:
+        raise ValueError(f"Column {name} doesn't exist")
+    return positions[name]
+
+def batch_rows(columns: Sequence[Sequence], length: int):
+    if not columns:
+        return (() for _ in range(length))
+    return zip(*columns)
@@ -36,7 +36,9 @@ class Constraint(ABC):
 class NotNullConstraint(Constraint):
     """ 
     This constraint makes sure that any passed object must be not null
+    It can be used as a class (constraints=[NotNullConstraint]) or as an instance (constraints=[NotNullConstraint()])
     """
+    @staticmethod
     def is_valid(object):
         if object is None:
             raise ValueError("Value cannot be null.")
@@ -0,0 +1,230 @@
+from bisect import bisect_left, bisect_right
+from typing import Iterator, List, Tuple
+from ..base.index import is_ordered
+from ..condition.compiler import COMPARISONS, Comparison, Expression, FieldReference, conjuncts
+
+"""
+Join algorithms working on the join keys of two relations
+
+Each algorithm receives one key per row for each side (a tuple of the values of the join fields
+for the hash join, the value of the join field for the merge join) and yields the pairs of matching row indexes (left_index, right_index).
+The relation is responsible to build the resulting rows from those pairs.
+
+Like the selection, two values of different types never match (1 and "1", 1 and 1.0, 1 and True)
+"""
+
+# ====================================================
+# Hash join
+# ====================================================
+
+def hash_join(left_keys: List[tuple], right_keys: List[tuple]) -> Iterator[Tuple[int, int]]:
+    """
+    Build/probe equality join: a hash table is built on the right keys and probed with every left key
+
+    The pairs are yielded in the same order as a cartesian product followed by a selection would give them:
+    by left index, then by right index
+
+    Example:
+        Input: [(1,), (2,)], [(2,), (1,), (1,)]
+        Output: (0, 1), (0, 2), (1, 0)
+    """
+    # Step 1: build
+    table = HashTable(right_keys)
+
+    # Step 2: probe
+    for left_index, key in enumerate(left_keys):
+        for right_index in table.probe(key):
+            yield left_index, right_index
+
+class HashTable:
+    """
+    The build side of a hash join: built once on the right keys, then probed with one left key at a time
+    (so the left rows can come from a stream)
+    """
+
+    def __init__(self, right_keys: List[tuple]):
+        self.right_keys = right_keys
+        self.table = {}
+        self.unhashable = []  # Keys like lists can't be hashed, they are compared one by one
+        for right_index, key in enumerate(right_keys):
+            try:
+                bucket = self.table.get(key)
+            except TypeError:
+                self.unhashable.append(right_index)
+                continue
+            if bucket is None:
+                self.table[key] = [right_index]
+            else:
+                bucket.append(right_index)
+
+    def probe(self, key: tuple) -> List[int]:
+        """
+        Returns the indexes of the right keys matching the key, in increasing order
+        """
+        right_keys = self.right_keys
+        try:
+            candidates = self.table.get(key, ())
+        except TypeError:
+            candidates = [right_index for right_index, right_key in enumerate(right_keys) if right_key == key]
+        else:
+            if self.unhashable:
+                candidates = sorted([*candidates, *(right_index for right_index in self.unhashable if right_keys[right_index] == key)])
+        return [right_index for right_index in candidates if same_types(key, right_keys[right_index])]
+
+# ====================================================
+# Sort-merge join
+# ====================================================
+
+def merge_join(left_keys: List[object], right_keys: List[object], operator: str) -> Iterator[Tuple[int, int]]:
+    """
+    Sort-merge join on a single value per row: yields the pairs where left_key <operator> right_key
+
+    Both sides are sorted (nearly free when they already come sorted), then:
+        - "==": the runs of equal values are merged
+        - "<", "<=": a left value matches the end of the sorted right side
+        - ">", ">=": a left value matches the beginning of the sorted right side
+
+    The pairs are yielded in the order of the sorted left values (not in the order of a cartesian product)
+
+    Example:
+        Input: [3, 1], [2, 4], "<"
+        Output: (1, 0), (1, 1), (0, 1)
+
+    Raises:
+        ValueError: if the operator isn't supported
+    """
+    if operator not in ("==", "<", "<=", ">", ">="):
+        raise ValueError(f"Unsupported operator for a merge join: {operator}")
+
+    # Values of different types never match: each type is joined on its own
+    left_groups = group_by_type(left_keys)
+    right_groups = group_by_type(right_keys)
+
+    for type_, left_indexes in left_groups.items():
+        right_indexes = right_groups.get(type_)
+        if right_indexes is None:
+            continue
+
+        if is_ordered(type_, left_keys[left_indexes[0]]):
+            # The pairs of a group are computed before being yielded: a comparison failing half way
+            # (e.g: the tuples (1, "a") and (1, 2)) falls back to the unordered way without duplicate pairs
+            try:
+                left_indexes.sort(key=left_keys.__getitem__)
+                right_indexes.sort(key=right_keys.__getitem__)
+                if operator == "==":
+                    pairs = list(merge_equal(left_keys, right_keys, left_indexes, right_indexes))
+                else:
+                    pairs = list(merge_range(left_keys, right_keys, left_indexes, right_indexes, operator))
+                yield from pairs
+                continue
+            except TypeError:
+                pass
+
+        yield from unordered_join(left_keys, right_keys, left_indexes, right_indexes, operator)
+
+def unordered_join(left_keys, right_keys, left_indexes: List[int], right_indexes: List[int], operator: str) -> Iterator[Tuple[int, int]]:
+    """
+    Joins a group of values that can't be sorted: an equality with a hash step, a range by comparing every pair
+    (values that can't be compared never match, so None never satisfies a range)
+    """
+    if operator == "==":
+        for left_index, right_index in hash_join([(left_keys[i],) for i in left_indexes], [(right_keys[i],) for i in right_indexes]):
+            yield left_indexes[left_index], right_indexes[right_index]
+        return
+    if left_keys[left_indexes[0]] is None:
+        return
+    compare = COMPARISONS[operator]
+    for left_index in left_indexes:
+        for right_index in right_indexes:
+            try:
+                matches = compare(left_keys[left_index], right_keys[right_index])
+            except TypeError:
+                continue
+            if matches:
+                yield left_index, right_index
+
+def merge_equal(left_keys, right_keys, left_indexes: List[int], right_indexes: List[int]) -> Iterator[Tuple[int, int]]:
+    i, j = 0, 0
+    while i < len(left_indexes) and j < len(right_indexes):
+        left_value = left_keys[left_indexes[i]]
+        right_value = right_keys[right_indexes[j]]
+        if left_value < right_value:
+            i += 1
+        elif right_value < left_value:
+            j += 1
+        else:
+            # Both runs of equal values are crossed
+            run_end = j
+            while run_end < len(right_indexes) and right_keys[right_indexes[run_end]] == left_value:
+                run_end += 1
+            while i < len(left_indexes) and left_keys[left_indexes[i]] == left_value:
+                for k in range(j, run_end):
+                    yield left_indexes[i], right_indexes[k]
+                i += 1
+            j = run_end
+
+def merge_range(left_keys, right_keys, left_indexes: List[int], right_indexes: List[int], operator: str) -> Iterator[Tuple[int, int]]:
+    right_values = [right_keys[index] for index in right_indexes]
+    count = len(right_values)
+    for left_index in left_indexes:
+        value = left_keys[left_index]
+        if operator == "<":
+            matches = range(bisect_right(right_values, value), count)
+        elif operator == "<=":
+            matches = range(bisect_left(right_values, value), count)
+        elif operator == ">":
+            matches = range(0, bisect_left(right_values, value))
+        else:
+            matches = range(0, bisect_right(right_values, value))
+
+        for k in matches:
+            yield left_index, right_indexes[k]
+
+# ====================================================
+# Condition analysis
+# ====================================================
+
+def split_join_condition(expression: Expression, left_fields: set, right_fields: set):
+    """
+    Splits a join condition on its top-level "and" into:
+        - equalities: left_field == right_field
+        - ranges: left_field <operator> right_field with <, <=, > or >=
+        - residuals: anything else, to be checked on the joined rows
+
+    The equalities and ranges are oriented with the field of the left relation first
+
+    Example:
+        Input: "B.y >= A.x and A.id == B.id and A.name != B.name"
+        Output: [A.id == B.id], [A.x <= B.y], [A.name != B.name]
+    """
+    equalities, ranges, residuals = [], [], []
+    for part in conjuncts(expression):
+        if (isinstance(part, Comparison) and part.operator in ("==", "<", "<=", ">", ">=")
+            and isinstance(part.left, FieldReference) and isinstance(part.right, FieldReference)):
+            if part.left.name in right_fields and part.right.name in left_fields:
+                part = part.flipped()
+            if part.left.name in left_fields and part.right.name in right_fields:
+                (equalities if part.operator == "==" else ranges).append(part)
+                continue
+        residuals.append(part)
+    return equalities, ranges, residuals
+
+# ====================================================
+# Helper Functions
+# ====================================================
+
+def group_by_type(keys: List[object]) -> dict:
+    groups = {}
+    for index, key in enumerate(keys):
+        group = groups.get(type(key))
+        if group is None:
+            groups[type(key)] = [index]
+        else:
+            group.append(index)
+    return groups
+
+def same_types(left_key: tuple, right_key: tuple) -> bool:
+    for left, right in zip(left_key, right_key):
+        if type(left) is not type(right):
+            return False
+    return True
@@ -0,0 +1,169 @@
+import heapq
+import multiprocessing
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence, Tuple
+from ..base.storage import copy_column
+from ..condition.compiler import Expression
+from ..condition.vectorize import batch_rows, compile_mask, mask_indexes, numpy, vectorizable
+from ..join.join import HashTable, hash_join
+
+"""
+Parallel evaluation of a selection and of a hash join over partitions of the rows, in a pool of processes (concurrent.futures)
+
+The rows are split in partitions of partition_size consecutive rows. Each worker receives only the columns
+the condition reads for its partition (not the whole relation) and gives back the positions of the matching rows, so little comes back to the main process.
+The positions are put back in order, then the rows are taken once like in a sequential selection.
+
+The hash join splits the join keys of both sides in partitions by their hash (equal keys are in the same partition),
+then each pair of partitions is joined by a worker (build then probe, see join/join.py). A worker receives the positions
+of the rows of its partitions: on Linux the workers are forked and read the keys from the memory of the main
+process, elsewhere (the default start method of the platform) they receive the keys of their partitions only. The pairs are put back in the order of the sequential join.
+
+On Windows and macOS the workers start a new interpreter (fork isn't safe on macOS): the script creating the pool has to be guarded by
+    if __name__ == "__main__":
+"""
+
+PARTITION_SIZE = 100_000
+
+def parallel_select_indexes(relation: "Relation", expression: Expression, workers: int, partition_size: int = PARTITION_SIZE) -> List[int]:
+    """
+    Returns the positions of the rows of the relation matching the condition, in increasing order
+
+    Raises:
+        ValueError: if workers or partition_size isn't positive
+    """
+    if workers < 1:
+        raise ValueError(f"The number of workers must be positive, got {workers}")
+    if partition_size < 1:
+        raise ValueError(f"The partition size must be positive, got {partition_size}")
+
+    # Only the columns of the fields read by the condition are sent
+    positions = relation.positions()
+    needed = sorted({positions[name] for name in expression.fields() if name in positions})
+    columns = [relation.column_values(position) for position in needed]
+    partition_positions = {name: needed.index(position) for name, position in positions.items() if position in needed}
+
+    length = len(relation)
+    starts = range(0, length, partition_size)
+    with ProcessPoolExecutor(max_workers = workers) as pool:
+        results = pool.map(
+            select_partition,
+            [expression] * len(starts),
+            [partition_positions] * len(starts),
+            ([partition_column(column, start, start + partition_size) for column in columns] for start in starts),
+            [min(partition_size, length - start) for start in starts],
+        )
+        indexes = []
+        for start, partition_indexes in zip(starts, results):
+            indexes.extend(start + index for index in partition_indexes)
+    return indexes
+
+def select_partition(expression: Expression, positions: Dict[str, int], columns: List[Sequence], length: int) -> List[int]:
+    """
+    Runs in a worker: the positions (in the partition) of the rows matching the condition
+    """
+    if vectorizable(expression):
+        return mask_indexes(compile_mask(expression, positions)(columns, length))
+    predicate = expression.predicate(positions)
+    return [index for index, values in enumerate(batch_rows(columns, length)) if predicate(values)]
+
+def partition_column(column: Sequence, start: int, end: int) -> Sequence:
+    """
+    The values of a partition, in a form that can be sent to a worker (a column mapped from a file is copied)
+    """
+    values = column[start:end]
+    return copy_column(values) if type(values) is memoryview else values
+
+# ====================================================
+# Hash join
+# ====================================================
+
+SHARED_KEYS = {}  # The join keys of both sides, read by the forked workers instead of being sent to them
+
+def parallel_hash_join(left_keys: List[tuple], right_keys: List[tuple], workers: int, partitions: int = None) -> Tuple[List[int], List[int]]:
+    """
+    Returns the pairs of matching rows (left indexes, right indexes) in the order of join.hash_join, computed by
+    joining the partitions of the keys in parallel
+
+    Args:
+        partitions: the number of partitions (4 per worker by default, so a big partition doesn't leave the other workers idle)
+
+    Raises:
+        ValueError: if workers or partitions isn't positive
+    """
+    if workers < 1:
+        raise ValueError(f"The number of workers must be positive, got {workers}")
+    partitions = partitions if partitions is not None else 4 * workers
+    if partitions < 1:
+        raise ValueError(f"The number of partitions must be positive, got {partitions}")
+
+    # Step 1: partitioning, the positions of the rows of each partition (in increasing order)
+    try:
+        left_partitions = partition_by_hash(left_keys, partitions)
+        right_partitions = partition_by_hash(right_keys, partitions)
+    except TypeError:
+        # Keys like lists can't be hashed, hence partitioned
+        pairs = list(hash_join(left_keys, right_keys))
+        return [left for left, _ in pairs], [right for _, right in pairs]
+
+    # Step 2: joining each pair of partitions in a worker
+    forked = sys.platform.startswith("linux")
+    tasks = [
+        (left_indexes, right_indexes) if forked else
+        (left_indexes, right_indexes, [left_keys[index] for index in left_indexes], [right_keys[index] for index in right_indexes])
+        for left_indexes, right_indexes in zip(left_partitions, right_partitions) if left_indexes and right_indexes
+    ]
+    if forked:
+        SHARED_KEYS.update(left = left_keys, right = right_keys)
+    try:
+        context = multiprocessing.get_context("fork") if forked else None
+        with ProcessPoolExecutor(max_workers = workers, mp_context = context) as pool:
+            results = list(pool.map(join_partition, *zip(*tasks))) if tasks else []
+    finally:
+        SHARED_KEYS.clear()
+
+    # Step 3: the pairs of each partition come by left index, a left row is in one partition only
+    return merge_pairs(results)
+
+def partition_by_hash(keys: List[tuple], partitions: int) -> List[array]:
+    """
+    Raises:
+        TypeError: if a key can't be hashed
+    """
+    result = [array("q") for _ in range(partitions)]
+    appends = [partition.append for partition in result]
+    for index, key in enumerate(keys):
+        appends[hash(key) % partitions](index)
+    return result
+
+def join_partition(left_indexes: array, right_indexes: array, left_keys: List[tuple] = None, right_keys: List[tuple] = None) -> Tuple[array, array]:
+    """
+    Runs in a worker: joins the rows of a partition of each side (given by their positions), returns the matching pairs of positions
+    """
+    if left_keys is None:
+        left_keys = list(map(SHARED_KEYS["left"].__getitem__, left_indexes))
+        right_keys = list(map(SHARED_KEYS["right"].__getitem__, right_indexes))
+    table = HashTable(right_keys)
+    left_result, right_result = array("q"), array("q")
+    for position, key in enumerate(left_keys):
+        matches = table.probe(key)
+        if matches:
+            left_result.extend([left_indexes[position]] * len(matches))
+            right_result.extend(map(right_indexes.__getitem__, matches))
+    return left_result, right_result
+
+def merge_pairs(results: List[Tuple[array, array]]) -> Tuple[List[int], List[int]]:
+    """
+    Merges the pairs of every partition by left index (then by right index, the order of each partition)
+    """
+    if not results:
+        return [], []
+    if numpy is not None:
+        left = numpy.concatenate([numpy.frombuffer(left, dtype = "int64") for left, _ in results])
+        right = numpy.concatenate([numpy.frombuffer(right, dtype = "int64") for _, right in results])
+        order = numpy.argsort(left, kind = "stable")
+        return left[order].tolist(), right[order].tolist()
+    pairs = list(heapq.merge(*(zip(left, right) for left, right in results)))
+    return [left for left, _ in pairs], [right for _, right in pairs]
@@ -0,0 +1,263 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Dict, List, Sequence
+from ..base.column import Field
+from ..base.domain import Domain
+from ..base.storage import ColumnStore
+from ..condition.vectorize import column_typecode
+from ..constraint.constraint import NotNullConstraint, PositiveConstraint, RangeConstraint, StringLengthConstraint
+
+"""
+Binary on-disk format of a relation, read through mmap
+
+Layout of a file:
+    MAGIC (8 bytes) | header offset (8 bytes) | header length (8 bytes) | column segments ... | header
+The header is JSON: the name of the relation, the number of rows, and for each field its name, its domain
+(allowed values, allowed types, constraints) and where its column is:
+    - "int64" / "float64": the values one after the other (8 bytes each)
+    - "str": the offsets of each value (n + 1 int64) then the UTF-8 bytes of every value
+    - "object": like "str" with each value written in JSON (for columns mixing int, float, bool, str and None)
+Every segment starts on a multiple of 8 bytes.
+
+Opening a file reads only its header: the int64 and float64 columns are memoryviews on the mapped file (nothing is copied,
+the pages are read by the system when a value is used) and the other columns decode a value when it's accessed.
+So a scan or a projection only reads the pages of the columns it uses, and NumPy works directly on the mapped columns.
+The relation is read-only until it changes: the first insert copies the columns in memory (the file isn't modified)
+"""
+
+MAGIC = b"RELMAP01"
+PREFIX = struct.Struct("<8sQQ")
+ALIGNMENT = 8
+
+TYPES = {
+    "int": int, "float": float, "str": str, "bool": bool, "NoneType": type(None),
+    "object": object, "list": list, "tuple": tuple, "dict": dict, "set": set, "bytes": bytes,
+}
+SCALAR_TYPES = (type(None), bool, int, float, str)  # The values JSON gives back with the same type
+
+# ====================================================
+# Writing
+# ====================================================
+
+def write_relation(relation: "Relation", path: str) -> None:
+    """
+    Writes the relation to a file, column by column. The file is written next to path then renamed over it:
+    a relation opened from path (its columns are mapped from the file) can be saved over it,
+    and a failed write leaves the previous file as it was
+
+    Raises:
+        ValueError: if a domain or a value can't be written (e.g: a custom constraint, a list in a column)
+    """
+    header = {"name": relation.name, "length": len(relation), "byteorder": sys.byteorder, "fields": []}
+    temporary = tempfile.NamedTemporaryFile(dir = os.path.dirname(os.path.abspath(path)), suffix = ".tmp", delete = False)
+    try:
+        with temporary as file:
+            file.write(PREFIX.pack(MAGIC, 0, 0))
+
+            for position, field in enumerate(relation.fields):
+                column = relation.column_values(position)
+                segment = write_column(file, column, field.name)
+                header["fields"].append({"name": field.name, "domain": encode_domain(field.domain, field.name), "column": segment})
+
+            encoded_header = json.dumps(header).encode("utf-8")
+            header_offset = file.tell()
+            file.write(encoded_header)
+            file.seek(0)
+            file.write(PREFIX.pack(MAGIC, header_offset, len(encoded_header)))
+        os.replace(temporary.name, path)
+    except BaseException:
+        os.remove(temporary.name)
+        raise
+
+def write_column(file, column: Sequence, field_name: str) -> dict:
+    """
+    Writes a column at the current position of the file, returns where it is (the "column" entry of the header)
+    """
+    pad(file)
+    kind = column_kind(column, field_name)
+    if kind in ("int64", "float64"):
+        # A typed column (array or mapped memoryview) is written as it is in memory
+        values = column if column_typecode(column) is not None else array("q" if kind == "int64" else "d", column)
+        offset = file.tell()
+        file.write(values)
+        return {"kind": kind, "offset": offset}
+
+    # Variable-length values: the bytes of every value, then their offsets
+    encode = (lambda value: value.encode("utf-8")) if kind == "str" else (lambda value: json.dumps(value).encode("utf-8"))
+    data_offset = file.tell()
+    offsets = array("q", [0])
+    size = 0
+    for value in column:
+        encoded = encode(value)
+        file.write(encoded)
+        size += len(encoded)
+        offsets.append(size)
+    pad(file)
+    offsets_offset = file.tell()
+    file.write(offsets.tobytes())
+    return {"kind": kind, "offset": offsets_offset, "data": data_offset}
+
+def column_kind(column: Sequence, field_name: str) -> str:
+    """
+    Returns how a column is written: "int64", "float64", "str" or "object"
+
+    Raises:
+        ValueError: if a value isn't None, bool, int, float or str
+    """
+    typecode = column_typecode(column)
+    if typecode is not None:
+        return "int64" if typecode == "q" else "float64"
+    types = set(map(type, column))
+    for type_ in types:
+        if type_ not in SCALAR_TYPES:
+            raise ValueError(f"Column {field_name} can't be saved: the values of type {type_.__name__} aren't supported")
+    if types == {int} and all(-2**63 <= value < 2**63 for value in column):
+        return "int64"
+    if types == {float}:
+        return "float64"
+    if types == {str}:
+        return "str"
+    return "object"
+
+def pad(file) -> None:
+    file.write(b"\0" * (-file.tell() % ALIGNMENT))
+
+# ====================================================
+# Reading
+# ====================================================
+
+def read_relation(path: str):
+    """
+    Maps a file written by write_relation
+
+    Returns:
+        name (str), fields (list of Field), store (a read-only ColumnStore on the mapped file)
+
+    Raises:
+        ValueError: if the file isn't a relation file
+    """
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+
+    if len(mapped) < PREFIX.size:
+        raise ValueError(f"{path} isn't a relation file")
+    magic, header_offset, header_length = PREFIX.unpack_from(mapped, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} isn't a relation file")
+    header = json.loads(bytes(mapped[header_offset:header_offset + header_length]).decode("utf-8"))
+    if header["byteorder"] != sys.byteorder:
+        raise ValueError(f"{path} was written on a {header['byteorder']}-endian machine")
+
+    buffer = memoryview(mapped)
+    length = header["length"]
+    fields, columns, types = [], [], []
+    for entry in header["fields"]:
+        fields.append(Field(entry["name"], decode_domain(entry["domain"])))
+        segment = entry["column"]
+        if segment["kind"] in ("int64", "float64"):
+            offset = segment["offset"]
+            columns.append(buffer[offset:offset + 8 * length].cast("q" if segment["kind"] == "int64" else "d"))
+            types.append(int if segment["kind"] == "int64" else float)
+        else:
+            offset = segment["offset"]
+            offsets = buffer[offset:offset + 8 * (length + 1)].cast("q")
+            data = buffer[segment["data"]:segment["data"] + offsets[length]]
+            columns.append(MappedValues(offsets, data, segment["kind"]))
+            types.append(None)
+
+    store = ColumnStore.__new__(ColumnStore)
+    store.types = types
+    store.columns = columns
+    store.length = length
+    store.read_only = True
+    return header["name"], fields, store
+
+
+class MappedValues(Sequence):
+    """
+    A column of variable-length values on a mapped file: a value is decoded only when it's accessed
+    """
+
+    def __init__(self, offsets: memoryview, data: memoryview, kind: str):
+        """
+        Args:
+            offsets: where each value starts in data (and where the last one ends)
+            kind (str): "str" (UTF-8) or "object" (JSON)
+        """
+        self.offsets = offsets
+        self.data = data
+        self.decode = (lambda encoded: str(encoded, "utf-8")) if kind == "str" else json.loads
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self))[index]]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("row index out of range")
+        return self.decode(bytes(self.data[self.offsets[index]:self.offsets[index + 1]]))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        data, offsets, decode = self.data, self.offsets, self.decode
+        start = 0
+        for index in range(1, len(offsets)):
+            end = offsets[index]
+            yield decode(bytes(data[start:end]))
+            start = end
+
+# ====================================================
+# Domains
+# ====================================================
+
+def encode_domain(domain: Domain, field_name: str) -> Dict[str, object]:
+    """
+    Raises:
+        ValueError: if an allowed value, an allowed type or a constraint can't be written
+    """
+    allowed_types = domain.allowed_types if isinstance(domain.allowed_types, (list, tuple, set)) else [domain.allowed_types]
+    for value in domain.allowed_values:
+        if type(value) not in SCALAR_TYPES:
+            raise ValueError(f"The domain of {field_name} can't be saved: the allowed value {value!r} isn't supported")
+    for type_ in allowed_types:
+        if TYPES.get(type_.__name__) is not type_:
+            raise ValueError(f"The domain of {field_name} can't be saved: the allowed type {type_.__name__} isn't supported")
+    return {
+        "allowed_values": list(domain.allowed_values),
+        "allowed_types": [type_.__name__ for type_ in allowed_types],
+        "constraints": [encode_constraint(constraint, field_name) for constraint in domain.constraints],
+    }
+
+def decode_domain(encoded: Dict[str, object]) -> Domain:
+    return Domain(
+        allowed_values = encoded["allowed_values"],
+        allowed_types = [TYPES[name] for name in encoded["allowed_types"]],
+        constraints = [decode_constraint(constraint) for constraint in encoded["constraints"]],
+    )
+
+def encode_constraint(constraint, field_name: str) -> Dict[str, object]:
+    if constraint is NotNullConstraint:
+        return {"type": "NotNullConstraint", "class": True}
+    if type(constraint) is NotNullConstraint:
+        return {"type": "NotNullConstraint"}
+    if type(constraint) in (RangeConstraint, StringLengthConstraint):
+        return {"type": type(constraint).__name__, "min": constraint.min, "max": constraint.max}
+    if type(constraint) is PositiveConstraint:
+        return {"type": "PositiveConstraint", "max": constraint.max}
+    raise ValueError(f"The domain of {field_name} can't be saved: the constraint {constraint!r} isn't supported")
+
+def decode_constraint(encoded: Dict[str, object]):
+    if encoded["type"] == "NotNullConstraint":
+        return NotNullConstraint if encoded.get("class") else NotNullConstraint()
+    if encoded["type"] == "RangeConstraint":
+        return RangeConstraint(encoded["min"], encoded["max"])
+    if encoded["type"] == "StringLengthConstraint":
+        return StringLengthConstraint(encoded["min"], encoded["max"])
+    return PositiveConstraint(encoded["max"])
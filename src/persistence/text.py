@@ -0,0 +1,191 @@
+import csv
+import json
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List
+from ..base.column import Field
+
+"""
+Streaming import and export of relations as CSV or JSON Lines (one JSON object per line)
+
+The files are read and written chunk by chunk: a loader validates chunk_size rows at a time against the domains
+of the fields (with Relation.insert_many) and a writer formats chunk_size rows at a time through a buffered file,
+so a file never has to fit in memory as text.
+
+CSV cells are text: each cell is converted with the types its field accepts, tried in this order
+int, float, bool ("True"/"False"), then str; an empty cell is None when the field accepts None.
+So a value can't always be written in CSV as it is: the str "20" in a field accepting int and str would be read back
+as the int 20, and "" in a field accepting None as None. Writing such a value raises a ValueError instead of changing it.
+JSON Lines keep the types of int, float, bool, str and None as they are
+"""
+
+BUFFER_SIZE = 1 << 20  # Bytes buffered before a write to the file
+ERROR_MODES = ("raise", "skip")
+
+# ====================================================
+# Reading
+# ====================================================
+
+def load_rows(relation: "Relation", records: Iterable[tuple], chunk_size: int, on_error: str, path: str) -> "Relation":
+    """
+    Inserts rows given with their line number (line number, row) chunk by chunk
+
+    Args:
+        on_error (str): what to do with a row breaking a domain or a key
+            - "raise": stop at the first one, the rows of its chunk are taken out of the relation again
+              (the rows of the previous chunks stay inserted)
+            - "skip": leave it out and keep loading
+
+    Raises:
+        ValueError: if on_error doesn't exist, or for the first invalid row when on_error is "raise"
+    """
+    if on_error not in ERROR_MODES:
+        raise ValueError(f"Unknown error mode: {on_error}")
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+        length = len(relation)
+        report = relation.insert_many([row for _, row in chunk])
+        if report.errors and on_error == "raise":
+            if report.inserted:
+                relation.tuples = relation.tuples[:length]
+            row_number = report.failed[0]
+            raise ValueError(f"{path}, line {chunk[row_number][0]}: {report.errors[row_number][0]}")
+    return relation
+
+def csv_records(file, fields: List[Field], delimiter: str, path: str) -> Iterator[tuple]:
+    """
+    Yields (line number, row) for each row of a CSV file whose first row names the fields,
+    a row is a tuple when the header gives the fields in their order (the others get None), else a dict
+
+    Raises:
+        ValueError: if the header names a field that doesn't exist, or if a row hasn't one value per column
+    """
+    reader = csv.reader(file, delimiter = delimiter)
+    header = next(reader, None)
+    if header is None:
+        return
+    field_names = [field.name for field in fields]
+    for name in header:
+        if name not in field_names:
+            raise ValueError(f"Column {name} doesn't exist")
+    parsers = [cell_parser(fields[field_names.index(name)]) for name in header]
+    in_order = header == field_names[:len(header)]
+
+    for cells in reader:
+        if not cells:
+            continue
+        if len(cells) != len(header):
+            raise ValueError(f"{path}, line {reader.line_num}: {len(header)} values expected, got {len(cells)}")
+        values = tuple(parse(cell) for parse, cell in zip(parsers, cells))
+        yield reader.line_num, values if in_order else dict(zip(header, values))
+
+def jsonl_records(file, path: str) -> Iterator[tuple]:
+    """
+    Yields (line number, row) for each non-empty line of a JSON Lines file,
+    a row is an object (field name -> value) or an array of values in the order of the fields
+
+    Raises:
+        ValueError: if a line isn't a JSON object or array
+    """
+    for line_number, line in enumerate(file, start = 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path}, line {line_number}: {e.msg}")
+        if not isinstance(row, (dict, list)):
+            raise ValueError(f"{path}, line {line_number}: a row must be a JSON object or array")
+        yield line_number, row
+
+def cell_parser(field: Field) -> Callable[[str], object]:
+    """
+    Returns the function converting a CSV cell to a value of the field (see the rules at the top of the module)
+
+    Example:
+        Input: Field("age", Domain(allowed_values=[None], allowed_types=[int]))
+        Output: a function giving 12 for "12", None for "" and "abc" for "abc" (rejected later by the domain)
+    """
+    domain = field.domain
+    types = set(domain.allowed_types if isinstance(domain.allowed_types, (list, tuple, set)) else [domain.allowed_types])
+    types |= {type(value) for value in domain.allowed_values}
+    if object in types:
+        types |= {int, float, bool, type(None)}
+    converters = [convert for type_, convert in ((int, int), (float, float), (bool, parse_bool)) if type_ in types]
+    accepts_none = type(None) in types
+
+    def parse(cell: str) -> object:
+        if cell == "" and accepts_none:
+            return None
+        for convert in converters:
+            try:
+                return convert(cell)
+            except ValueError:
+                pass
+        return cell
+    return parse
+
+def parse_bool(cell: str) -> bool:
+    if cell == "True":
+        return True
+    if cell == "False":
+        return False
+    raise ValueError(f"{cell} isn't a bool")
+
+# ====================================================
+# Writing
+# ====================================================
+
+def write_csv(relation: "Relation", path: str, delimiter: str, chunk_size: int) -> None:
+    """
+    Writes the fields then the rows of the relation (None is an empty cell)
+
+    Raises:
+        ValueError: if a value wouldn't be read back as it is (see the top of the module), the file is left incomplete
+    """
+    parsers = [cell_parser(field) for field in relation.fields]
+    with open(path, "w", newline = "", encoding = "utf-8", buffering = BUFFER_SIZE) as file:
+        writer = csv.writer(file, delimiter = delimiter)
+        writer.writerow([field.name for field in relation.fields])
+        rows = iter(relation.rows_values())
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            check_cells(chunk, relation.fields, parsers)
+            writer.writerows(chunk)
+
+def check_cells(rows: List[tuple], fields: List[Field], parsers: List[Callable[[str], object]]) -> None:
+    """
+    Raises:
+        ValueError: if a value of the rows isn't read back with the same type and value from its CSV cell
+    """
+    for values in rows:
+        for value, parse, field in zip(values, parsers, fields):
+            read_back = parse("" if value is None else str(value))
+            if type(read_back) is not type(value) or (read_back != value and value == value):  # value != value for NaN
+                raise ValueError(
+                    f"Column {field.name}: {value!r} would be read back from a CSV file as {read_back!r}, use to_jsonl to keep it"
+                )
+
+def write_jsonl(relation: "Relation", path: str, chunk_size: int) -> None:
+    """
+    Writes each row as a JSON object (field name -> value) on its own line
+
+    Raises:
+        ValueError: if a value can't be written in JSON (e.g: a set)
+    """
+    field_names = [field.name for field in relation.fields]
+    encode = json.JSONEncoder(ensure_ascii = False).encode
+    with open(path, "w", encoding = "utf-8", buffering = BUFFER_SIZE) as file:
+        rows = iter(relation.rows_values())
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            try:
+                file.write("".join(encode(dict(zip(field_names, values))) + "\n" for values in chunk))
+            except TypeError as e:
+                raise ValueError(f"The relation {relation.name} can't be written in JSON: {e}")
@@ -0,0 +1,219 @@
+import pickle
+import sys
+from array import array
+from multiprocessing import shared_memory
+from typing import List, Sequence
+from ..base.column import Field
+from ..base.key import UniqueKey
+from ..base.storage import ColumnStore, column_type, new_column
+from ..condition.vectorize import column_typecode
+
+"""
+Sending a relation to another process (pickle, multiprocessing, concurrent.futures)
+
+A pickled relation holds its name, its fields (the schema is written once, not once per row) and its values
+column by column, then the keys and the indexes are built again on the other side:
+    - a typed column (int64 or float64) is written as its bytes: with pickle protocol 5 it's a PickleBuffer,
+      so pickle.dumps(relation, protocol=5, buffer_callback=...) gives it out-of-band (no copy of the values),
+      and the relation received reads the buffer directly as a read-only column (copied at its first change)
+    - the other columns are lists of values
+
+A SharedRelation (Relation.share) puts the typed columns in shared memory blocks (multiprocessing.shared_memory) once:
+pickling it only writes the names of the blocks and the other columns, and each worker maps the same blocks,
+so a relation sent to n workers isn't copied n times. The process that shared the relation frees the blocks
+with unlink() (or a with block) once the workers are done
+"""
+
+# ====================================================
+# Pickling
+# ====================================================
+
+def relation_state(relation: "Relation", protocol: int) -> tuple:
+    """
+    Returns what's pickled for the relation (see restore_relation)
+    """
+    if relation.store is not None:
+        columns = [pickled_column(column, protocol) for column in relation.store.columns]
+        types = list(relation.store.types)
+    else:
+        values = list(zip(*relation.rows_values())) if relation.rows else [() for _ in relation.fields]
+        columns = [pickled_column(new_column(column_type(field), column), protocol) for field, column in zip(relation.fields, values)]
+        types = None
+    keys = [(key.field_names, key.primary) for key in relation.keys]
+    indexes = [(field_name, index.kind) for field_name, index in relation.indexes.items()]
+    return relation.name, relation.fields, relation.storage, len(relation), sys.byteorder, types, columns, keys, indexes
+
+def pickled_column(column: Sequence, protocol: int):
+    """
+    A typed column is (typecode, its bytes), as a PickleBuffer from protocol 5, the other columns are a list
+    """
+    typecode = column_typecode(column)
+    if typecode is None:
+        return column if type(column) is list else list(column)
+    if protocol >= 5:
+        return typecode, pickle.PickleBuffer(column)
+    return typecode, memoryview(column).cast("B").tobytes()
+
+def restore_relation(state: tuple) -> "Relation":
+    """
+    Builds the relation pickled by relation_state
+    """
+    from ..base.relation import Relation
+
+    name, fields, storage, length, byteorder, types, columns, keys, indexes = state
+    columns = [
+        received_column(column[1], column[0], byteorder) if type(column) is tuple else column
+        for column in columns
+    ]
+    if storage == "column":
+        new_relation = Relation(name, *fields, storage = "column")
+        new_relation.store = column_store(types, columns, length)
+    else:
+        new_relation = Relation.from_columns(name, fields, columns, length)
+    restore_keys(new_relation, keys, indexes)
+    return new_relation
+
+def received_column(buffer, typecode: str, byteorder: str) -> Sequence:
+    """
+    A typed column read from the received bytes without copying them, or copied if they come from a machine of another byte order
+    """
+    if byteorder != sys.byteorder:
+        values = array(typecode)
+        values.frombytes(buffer)
+        values.byteswap()
+        return values
+    return memoryview(buffer).cast("B").cast(typecode)
+
+def column_store(types: List[type], columns: List[Sequence], length: int) -> ColumnStore:
+    """
+    A store of the columns as they are, read-only when a column is a view on a buffer
+    """
+    store = ColumnStore.__new__(ColumnStore)
+    store.types = types
+    store.columns = columns
+    store.length = length
+    store.read_only = any(type(column) is memoryview for column in columns)
+    return store
+
+def restore_keys(relation: "Relation", keys: List[tuple], indexes: List[tuple]) -> None:
+    """
+    Builds the keys and the indexes of a received relation again, its rows already respect the keys
+    """
+    positions = relation.positions()
+    for field_names, primary in keys:
+        key = UniqueKey(field_names, [positions[field_name] for field_name in field_names], primary)
+        for values in relation.rows_values():
+            key.add(values)
+        relation.keys.append(key)
+    for field_name, kind in indexes:
+        relation.create_index(field_name, kind)
+
+# ====================================================
+# Shared memory
+# ====================================================
+
+class SharedRelation:
+    """
+    A relation whose typed columns are in shared memory blocks, it's pickled without the values of those columns
+
+    Example:
+        with relation.share() as shared:
+            pool.map(work, [shared] * 8)  # each worker calls shared.relation()
+    """
+
+    # ====================================================
+    # Initialisation Method
+    # ====================================================
+
+    def __init__(self, relation: "Relation"):
+        """
+        Copies the typed columns of the relation in new shared memory blocks (the other columns are kept as lists)
+        """
+        self.name = relation.name
+        self.fields: List[Field] = list(relation.fields)
+        self.length = len(relation)
+        self.types = list(relation.store.types) if relation.store is not None else [column_type(field) for field in relation.fields]
+        self.keys = [(key.field_names, key.primary) for key in relation.keys]
+        self.indexes = [(field_name, index.kind) for field_name, index in relation.indexes.items()]
+        self.blocks: List[shared_memory.SharedMemory] = []
+        self.columns = []  # (block name, typecode) for a shared column, else the list of values
+        self.owner = True
+        try:
+            for position, type_ in enumerate(self.types):
+                column = relation.column_values(position)
+                if relation.store is None:
+                    column = new_column(type_, column)
+                typecode = column_typecode(column)
+                if typecode is None:
+                    self.columns.append(list(column))
+                    continue
+                values = memoryview(column).cast("B")
+                block = shared_memory.SharedMemory(create = True, size = max(len(values), 1))
+                self.blocks.append(block)
+                block.buf[:len(values)] = values
+                self.columns.append((block.name, typecode))
+        except BaseException:
+            self.unlink()
+            raise
+
+    # ====================================================
+    # Main Methods
+    # ====================================================
+
+    def relation(self) -> "Relation":
+        """
+        Returns the relation (storage="column") reading the shared blocks, it's read-only until it changes:
+        its first insert copies the columns in the memory of the process. The blocks are mapped at the first call
+        """
+        from ..base.relation import Relation
+
+        if not self.blocks:
+            self.blocks = [shared_memory.SharedMemory(name = column[0]) for column in self.columns if type(column) is tuple]
+        blocks = iter(self.blocks)
+        columns = []
+        for column in self.columns:
+            if type(column) is tuple:
+                typecode = column[1]
+                columns.append(next(blocks).buf[:self.length * array(typecode).itemsize].cast(typecode))
+            else:
+                columns.append(column)
+
+        new_relation = Relation(self.name, *self.fields, storage = "column")
+        new_relation.store = column_store(list(self.types), columns, self.length)
+        new_relation.store.blocks = self.blocks  # The columns are views on the blocks, they're kept open with the relation
+        restore_keys(new_relation, self.keys, self.indexes)
+        return new_relation
+
+    def close(self) -> None:
+        """
+        Unmaps the blocks in this process, the relations given by relation() mustn't be used after
+        """
+        for block in self.blocks:
+            try:
+                block.close()
+            except BufferError:
+                pass  # A relation still reads the block, it's unmapped with the relation
+        self.blocks = []
+
+    def unlink(self) -> None:
+        """
+        Frees the blocks (only in the process that shared the relation), once no worker needs them
+        """
+        blocks = list(self.blocks)
+        self.close()
+        if self.owner:
+            for block in blocks:
+                block.unlink()
+            self.owner = False
+
+    def __enter__(self) -> "SharedRelation":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.unlink()
+
+    def __getstate__(self) -> dict:
+        # Only the names of the blocks are sent, the receiver maps them and doesn't own them
+        state = dict(self.__dict__)
+        state.update(blocks = [], owner = False)
+        return state
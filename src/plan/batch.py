@@ -0,0 +1,95 @@
+from array import array
+from typing import Iterable, Iterator, List, Sequence
+from ..base.storage import copy_column, take_column
+from ..condition.vectorize import column_typecode
+
+"""
+Batches of rows for the vector-at-a-time execution of the plans (see PlanNode.batches)
+
+A batch holds a chunk of rows (BATCH_SIZE by default) column by column, so the operators work on whole columns:
+the conditions are evaluated as masks (see condition/vectorize.py) and the rows are kept or joined by gathering the columns
+at a list of positions. The typed columns (array("q"), array("d")) stay typed from the relation to the result
+"""
+
+BATCH_SIZE = 4096
+
+class Batch:
+    """
+    A chunk of rows stored column by column
+    """
+
+    __slots__ = ("columns", "length")
+
+    def __init__(self, columns: List[Sequence], length: int):
+        """
+        Args:
+            columns: the values of each field, in the order of the fields of the node
+            length: the number of rows (needed when there's no field)
+        """
+        self.columns = columns
+        self.length = length
+
+    @staticmethod
+    def from_rows(rows: List[tuple], width: int) -> "Batch":
+        """
+        Creates a batch from the values of each row, width is the number of fields
+        """
+        if not rows:
+            return Batch([[] for _ in range(width)], 0)
+        return Batch(list(zip(*rows)) if width else [], len(rows))
+
+    def rows(self) -> Iterator[tuple]:
+        if not self.columns:
+            return (() for _ in range(self.length))
+        return zip(*self.columns)
+
+    def take(self, indexes: List[int]) -> "Batch":
+        """
+        Returns the rows at the indexes (in that order)
+        """
+        return Batch([take_column(column, indexes) for column in self.columns], len(indexes))
+
+    def pick(self, positions: List[int]) -> "Batch":
+        """
+        Returns the columns at the positions (nothing is copied)
+        """
+        return Batch([self.columns[position] for position in positions], self.length)
+
+    def __len__(self):
+        return self.length
+
+# ====================================================
+# Helper Functions
+# ====================================================
+
+def concat_batches(batches: Iterable[Batch], width: int) -> Batch:
+    """
+    Puts batches end to end in a single batch
+    """
+    columns = [None] * width
+    length = 0
+    for batch in batches:
+        for position, column in enumerate(batch.columns):
+            if columns[position] is None:
+                columns[position] = copy_column(column)
+            elif type(columns[position]) is array and column_typecode(column) == columns[position].typecode:
+                columns[position].frombytes(memoryview(column).cast("B"))
+            else:
+                if type(columns[position]) is not list:
+                    columns[position] = list(columns[position])
+                columns[position].extend(column)
+        length += batch.length
+    return Batch([column if column is not None else [] for column in columns], length)
+
+def batches_of_rows(rows: Iterable[tuple], width: int, batch_size: int) -> Iterator[Batch]:
+    """
+    Groups rows given one at a time into batches
+    """
+    chunk = []
+    for values in rows:
+        chunk.append(values)
+        if len(chunk) == batch_size:
+            yield Batch.from_rows(chunk, width)
+            chunk = []
+    if chunk:
+        yield Batch.from_rows(chunk, width)
@@ -0,0 +1,163 @@
+from typing import Iterator, List
+from ..base.column import Field
+from ..base.row import Tuple
+from ..condition.compiler import Comparison, FieldReference, parse_condition
+from .batch import BATCH_SIZE, Batch, concat_batches
+from .optimizer import optimize
+from .plan import Join, Limit, NaturalJoin, PlanNode, Product, Project, Scan, Select, SetOperation, TopK
+
+class LazyRelation:
+    """
+    A relation that isn't computed yet: the operations have the same names and arguments as the ones of Relation,
+    but they only add a node to the query plan. collect() optimizes the plan and runs it
+
+    Example:
+        query = person.lazy().cartesian_product(details).select("Person.id == PersonDetails.id").project("Person.name")
+        query.explain()   # The optimized plan: a hash join between Person (only id and name) and PersonDetails (only id)
+        query.collect()   # The resulting Relation, the same one the eager operations would give
+        for row in query: # The resulting rows, computed one at a time
+            ...
+    """
+
+    # ====================================================
+    # Initialisation Method
+    # ====================================================
+
+    def __init__(self, plan: PlanNode):
+        self.plan = plan
+
+    @property
+    def name(self) -> str:
+        return self.plan.name
+
+    @property
+    def fields(self) -> List[Field]:
+        return self.plan.fields()
+
+    # ====================================================
+    # Main Methods
+    # ====================================================
+
+    def project(self, *col_names: str) -> "LazyRelation":
+        return LazyRelation(Project(self.plan, col_names))
+
+    def select(self, condition: str) -> "LazyRelation":
+        """
+        Raise:
+            ValueError: syntax error (the condition is parsed right away)
+        """
+        expression = parse_condition(condition, self.plan.field_names())
+        return LazyRelation(Select(self.plan, expression, condition))
+
+    def cartesian_product(self, other) -> "LazyRelation":
+        return LazyRelation(Product(self.plan, plan_of(other)))
+
+    def theta_join(self, other, condition: str, method: str = "auto") -> "LazyRelation":
+        other_plan = plan_of(other)
+        field_names = [field.name for field in Product(self.plan, other_plan).fields()]
+        return LazyRelation(Join(self.plan, other_plan, parse_condition(condition, field_names), method))
+
+    def equi_join(self, other, field1, field2) -> "LazyRelation":
+        """
+        Raises:
+            ValueError: if a join field doesn't exist
+        """
+        other_plan = plan_of(other)
+        for plan, field_name in ((self.plan, field1), (other_plan, field2)):
+            if field_name not in plan.field_names():
+                raise ValueError(f"Column {field_name} doesn't exist")
+        expression = Comparison("==", FieldReference(f"{self.plan.name}.{field1}"), FieldReference(f"{other_plan.name}.{field2}"))
+        return LazyRelation(Join(self.plan, other_plan, expression, "hash", f"{self.plan.name} EQUI JOIN {other_plan.name}"))
+
+    def natural_join(self, other, *common_fields: str) -> "LazyRelation":
+        return LazyRelation(NaturalJoin(self.plan, plan_of(other), common_fields))
+
+    def automatic_natural_join(self, other) -> "LazyRelation":
+        return LazyRelation(NaturalJoin(self.plan, plan_of(other)))
+
+    def union(self, other, field_mapping: dict) -> "LazyRelation":
+        return LazyRelation(SetOperation("union", self.plan, plan_of(other), field_mapping))
+
+    def intersection(self, other, field_mapping: dict) -> "LazyRelation":
+        return LazyRelation(SetOperation("intersection", self.plan, plan_of(other), field_mapping))
+
+    def difference(self, other, field_mapping: dict) -> "LazyRelation":
+        return LazyRelation(SetOperation("difference", self.plan, plan_of(other), field_mapping))
+
+    def limit(self, n: int) -> "LazyRelation":
+        return LazyRelation(Limit(self.plan, n))
+
+    def top_k(self, n: int, field_name: str, descending: bool = True) -> "LazyRelation":
+        return LazyRelation(TopK(self.plan, n, field_name, descending))
+
+    def collect(self, mode: str = "row", batch_size: int = BATCH_SIZE) -> "Relation":
+        """
+        Optimizes the plan, then runs it: only the resulting rows are kept, not the ones of the intermediate relations
+
+        Args:
+            mode (str): how the plan is run
+                - "row": one row at a time (see PlanNode.iterate)
+                - "batch": by batches of batch_size rows stored column by column (see PlanNode.batches),
+                  faster on big relations, especially with typed columns (storage="column") and NumPy installed
+
+        Raises:
+            ValueError: if the mode doesn't exist
+        """
+        from ..base.relation import Relation  # Imported here: the relation module imports this one
+
+        if mode not in ("row", "batch"):
+            raise ValueError(f"Unknown execution mode: {mode}")
+        plan = optimize(self.plan)
+        if mode == "batch":
+            result = concat_batches(plan.batches(batch_size), len(plan.fields()))
+            return Relation.from_columns(plan.name, plan.fields(), result.columns, result.length, plan.storage)
+        return Relation.from_rows(plan.name, plan.fields(), plan.iterate(), plan.storage)
+
+    def batches(self, batch_size: int = BATCH_SIZE) -> Iterator[Batch]:
+        """
+        Streams the resulting rows by batches (batch.columns holds the values of each field, batch.rows() gives the rows)
+        """
+        return optimize(self.plan).batches(batch_size)
+
+    def __iter__(self):
+        """
+        Streams the resulting rows one at a time: stopping early (e.g: after the first 10 rows) doesn't read the rest of the input
+
+        Example:
+            for row in person.lazy().select("age > 18"):
+                ...
+        """
+        from ..base.relation import Relation
+
+        plan = optimize(self.plan)
+        schema = Relation(plan.name, *plan.fields())  # Gives the rows their fields, it stays empty
+        return (Tuple(schema, values) for values in plan.iterate())
+
+    # ====================================================
+    # Display Methods
+    # ====================================================
+
+    def explain(self, optimized: bool = True) -> str:
+        """
+        The plan that collect() runs (or the plan as written if optimized is False), one node per line
+        """
+        plan = optimize(self.plan) if optimized else self.plan
+        return plan.explain()
+
+    def __str__(self):
+        return str(self.collect())
+
+    def display(self) -> None:
+        print(self)
+
+# ====================================================
+# Helper Functions
+# ====================================================
+
+def plan_of(relation) -> PlanNode:
+    """
+    The plan of a LazyRelation, or a scan of a Relation
+    """
+    if isinstance(relation, LazyRelation):
+        return relation.plan
+    return Scan(relation)
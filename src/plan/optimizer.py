@@ -0,0 +1,182 @@
+from typing import List
+from ..condition.compiler import And, Expression, conjuncts
+from .plan import Join, PlanNode, Product, Project, Select, SetOperation
+
+"""
+Rule-based optimizer of the logical plans
+
+The rules only move the operations, the result is the same relation (name, fields and rows):
+    - two selections in a row become one selection with both conditions
+    - a selection goes below a projection
+    - the part of a selection reading the fields of only one side of a product or a join goes to that side
+    - the part reading both sides turns a product into a join (so it runs as a hash or merge join),
+      or is added to the condition of a join
+    - a selection goes into both sides of a union and into the left side of an intersection or a difference
+    - two projections in a row become one projection
+    - a projection goes below a selection and into both sides of a product or a join,
+      keeping only the fields needed above
+A node moved by a rule keeps the name of the node it replaces, so the fields of the joins above are still named the same way
+"""
+
+MAX_PASSES = 10
+
+def optimize(plan: PlanNode) -> PlanNode:
+    """
+    Applies the rules until the plan doesn't change anymore
+    """
+    for _ in range(MAX_PASSES):
+        optimized = rewrite(plan)
+        if optimized.explain() == plan.explain():
+            return optimized
+        plan = optimized
+    return plan
+
+def rewrite(node: PlanNode) -> PlanNode:
+    """
+    Rewrites the children first, then the node itself
+    """
+    children = node.children()
+    if children:
+        node = node.with_children(*(rewrite(child) for child in children))
+    if isinstance(node, Select):
+        return push_select(node)
+    if isinstance(node, Project):
+        return push_project(node)
+    return node
+
+# ====================================================
+# Selection rules
+# ====================================================
+
+def push_select(select: Select) -> PlanNode:
+    child = select.child
+
+    # σ_a(σ_b(R)) = σ_(b and a)(R)
+    if isinstance(child, Select):
+        merged = Select(child.child, conjunction([*conjuncts(child.expression), *conjuncts(select.expression)]), name = select.name)
+        return push_select(merged)
+
+    # σ(π(R)) = π(σ(R)): the condition only reads kept fields
+    if isinstance(child, Project):
+        pushed = push_select(Select(child.child, select.expression, name = child.child.name))
+        return Project(pushed, child.col_names, name = select.name)
+
+    if isinstance(child, (Product, Join)):
+        return push_select_into_join(select, child)
+
+    if isinstance(child, SetOperation):
+        left = push_select(Select(child.left, select.expression, name = child.left.name))
+        right = child.right
+        if child.kind == "union":
+            right_expression = select.expression.rename(child.field_mapping)
+            right = push_select(Select(child.right, right_expression, name = child.right.name))
+        return SetOperation(child.kind, left, right, child.field_mapping, name = select.name)
+
+    return select
+
+def push_select_into_join(select: Select, join: PlanNode) -> PlanNode:
+    """
+    Splits the condition of the selection between the left side, the right side and the join itself
+    """
+    left_names, right_names = side_names(join)
+
+    left_parts, right_parts, join_parts, kept_parts = [], [], [], []
+    for part in conjuncts(select.expression):
+        fields = part.fields()
+        if not fields:
+            kept_parts.append(part)
+        elif fields <= left_names.keys():
+            left_parts.append(part.rename(left_names))
+        elif fields <= right_names.keys():
+            right_parts.append(part.rename(right_names))
+        elif fields <= left_names.keys() | right_names.keys():
+            join_parts.append(part)
+        else:
+            kept_parts.append(part)
+
+    if not (left_parts or right_parts or join_parts):
+        return select
+
+    left, right = join.left, join.right
+    if left_parts:
+        left = push_select(Select(left, conjunction(left_parts), name = left.name))
+    if right_parts:
+        right = push_select(Select(right, conjunction(right_parts), name = right.name))
+
+    # The joined relation takes the name of the selection when nothing is left above it
+    name = join.name if kept_parts else select.name
+    if isinstance(join, Join):
+        expression = conjunction([*conjuncts(join.expression), *join_parts])
+        node = Join(left, right, expression, join.method, name = name)
+    elif join_parts:
+        node = Join(left, right, conjunction(join_parts), name = name)
+    else:
+        node = Product(left, right, name = name)
+
+    if kept_parts:
+        return Select(node, conjunction(kept_parts), name = select.name)
+    return node
+
+# ====================================================
+# Projection rules
+# ====================================================
+
+def push_project(project: Project) -> PlanNode:
+    child = project.child
+
+    # π_a(π_b(R)) = π_a(R)
+    if isinstance(child, Project):
+        return push_project(Project(child.child, project.col_names, name = project.name))
+
+    # π_a(σ(R)) = π_a(σ(π_(a + fields of σ)(R)))
+    if isinstance(child, Select):
+        needed = set(project.col_names) | child.expression.fields()
+        narrowed = narrow(child.child, needed)
+        if narrowed is child.child:
+            return project
+        return Project(Select(narrowed, child.expression, child.condition, child.name), project.col_names, name = project.name)
+
+    # π_a(L x R) = π_a(π_(fields of L in a)(L) x π_(fields of R in a)(R))
+    if isinstance(child, (Product, Join)):
+        needed = set(project.col_names)
+        if isinstance(child, Join):
+            needed |= child.expression.fields()
+        left_names, right_names = side_names(child, exclusive = False)
+        left = narrow(child.left, {left_names[name] for name in needed if name in left_names})
+        right = narrow(child.right, {right_names[name] for name in needed if name in right_names})
+        if left is child.left and right is child.right:
+            return project
+        return Project(child.with_children(left, right), project.col_names, name = project.name)
+
+    return project
+
+def narrow(node: PlanNode, needed: set) -> PlanNode:
+    """
+    Returns the node with only the needed fields (the node itself if it has nothing more)
+    """
+    names = node.field_names()
+    if all(name in needed for name in names):
+        return node
+    return push_project(Project(node, tuple(name for name in names if name in needed), name = node.name))
+
+# ====================================================
+# Helper Functions
+# ====================================================
+
+def side_names(join: PlanNode, exclusive: bool = True):
+    """
+    Maps the fields of a product or a join (e.g: "Person.id") to the field of each side (e.g: "id")
+
+    Args:
+        exclusive: if True, a name that both sides give (a relation joined with itself) is left out,
+                   a condition reading it can't be moved to one side
+    """
+    left_names = {f"{join.left.name}.{name}": name for name in join.left.field_names()}
+    right_names = {f"{join.right.name}.{name}": name for name in join.right.field_names()}
+    if exclusive:
+        for name in left_names.keys() & right_names.keys():
+            del left_names[name], right_names[name]
+    return left_names, right_names
+
+def conjunction(parts: List[Expression]) -> Expression:
+    return parts[0] if len(parts) == 1 else And(*parts)
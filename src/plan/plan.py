@@ -0,0 +1,788 @@
+from abc import ABC, abstractmethod
+from array import array
+from itertools import islice
+from operator import itemgetter
+from typing import Callable, Dict, Iterator, List
+from ..base.column import Field
+from ..base.storage import column_type, new_column
+from ..condition.compiler import And, Expression, compile_condition
+from ..condition.vectorize import column_typecode, compile_mask, mask_indexes, numpy
+from ..join.join import HashTable, merge_join, split_join_condition
+from ..sort.sort import top_rows
+from ..setop.setop import filter_rows, key_membership, union_rows
+from .batch import BATCH_SIZE, Batch, batches_of_rows, concat_batches
+
+"""
+Logical query plans
+
+A plan is a tree of nodes, each node describing one operation of the relational algebra on the result of its children:
+    Select(Product(Scan(Person), Scan(PersonDetails)), "Person.id == PersonDetails.id")
+Nothing is computed when the tree is built: the optimizer (see optimizer.py) rewrites it first,
+then iterate() runs it.
+
+Every node knows its name and its fields, which are the ones the eager operation would give
+(e.g: "Person x PersonDetails" and "Person.id", ...), so a rewritten plan gives the same relation as the original one
+
+The nodes are run like iterators (Volcano model): iterate() is a generator of the values of the rows (tuples in the order of fields()),
+pulling the rows of its children one at a time. Nothing is kept in memory except by the blocking parts:
+    - the right side of a product, a nested loop join or a hash join (the hash table), and of an intersection or a difference
+    - both sides of a merge join (they are sorted)
+    - the rows already given by a union (to remove the duplicates)
+    - the n best rows of a top-k (a heap of n rows)
+So a consumer can stop early (e.g: after the first 10 matching rows) without the rest of the input being read
+
+They can also be run vector-at-a-time: batches() yields the rows by batches stored column by column (see batch.py),
+the conditions are evaluated on whole columns (with NumPy when it's installed) and the joins probe a whole batch at once,
+so the cost of the interpreter is paid once per batch instead of once per row
+"""
+
+class PlanNode(ABC):
+    """
+    A node of a logical plan
+    """
+    name: str
+
+    @abstractmethod
+    def fields(self) -> List[Field]:
+        """
+        Returns the fields of the relation this node gives
+        """
+        pass
+
+    def field_names(self) -> List[str]:
+        return [field.name for field in self.fields()]
+
+    def positions(self) -> Dict[str, int]:
+        """
+        Maps the name of each field to its position (the first one if two fields have the same name), like Relation.positions
+        """
+        positions = {}
+        for position, name in enumerate(self.field_names()):
+            positions.setdefault(name, position)
+        return positions
+
+    @property
+    def storage(self) -> str:
+        """
+        The storage of the result: the one of the first relation, like the eager operations
+        """
+        return self.children()[0].storage
+
+    def children(self) -> list:
+        return []
+
+    def with_children(self, *children: "PlanNode") -> "PlanNode":
+        """
+        Returns a copy of this node (same name) on other children
+        """
+        return self
+
+    @abstractmethod
+    def iterate(self) -> Iterator[tuple]:
+        """
+        Runs this node and its children, yields the values of each resulting row
+        """
+        pass
+
+    def batches(self, batch_size: int = BATCH_SIZE) -> Iterator[Batch]:
+        """
+        Runs this node and its children vector-at-a-time, yields the resulting rows by batches of at most about batch_size rows
+        """
+        return batches_of_rows(self.iterate(), len(self.fields()), batch_size)
+
+    @abstractmethod
+    def describe(self) -> str:
+        pass
+
+    def explain(self, depth: int = 0) -> str:
+        """
+        The plan as an indented tree, one node per line
+        """
+        lines = ["  " * depth + self.describe()]
+        for child in self.children():
+            lines.append(child.explain(depth + 1))
+        return "\n".join(lines)
+
+    def __str__(self):
+        return self.explain()
+
+
+class Scan(PlanNode):
+    """
+    The rows of an existing relation
+    """
+
+    def __init__(self, relation: "Relation"):
+        self.relation = relation
+
+    @property
+    def name(self) -> str:
+        return self.relation.name
+
+    @property
+    def storage(self) -> str:
+        return self.relation.storage
+
+    def fields(self) -> List[Field]:
+        return list(self.relation.fields)
+
+    def iterate(self) -> Iterator[tuple]:
+        return iter(self.relation.rows_values())
+
+    def batches(self, batch_size: int = BATCH_SIZE) -> Iterator[Batch]:
+        relation = self.relation
+        length = len(relation)
+        if relation.store is not None:
+            # Slices of the columns: the typed columns stay typed
+            columns = relation.store.columns
+            for start in range(0, length, batch_size):
+                yield Batch([column[start:start + batch_size] for column in columns], min(batch_size, length - start))
+        else:
+            # The columns of int or float fields are typed like in a ColumnStore
+            rows, types = relation.rows, [column_type(field) for field in relation.fields]
+            for start in range(0, length, batch_size):
+                batch = Batch.from_rows([row.values for row in rows[start:start + batch_size]], len(types))
+                batch.columns = [new_column(type_, column) if type_ is not None else column for type_, column in zip(types, batch.columns)]
+                yield batch
+
+    def describe(self) -> str:
+        return f"Scan {self.name}"
+
+
+class Select(PlanNode):
+    def __init__(self, child: PlanNode, expression: Expression, condition: str = None, name: str = None):
+        """
+        Args:
+            expression: the condition parsed with the field names of the child
+            condition (str): the condition as written, for the name of the result
+            name (str): the name of the result, like Relation.select by default
+        """
+        self.child = child
+        self.expression = expression
+        self.condition = condition if condition is not None else expression.to_source()
+        self.name = name if name is not None else f"{child.name} WHERE: {self.condition}"
+
+    def fields(self) -> List[Field]:
+        return self.child.fields()
+
+    def children(self) -> list:
+        return [self.child]
+
+    def with_children(self, child: PlanNode) -> PlanNode:
+        return Select(child, self.expression, self.condition, self.name)
+
+    def iterate(self) -> Iterator[tuple]:
+        predicate = compile_condition(self.expression, self.child.positions())
+
+        # Directly on a relation: an index gives the only rows that need to be checked (see Relation.select)
+        if isinstance(self.child, Scan):
+            relation = self.child.relation
+            candidates = relation.index_lookup(self.expression)
+            if candidates is not None:
+                return filter(predicate, map(relation.row_values, candidates))
+
+        return filter(predicate, self.child.iterate())
+
+    def batches(self, batch_size: int = BATCH_SIZE) -> Iterator[Batch]:
+        mask = compile_mask(self.expression, self.child.positions())
+
+        source = None
+        if isinstance(self.child, Scan):
+            relation = self.child.relation
+            candidates = relation.index_lookup(self.expression)
+            if candidates is not None:
+                source = batches_of_rows(map(relation.row_values, candidates), len(relation.fields), batch_size)
+        if source is None:
+            source = self.child.batches(batch_size)
+
+        return filter_batches(source, mask)
+
+    def describe(self) -> str:
+        return f"Select [{self.name}]: {self.expression.to_source()}"
+
+
+class Project(PlanNode):
+    def __init__(self, child: PlanNode, col_names: tuple, name: str = None):
+        """
+        Raises:
+            ValueError: invalid column
+        """
+        self.child = child
+        self.col_names = tuple(col_names)
+        self.name = name if name is not None else f"{child.name} PROJECTED {self.col_names}"
+
+        child_names = child.field_names()
+        if "*" in self.col_names:
+            self.col_names = tuple(child_names)
+        for col_name in self.col_names:
+            if col_name not in child_names:
+                raise ValueError(f"Column {col_name} doesn't exist")
+
+    def fields(self) -> List[Field]:
+        # Like Relation.project: the kept fields have the order they have in the child
+        return [field for field in self.child.fields() if field.name in self.col_names]
+
+    def children(self) -> list:
+        return [self.child]
+
+    def with_children(self, child: PlanNode) -> PlanNode:
+        return Project(child, self.col_names, self.name)
+
+    def iterate(self) -> Iterator[tuple]:
+        positions = [position for position, name in enumerate(self.child.field_names()) if name in self.col_names]
+        return map(values_getter(positions), self.child.iterate())
+
+    def batches(self, batch_size: int = BATCH_SIZE) -> Iterator[Batch]:
+        positions = [position for position, name in enumerate(self.child.field_names()) if name in self.col_names]
+        return (batch.pick(positions) for batch in self.child.batches(batch_size))
+
+    def describe(self) -> str:
+        return f"Project [{self.name}]: {', '.join(self.col_names)}"
+
+
+class Product(PlanNode):
+    def __init__(self, left: PlanNode, right: PlanNode, name: str = None):
+        self.left = left
+        self.right = right
+        self.name = name if name is not None else f"{left.name} x {right.name}"
+
+    def fields(self) -> List[Field]:
+        return prefixed_fields(self.left, self.right)
+
+    def children(self) -> list:
+        return [self.left, self.right]
+
+    def with_children(self, left: PlanNode, right: PlanNode) -> PlanNode:
+        return Product(left, right, self.name)
+
+    def iterate(self) -> Iterator[tuple]:
+        right_rows = list(self.right.iterate())
+        for left_values in self.left.iterate():
+            for right_values in right_rows:
+                yield left_values + right_values
+
+    def batches(self, batch_size: int = BATCH_SIZE) -> Iterator[Batch]:
+        return product_batches(self.left, self.right, batch_size)
+
+    def describe(self) -> str:
+        return f"Product [{self.name}]"
+
+
+class Join(PlanNode):
+    """
+    A theta join: the rows of the product of both children matching the expression
+    """
+
+    def __init__(self, left: PlanNode, right: PlanNode, expression: Expression, method: str = "auto", name: str = None):
+        """
+        Args:
+            expression: the condition parsed with the field names of the product (e.g: "Person.id")
+            method (str): see Relation.theta_join
+        """
+        if method not in ("auto", "hash", "merge", "nested_loop"):
+            raise ValueError(f"Unknown join method: {method}")
+        self.left = left
+        self.right = right
+        self.expression = expression
+        self.method = method
+        self.name = name if name is not None else f"{left.name} THETA JOIN {right.name}"
+
+    def fields(self) -> List[Field]:
+        return prefixed_fields(self.left, self.right)
+
+    def children(self) -> list:
+        return [self.left, self.right]
+
+    def with_children(self, left: PlanNode, right: PlanNode) -> PlanNode:
+        return Join(left, right, self.expression, self.method, self.name)
+
+    def strategy(self):
+        """
+        Chooses the method like Relation.theta_join_pairs
+
+        Returns:
+            method (str): "hash", "merge" or "nested_loop"
+            keys: the comparisons (left field first) used by the method: the equalities for "hash", one comparison for "merge"
+            residual: the rest of the condition, checked on the joined rows (None if there's nothing left)
+            left_positions, right_positions: the position of each prefixed field (e.g: "Person.id") in its side
+
+        Raises:
+            ValueError: if the method can't be used with this condition
+        """
+        left_positions, right_positions = {}, {}
+        for node, positions in ((self.left, left_positions), (self.right, right_positions)):
+            for position, name in enumerate(node.field_names()):
+                positions.setdefault(f"{node.name}.{name}", position)
+        equalities, ranges, residuals = split_join_condition(self.expression, set(left_positions), set(right_positions))
+
+        method = self.method
+        if method == "auto":
+            method = "hash" if equalities else "merge" if ranges else "nested_loop"
+
+        if method == "nested_loop":
+            keys, residuals = [], [self.expression]
+        elif method == "hash":
+            if not equalities:
+                raise ValueError(f"A hash join needs an equality between a field of each relation: {self.expression}")
+            keys, residuals = equalities, [*residuals, *ranges]
+        else:
+            if not equalities and not ranges:
+                raise ValueError(f"A merge join needs a comparison between a field of each relation: {self.expression}")
+            # The merge join uses only one comparison, the others are checked like the rest of the condition
+            keys = [(equalities or ranges)[0]]
+            residuals = [*residuals, *(part for part in [*equalities, *ranges] if part is not keys[0])]
+
+        residual = None if not residuals else residuals[0] if len(residuals) == 1 else And(*residuals)
+        return method, keys, residual, left_positions, right_positions
+
+    def residual_positions(self) -> Dict[str, int]:
+        # Like Relation.theta_join_pairs: a name given by both sides is the field of the right one
+        return {name: position for position, name in enumerate(self.field_names())}
+
+    def iterate(self) -> Iterator[tuple]:
+        """
+        The left rows are streamed, except for the merge join
+        """
+        method, keys, residual, left_positions, right_positions = self.strategy()
+
+        if method == "nested_loop":
+            right_rows = list(self.right.iterate())
+            pairs = ((left_values, right_values) for left_values in self.left.iterate() for right_values in right_rows)
+        elif method == "hash":
+            left_key = values_getter([left_positions[equality.left.name] for equality in keys])
+            probe = hash_probe(self.right, [right_positions[equality.right.name] for equality in keys])
+            pairs = (
+                (left_values, right_values)
+                for left_values in self.left.iterate()
+                for right_values in probe(left_key(left_values))
+            )
+        else:
+            # Blocking: both sides are sorted on the join field
+            comparison = keys[0]
+            left_rows, right_rows = list(self.left.iterate()), list(self.right.iterate())
+            left_position, right_position = left_positions[comparison.left.name], right_positions[comparison.right.name]
+            pairs = (
+                (left_rows[left_index], right_rows[right_index])
+                for left_index, right_index in merge_join(
+                    [values[left_position] for values in left_rows],
+                    [values[right_position] for values in right_rows],
+                    comparison.operator
+                )
+            )
+
+        if residual is None:
+            for left_values, right_values in pairs:
+                yield left_values + right_values
+            return
+
+        predicate = compile_condition(residual, self.residual_positions())
+        for left_values, right_values in pairs:
+            values = left_values + right_values
+            if predicate(values):
+                yield values
+
+    def batches(self, batch_size: int = BATCH_SIZE) -> Iterator[Batch]:
+        method, keys, residual, left_positions, right_positions = self.strategy()
+
+        if method == "nested_loop":
+            joined = product_batches(self.left, self.right, batch_size)
+        elif method == "hash":
+            right = concat_batches(self.right.batches(batch_size), len(self.right.fields()))
+            probe = batch_hash_probe(right, [right_positions[equality.right.name] for equality in keys])
+            left_key_positions = [left_positions[equality.left.name] for equality in keys]
+            joined = (
+                joined_batch
+                for left_batch in self.left.batches(batch_size)
+                for joined_batch in joined_batches(left_batch, right, *probe(left_batch, left_key_positions), batch_size)
+            )
+        else:
+            comparison = keys[0]
+            left = concat_batches(self.left.batches(batch_size), len(self.left.fields()))
+            right = concat_batches(self.right.batches(batch_size), len(self.right.fields()))
+            pairs = list(merge_join(
+                list(left.columns[left_positions[comparison.left.name]]),
+                list(right.columns[right_positions[comparison.right.name]]),
+                comparison.operator
+            ))
+            joined = joined_batches(left, right, [pair[0] for pair in pairs], [pair[1] for pair in pairs], batch_size)
+
+        if residual is None:
+            yield from joined
+            return
+
+        mask = compile_mask(residual, self.residual_positions())
+        yield from filter_batches(joined, mask)
+
+    def describe(self) -> str:
+        return f"Join [{self.name}] ({self.method}): {self.expression.to_source()}"
+
+
+class NaturalJoin(PlanNode):
+    """
+    Relation.natural_join (common_fields given) or Relation.automatic_natural_join (common_fields is None)
+    """
+
+    def __init__(self, left: PlanNode, right: PlanNode, common_fields: tuple = None, name: str = None):
+        self.left = left
+        self.right = right
+        self.common_fields = common_fields
+        if name is None:
+            name = f"{left.name} NATURAL JOIN {right.name}"
+            if common_fields is not None:
+                name += f": {common_fields}"
+        self.name = name
+
+    def join_keys(self):
+        """
+        Returns the join fields of each side, and the positions of the fields kept in the result for each side
+        """
+        left_names, right_names = self.left.field_names(), self.right.field_names()
+        if self.common_fields is not None:
+            left_keys = [self.common_fields[i] for i in range(0, len(self.common_fields), 2)]
+            right_keys = [self.common_fields[i+1] for i in range(0, len(self.common_fields), 2)]
+            left_kept = list(range(len(left_names)))
+            right_kept = [position for position, name in enumerate(right_names) if name not in right_keys]
+            return left_keys, right_keys, left_kept, right_kept
+
+        left_keys = [name for name in left_names if name in right_names]
+        added_fields = set()
+        left_kept, right_kept = [], []
+        for names, kept in ((left_names, left_kept), (right_names, right_kept)):
+            for position, name in enumerate(names):
+                if name.split(".")[-1] not in added_fields:
+                    kept.append(position)
+                    added_fields.add(name.split(".")[-1])
+        return left_keys, left_keys, left_kept, right_kept
+
+    def fields(self) -> List[Field]:
+        _, _, left_kept, right_kept = self.join_keys()
+        left_fields, right_fields = self.left.fields(), self.right.fields()
+        return [*(left_fields[position] for position in left_kept), *(right_fields[position] for position in right_kept)]
+
+    def children(self) -> list:
+        return [self.left, self.right]
+
+    def with_children(self, left: PlanNode, right: PlanNode) -> PlanNode:
+        return NaturalJoin(left, right, self.common_fields, self.name)
+
+    def key_positions(self):
+        """
+        Returns the positions of the join fields of each side, and the positions of the fields kept in the result for each side
+
+        Raises:
+            ValueError: if a join field doesn't exist
+        """
+        left_keys, right_keys, left_kept, right_kept = self.join_keys()
+        left_positions, right_positions = self.left.positions(), self.right.positions()
+        for positions, keys in ((left_positions, left_keys), (right_positions, right_keys)):
+            for key in keys:
+                if key not in positions:
+                    raise ValueError(f"Column {key} doesn't exist")
+        return [left_positions[key] for key in left_keys], [right_positions[key] for key in right_keys], left_kept, right_kept
+
+    def iterate(self) -> Iterator[tuple]:
+        left_key_positions, right_key_positions, left_kept, right_kept = self.key_positions()
+        left_key = values_getter(left_key_positions)
+        probe = hash_probe(self.right, right_key_positions)
+        left_getter, right_getter = values_getter(left_kept), values_getter(right_kept)
+        for left_values in self.left.iterate():
+            kept_values = left_getter(left_values)
+            for right_values in probe(left_key(left_values)):
+                yield kept_values + right_getter(right_values)
+
+    def batches(self, batch_size: int = BATCH_SIZE) -> Iterator[Batch]:
+        left_key_positions, right_key_positions, left_kept, right_kept = self.key_positions()
+        right = concat_batches(self.right.batches(batch_size), len(self.right.fields()))
+        probe = batch_hash_probe(right, right_key_positions)
+        kept_right = right.pick(right_kept)
+        for left_batch in self.left.batches(batch_size):
+            left_indexes, right_indexes = probe(left_batch, left_key_positions)
+            yield from joined_batches(left_batch.pick(left_kept), kept_right, left_indexes, right_indexes, batch_size)
+
+    def describe(self) -> str:
+        on = "common fields" if self.common_fields is None else ", ".join(self.common_fields)
+        return f"NaturalJoin [{self.name}]: {on}"
+
+
+class SetOperation(PlanNode):
+    """
+    Relation.union, Relation.intersection or Relation.difference
+    """
+
+    KINDS = {"union": "UNION", "intersection": "INTERSECTION", "difference": "DIFFERENCE"}
+
+    def __init__(self, kind: str, left: PlanNode, right: PlanNode, field_mapping: dict, name: str = None):
+        """
+        Raises:
+            ValueError: if the kind doesn't exist or a field of the mapping doesn't exist
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown set operation: {kind}")
+        left_names, right_names = left.field_names(), right.field_names()
+        for left_field, right_field in field_mapping.items():
+            if left_field not in left_names:
+                raise ValueError(f"Field '{left_field}' not found in '{left.name}'.")
+            if right_field not in right_names:
+                raise ValueError(f"Field '{right_field}' not found in '{right.name}'.")
+
+        self.kind = kind
+        self.left = left
+        self.right = right
+        self.field_mapping = dict(field_mapping)
+        self.name = name if name is not None else f"{left.name}_{self.KINDS[kind]}_{right.name}"
+
+    def fields(self) -> List[Field]:
+        left_fields = {field.name: field for field in reversed(self.left.fields())}
+        right_fields = {field.name: field for field in reversed(self.right.fields())}
+        return [
+            Field(name, getattr(left_fields[name].domain, self.kind)(right_fields[other_name].domain))
+            for name, other_name in self.field_mapping.items()
+        ]
+
+    def children(self) -> list:
+        return [self.left, self.right]
+
+    def with_children(self, left: PlanNode, right: PlanNode) -> PlanNode:
+        return SetOperation(self.kind, left, right, self.field_mapping, self.name)
+
+    def getters(self):
+        """
+        Returns the functions giving the values of the fields of the mapping from a row of each side
+        """
+        left_positions, right_positions = self.left.positions(), self.right.positions()
+        left_getter = values_getter([left_positions[name] for name in self.field_mapping.keys()])
+        right_getter = values_getter([right_positions[name] for name in self.field_mapping.values()])
+        return left_getter, right_getter
+
+    def iterate(self) -> Iterator[tuple]:
+        left_getter, right_getter = self.getters()
+        return self.combine(map(left_getter, self.left.iterate()), map(right_getter, self.right.iterate()))
+
+    def batches(self, batch_size: int = BATCH_SIZE) -> Iterator[Batch]:
+        # The rows are hashed one at a time anyway, only the children run by batches
+        left_getter, right_getter = self.getters()
+        left_rows = (left_getter(values) for batch in self.left.batches(batch_size) for values in batch.rows())
+        right_rows = (right_getter(values) for batch in self.right.batches(batch_size) for values in batch.rows())
+        return batches_of_rows(self.combine(left_rows, right_rows), len(self.field_mapping), batch_size)
+
+    def combine(self, left_rows: Iterator[tuple], right_rows: Iterator[tuple]) -> Iterator[tuple]:
+        """
+        Applies the operation on the values of the fields of the mapping of each side (see setop/setop.py)
+        """
+        if self.kind == "union":
+            return union_rows(left_rows, right_rows)
+        if isinstance(self.right, Scan):
+            # Directly on a relation: an index on a field of the mapping avoids reading the right rows
+            contains = self.right.relation.membership(list(self.field_mapping.values()))
+        else:
+            contains = key_membership(right_rows)
+        return filter_rows(left_rows, contains, self.kind == "intersection")
+
+    def describe(self) -> str:
+        return f"{self.KINDS[self.kind].capitalize()} [{self.name}]: {self.field_mapping}"
+
+
+class Limit(PlanNode):
+    """
+    Relation.limit: the first n rows, the child isn't run further once they're given
+    """
+
+    def __init__(self, child: PlanNode, n: int, name: str = None):
+        """
+        Raises:
+            ValueError: if n is negative
+        """
+        if n < 0:
+            raise ValueError(f"The number of rows can't be negative: {n}")
+        self.child = child
+        self.n = n
+        self.name = name if name is not None else f"{child.name} LIMIT {n}"
+
+    def fields(self) -> List[Field]:
+        return self.child.fields()
+
+    def children(self) -> list:
+        return [self.child]
+
+    def with_children(self, child: PlanNode) -> PlanNode:
+        return Limit(child, self.n, self.name)
+
+    def iterate(self) -> Iterator[tuple]:
+        return islice(self.child.iterate(), self.n)
+
+    def batches(self, batch_size: int = BATCH_SIZE) -> Iterator[Batch]:
+        remaining = self.n
+        if remaining == 0:
+            return
+        for batch in self.child.batches(batch_size):
+            if batch.length >= remaining:
+                yield batch if batch.length == remaining else batch.take(list(range(remaining)))
+                return
+            remaining -= batch.length
+            yield batch
+
+    def describe(self) -> str:
+        return f"Limit [{self.name}]: {self.n}"
+
+
+class TopK(PlanNode):
+    """
+    Relation.top_k: the first n rows in the order of a field, kept in a heap of n rows while the child is read
+    """
+
+    def __init__(self, child: PlanNode, n: int, field_name: str, descending: bool = True, name: str = None):
+        """
+        Raises:
+            ValueError: if n is negative or the field doesn't exist
+        """
+        if n < 0:
+            raise ValueError(f"The number of rows can't be negative: {n}")
+        if field_name not in child.field_names():
+            raise ValueError(f"Column {field_name} doesn't exist")
+        self.child = child
+        self.n = n
+        self.field_name = field_name
+        self.descending = descending
+        self.name = name if name is not None else f"{child.name} TOP {n} BY {field_name}"
+
+    def fields(self) -> List[Field]:
+        return self.child.fields()
+
+    def children(self) -> list:
+        return [self.child]
+
+    def with_children(self, child: PlanNode) -> PlanNode:
+        return TopK(child, self.n, self.field_name, self.descending, self.name)
+
+    def iterate(self) -> Iterator[tuple]:
+        """
+        Raises:
+            ValueError: if the field has values that can't be compared
+        """
+        if self.n == 0:
+            return iter(())
+        try:
+            return iter(top_rows(self.child.iterate(), self.n, self.child.positions()[self.field_name], self.descending))
+        except TypeError as e:
+            raise ValueError(f"The values of {self.field_name} can't be sorted: {e}")
+
+    def describe(self) -> str:
+        return f"TopK [{self.name}]: {self.n} by {self.field_name} {'descending' if self.descending else 'ascending'}"
+
+
+# ====================================================
+# Helper Functions
+# ====================================================
+
+def prefixed_fields(left: PlanNode, right: PlanNode) -> List[Field]:
+    """
+    The fields of a product or a theta join: each field is named after its relation (e.g: "Person.id")
+    """
+    return [
+        Field(f"{node.name}.{field.name}", domain = field.domain)
+        for node in (left, right) for field in node.fields()
+    ]
+
+def values_getter(positions: List[int]) -> Callable[[tuple], tuple]:
+    """
+    Returns a function taking the values of a row and returning the values at the positions (always as a tuple)
+    """
+    if len(positions) == 0:
+        return lambda values: ()
+    if len(positions) == 1:
+        position = positions[0]
+        return lambda values: (values[position],)
+    return itemgetter(*positions)
+
+def hash_probe(node: PlanNode, positions: List[int]) -> Callable[[tuple], List[tuple]]:
+    """
+    The build side of a hash join on the fields of the node at the positions:
+    returns a function giving the values of the rows of the node whose join fields equal a key (blocking: the node is read once)
+
+    Directly on a relation with an index on the (single) join field, the index is used instead of a hash table
+    """
+    if isinstance(node, Scan) and len(positions) == 1:
+        relation = node.relation
+        index = relation.get_index(relation.fields[positions[0]].name)
+        if index is not None and index.position == positions[0]:
+            row_values = relation.row_values
+            lookup = index.lookup
+            return lambda key: [row_values(row_index) for row_index in lookup("==", key[0])]
+
+    rows = list(node.iterate())
+    table = HashTable(list(map(values_getter(positions), rows)))
+    return lambda key: [rows[right_index] for right_index in table.probe(key)]
+
+def batch_hash_probe(right: Batch, positions: List[int]) -> Callable[[Batch, List[int]], tuple]:
+    """
+    The build side of a hash join on a whole batch (the fields at the positions are the join fields):
+    returns a function taking a batch of the left side and the positions of its join fields,
+    and giving the matching pairs as two lists (left indexes, right indexes), in the order of a cartesian product
+
+    A single join field of int (typed columns on both sides) is probed with NumPy: the right keys are sorted once,
+    then each batch is looked up with a binary search
+    """
+    sorted_keys = order = table = None
+    if numpy is not None and len(positions) == 1 and column_typecode(right.columns[positions[0]]) == "q":
+        keys = numpy.frombuffer(right.columns[positions[0]], dtype = "int64")
+        order = numpy.argsort(keys, kind = "stable")  # Equal keys keep the order of the right rows
+        sorted_keys = keys[order]
+
+    def probe(left: Batch, left_positions: List[int]) -> tuple:
+        nonlocal table
+        if sorted_keys is not None:
+            column = left.columns[left_positions[0]]
+            if column_typecode(column) == "q":
+                values = numpy.frombuffer(column, dtype = "int64")
+                starts = numpy.searchsorted(sorted_keys, values, side = "left")
+                counts = numpy.searchsorted(sorted_keys, values, side = "right") - starts
+                left_indexes = numpy.repeat(numpy.arange(len(values)), counts)
+                offsets = numpy.arange(len(left_indexes)) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+                right_indexes = order[numpy.repeat(starts, counts) + offsets]
+                return left_indexes.tolist(), right_indexes.tolist()
+
+        if table is None:
+            table = HashTable(list(map(values_getter(positions), right.rows())))
+        left_indexes, right_indexes = [], []
+        for left_index, key in enumerate(map(values_getter(left_positions), left.rows())):
+            for right_index in table.probe(key):
+                left_indexes.append(left_index)
+                right_indexes.append(right_index)
+        return left_indexes, right_indexes
+
+    return probe
+
+def joined_batches(left: Batch, right: Batch, left_indexes: List[int], right_indexes: List[int], batch_size: int) -> Iterator[Batch]:
+    """
+    Gathers the pairs of rows (left index, right index) side by side, by batches of batch_size rows
+    """
+    for start in range(0, len(left_indexes), batch_size):
+        left_chunk = left_indexes[start:start + batch_size]
+        right_chunk = right_indexes[start:start + batch_size]
+        yield Batch(left.take(left_chunk).columns + right.take(right_chunk).columns, len(left_chunk))
+
+def product_batches(left: PlanNode, right: PlanNode, batch_size: int) -> Iterator[Batch]:
+    """
+    The cartesian product by batches: the right side is read once, then crossed with a few left rows at a time
+    """
+    right_batch = concat_batches(right.batches(batch_size), len(right.fields()))
+    right_count = right_batch.length
+    if right_count == 0:
+        return
+    rows_per_batch = max(1, batch_size // right_count)
+    for left_batch in left.batches(batch_size):
+        for start in range(0, left_batch.length, rows_per_batch):
+            count = min(rows_per_batch, left_batch.length - start)
+            left_indexes = [index for index in range(start, start + count) for _ in range(right_count)]
+            yield from joined_batches(left_batch, right_batch, left_indexes, list(range(right_count)) * count, len(left_indexes))
+
+def filter_batches(batches: Iterator[Batch], mask: Callable) -> Iterator[Batch]:
+    """
+    Keeps the rows of each batch where the mask (see condition/vectorize.py) is True
+    """
+    for batch in batches:
+        indexes = mask_indexes(mask(batch.columns, batch.length))
+        if len(indexes) == batch.length:
+            yield batch
+        elif indexes:
+            yield batch.take(indexes)
@@ -0,0 +1,138 @@
+import weakref
+from typing import Callable, Iterable, List, Optional
+from ..condition.compiler import compile_condition
+from .optimizer import optimize
+from .plan import PlanNode, Project, Scan, Select, values_getter
+
+"""
+Materialized views of a relation, kept up to date on every insert
+
+A view is defined like a lazy query on the relation, made of selections and projections only:
+    adults = person.materialize(person.lazy().select("age >= 18").project("name"))
+It's computed once, then each row inserted in the relation (insert, insert_many, add_tuple) goes through the
+selections and the projections of the view and is appended to it if it's kept: the cost is O(1) per inserted row,
+whatever the size of the relation. Replacing the tuples of the relation computes the views again.
+
+The view is an ordinary Relation (it can be queried, indexed, cached, or be the source of other views),
+it's kept up to date as long as it's used: the relation doesn't keep it alive.
+Its fields are the ones of the definition: a field added later to the relation isn't in the view
+"""
+
+class MaterializedView:
+    """
+    The link between a relation and one of its views: the function giving the row of the view from an inserted row
+    """
+
+    # ====================================================
+    # Initialisation Method
+    # ====================================================
+
+    def __init__(self, plan: PlanNode, view: "Relation"):
+        """
+        Args:
+            plan: the definition of the view (a plan made of Select and Project nodes on a Scan of the relation)
+            view: the relation holding the rows of the view
+        """
+        self.plan = plan
+        self.view = weakref.ref(view)
+        self.delta = view_delta(plan)
+
+    # ====================================================
+    # Main Methods
+    # ====================================================
+
+    def apply(self, rows: Iterable[tuple]) -> bool:
+        """
+        Appends to the view the rows it keeps among the inserted rows (given by their values),
+        returns False if the view doesn't exist anymore
+        """
+        view = self.view()
+        if view is None:
+            return False
+        delta = self.delta
+        for values in rows:
+            values = delta(values)
+            if values is not None:
+                view.append_values(values)
+        return True
+
+    def refresh(self) -> bool:
+        """
+        Computes the view again from every row of the relation, returns False if the view doesn't exist anymore
+        """
+        view = self.view()
+        if view is None:
+            return False
+        view.tuples = []
+        return self.apply(self.plan_source().rows_values())
+
+    def plan_source(self) -> "Relation":
+        node = self.plan
+        while not isinstance(node, Scan):
+            node = node.children()[0]
+        return node.relation
+
+# ====================================================
+# Delta
+# ====================================================
+
+def check_view_plan(plan: PlanNode, relation: "Relation") -> None:
+    """
+    Raises:
+        ValueError: if the plan isn't made of selections and projections only on a scan of the relation
+    """
+    node = plan
+    while not isinstance(node, Scan):
+        if not isinstance(node, (Select, Project)):
+            raise ValueError(f"A materialized view can only select and project, got: {node.describe()}")
+        node = node.child
+    if node.relation is not relation:
+        raise ValueError(f"A materialized view of {relation.name} must be defined on a query of that relation itself")
+
+def view_delta(plan: PlanNode) -> Callable[[tuple], Optional[tuple]]:
+    """
+    Returns the function giving the row of the view from the values of a row of the relation, or None if the view doesn't keep it
+
+    Example:
+        Input: Project(Select(Scan(Person), "age >= 18"), ("name",))
+        Output: a function giving ("Pupuce",) for (1, "Pupuce", 25) and None for (2, "Japon", 12)
+    """
+    # The steps from the scan up, each one with the fields of the rows it receives
+    steps = []
+    node = optimize(plan)
+    while not isinstance(node, Scan):
+        if isinstance(node, Select):
+            steps.append(("select", compile_condition(node.expression, node.child.positions())))
+        else:
+            positions = [position for position, name in enumerate(node.child.field_names()) if name in node.col_names]
+            steps.append(("project", values_getter(positions)))
+        node = node.child
+    steps.reverse()
+    if not any(kind == "project" for kind, _ in steps):
+        # The rows keep the fields the relation had when the view was defined
+        steps.append(("project", values_getter(list(range(len(node.fields()))))))
+
+    if len(steps) == 1 and steps[0][0] == "project":
+        return steps[0][1]
+    if len(steps) == 2 and steps[0][0] == "select" and steps[1][0] == "project":
+        predicate, project = steps[0][1], steps[1][1]
+        return lambda values: project(values) if predicate(values) else None
+
+    def delta(values: tuple) -> Optional[tuple]:
+        for kind, step in steps:
+            if kind == "select":
+                if not step(values):
+                    return None
+            else:
+                values = step(values)
+        return values
+    return delta
+
+def apply_views(views: List[MaterializedView], rows: List[tuple]) -> None:
+    """
+    Gives the inserted rows to every view of a relation, the views that don't exist anymore are forgotten
+    """
+    views[:] = [view for view in views if view.apply(rows)]
+
+def refresh_views(views: List[MaterializedView]) -> None:
+    views[:] = [view for view in views if view.refresh()]
@@ -0,0 +1,46 @@
+from typing import Callable, Iterable, Iterator
+
+"""
+Set operations (union, intersection, difference) working on the values of the mapped fields of each row
+
+The rows are hashed as they are, no row object is created: a row of the result is the tuple of the values
+of the mapped fields, and only the rows that are kept are built into the result.
+Like the selection and the joins, two values of different types never match (1 and "1", 1 and 1.0, 1 and True)
+"""
+
+def typed_key(values: tuple) -> tuple:
+    """
+    The key of a row in a set: the values and their types
+
+    Example:
+        Input: (1, "Pupuce")
+        Output: ((1, "Pupuce"), (int, str))
+    """
+    return values, tuple(map(type, values))
+
+def union_rows(left_rows: Iterable[tuple], right_rows: Iterable[tuple]) -> Iterator[tuple]:
+    """
+    Yields the rows of both sides without duplicates, in the order they come
+    """
+    added = set()
+    for rows in (left_rows, right_rows):
+        for values in rows:
+            key = typed_key(values)
+            if key not in added:
+                added.add(key)
+                yield values
+
+def filter_rows(left_rows: Iterable[tuple], contains: Callable[[tuple], bool], keep: bool) -> Iterator[tuple]:
+    """
+    Yields the left rows that the other side contains (intersection, keep is True) or doesn't contain (difference, keep is False)
+    """
+    for values in left_rows:
+        if contains(values) == keep:
+            yield values
+
+def key_membership(rows: Iterable[tuple]) -> Callable[[tuple], bool]:
+    """
+    Returns the function telling if a row is one of the rows (read once and hashed)
+    """
+    keys = set(map(typed_key, rows))
+    return lambda values: typed_key(values) in keys
@@ -0,0 +1,148 @@
+import heapq
+import pickle
+import tempfile
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Sequence, Tuple
+from ..condition.vectorize import NUMPY_TYPES, column_typecode, numpy
+
+"""
+Sort algorithms working on the rows of a relation (or on the values of the sorted fields)
+
+The rows are ordered by the first sorted field, then by the second one for the rows with the same first value, and so on.
+None comes after every other value (so first when the order is descending) and equal rows keep their order (stable sort).
+Values that Python can't compare (e.g: 1 and "a" in the same column) can't be sorted.
+
+A top-k (the n first rows in that order) only keeps n rows in a heap while reading the others.
+
+When there are more than max_rows rows, they're sorted by runs of max_rows rows written to temporary files,
+then the runs are merged (a k-way merge with a heap): only one chunk of each run is in memory at a time
+"""
+
+MAX_SORT_ROWS = 1_000_000
+RUN_CHUNK = 1000  # Rows pickled together in a run file
+
+# ====================================================
+# Sort keys
+# ====================================================
+
+def sort_key(positions: Sequence[int], descending: Sequence[bool]) -> Tuple[Callable[[tuple], tuple], bool]:
+    """
+    Returns the key of a row for sorted() or heapq.merge(), and whether the order has to be reversed
+
+    Example:
+        Input: [2], [True]
+        Output: a key giving (False, 25) for (1, "Pupuce", 25) and (True, None) for (2, "Japon", None), True
+    """
+    if len(set(descending)) == 1:
+        if len(positions) == 1:
+            position = positions[0]
+            return (lambda row: (row[position] is None, row[position])), descending[0]
+        return (lambda row: tuple((row[position] is None, row[position]) for position in positions)), descending[0]
+
+    # Both orders: the descending values are wrapped to compare the other way round
+    order = list(zip(positions, descending))
+    return (lambda row: tuple(Descending((row[position] is None, row[position])) if reverse else (row[position] is None, row[position]) for position, reverse in order)), False
+
+
+class Descending:
+    """
+    A sort key compared in the opposite order
+    """
+
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+# ====================================================
+# Sorting
+# ====================================================
+
+def sort_indexes(columns: List[Sequence], descending: Sequence[bool]) -> List[int]:
+    """
+    Returns the positions of the rows in sorted order, given the values of the sorted fields (one column per field)
+    """
+    if len(columns) == 1:
+        indexes = argsort_column(columns[0], descending[0])
+        if indexes is not None:
+            return indexes
+        if None not in columns[0]:
+            return sorted(range(len(columns[0])), key = columns[0].__getitem__, reverse = descending[0])
+    key, reverse = sort_key(range(len(columns)), descending)
+    keys = [key(values) for values in zip(*columns)]
+    return sorted(range(len(keys)), key = keys.__getitem__, reverse = reverse)
+
+def top_indexes(column: Sequence, n: int, descending: bool) -> List[int]:
+    """
+    Returns the positions of the n first values of a column in sorted order, with a heap of n values (O(N log n) time, O(n) memory)
+    """
+    select = heapq.nlargest if descending else heapq.nsmallest
+    return select(n, range(len(column)), key = lambda index: (column[index] is None, column[index]))
+
+def top_rows(rows: Iterable[tuple], n: int, position: int, descending: bool) -> List[tuple]:
+    """
+    Returns the n first rows in the order of the field at the position, read one at a time and kept in a heap of n rows
+    """
+    key, reverse = sort_key([position], [descending])
+    return (heapq.nlargest if reverse else heapq.nsmallest)(n, rows, key = key)
+
+def argsort_column(column: Sequence, descending: bool) -> List[int]:
+    """
+    Returns the positions of the values of a typed column in sorted order, computed with NumPy,
+    or None if it can't be (no NumPy, not a typed column, or a NaN that Python wouldn't sort the same way)
+    """
+    typecode = column_typecode(column)
+    if numpy is None or typecode is None:
+        return None
+    values = numpy.frombuffer(column, dtype = NUMPY_TYPES[typecode])
+    if typecode == "d" and numpy.isnan(values).any():
+        return None
+    if not descending:
+        return numpy.argsort(values, kind = "stable").tolist()
+    # A stable descending order: the ascending order of the reversed values, reversed
+    return (len(values) - 1 - numpy.argsort(values[::-1], kind = "stable")[::-1]).tolist()
+
+def external_sort(rows: Iterable[tuple], key: Callable[[tuple], tuple], reverse: bool, max_rows: int = MAX_SORT_ROWS) -> Iterator[tuple]:
+    """
+    Sorts rows by runs of max_rows rows written to temporary files, then yields them by merging the runs
+
+    Raises:
+        ValueError: if max_rows isn't positive
+    """
+    if max_rows < 1:
+        raise ValueError(f"The number of rows sorted in memory must be positive, got {max_rows}")
+    runs = []
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, max_rows))
+        if not chunk:
+            break
+        chunk.sort(key = key, reverse = reverse)
+        runs.append(write_run(chunk))
+        chunk.clear()
+    return heapq.merge(*(read_run(run) for run in runs), key = key, reverse = reverse)
+
+def write_run(rows: List[tuple]):
+    file = tempfile.TemporaryFile()
+    for start in range(0, len(rows), RUN_CHUNK):
+        pickle.dump(rows[start:start + RUN_CHUNK], file, pickle.HIGHEST_PROTOCOL)
+    return file
+
+def read_run(file) -> Iterator[tuple]:
+    """
+    Yields the rows of a run one chunk at a time, the file is deleted once it's read
+    """
+    with file:
+        file.seek(0)
+        while True:
+            try:
+                chunk = pickle.load(file)
+            except EOFError:
+                return
+            yield from chunk